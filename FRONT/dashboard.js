@@ -5,11 +5,14 @@ if (localStorage.getItem("sesion_veterinaria") !== "ok") {
 const usuario = localStorage.getItem("usuario_veterinaria") || "-";
 document.getElementById("usuario").textContent = "Usuario: " + usuario;
 
-document.getElementById("btnSalir").addEventListener("click", function () {
+function cerrarSesion() {
   localStorage.removeItem("sesion_veterinaria");
   localStorage.removeItem("usuario_veterinaria");
+  localStorage.removeItem("token_veterinaria");
   window.location.href = "./login.html";
-});
+}
+
+document.getElementById("btnSalir").addEventListener("click", cerrarSesion);
 
 const urlPersonas = "http://localhost:8000/personas/";
 const urlDuenos = "http://localhost:8000/duenos/";
@@ -17,13 +20,208 @@ const urlMascotas = "http://localhost:8000/mascotas/";
 const urlVeterinarios = "http://localhost:8000/veterinarios/";
 const urlCitas = "http://localhost:8000/citas/";
 const urlUsuarios = "http://localhost:8000/usuarios/";
+const urlBootstrap = "http://localhost:8000/dashboard/bootstrap";
+
+// Tras una escritura la API puede leer de una réplica atrasada; durante esta ventana
+// (DB_LECTURA_TRAS_ESCRITURA en el servidor) las lecturas piden la primaria con X-Leer-Primaria.
+const ventanaLecturaPrimaria = 5000;
+const metodosEscritura = ["POST", "PUT", "PATCH", "DELETE"];
+
+function fetchApi(url, opciones) {
+  opciones = Object.assign({ credentials: "include" }, opciones);
+  const metodo = String(opciones.method || "GET").toUpperCase();
+  const escritura = metodosEscritura.indexOf(metodo) >= 0;
+  const ultimaEscritura = Number(sessionStorage.getItem("ultima_escritura_veterinaria") || 0);
+
+  // La API exige el token que devolvió /usuarios/login en todas las rutas salvo el login.
+  opciones.headers = Object.assign({}, opciones.headers, {
+    Authorization: "Bearer " + (localStorage.getItem("token_veterinaria") || ""),
+  });
+
+  if (!escritura && Date.now() - ultimaEscritura < ventanaLecturaPrimaria) {
+    opciones.headers = Object.assign({}, opciones.headers, { "X-Leer-Primaria": "1" });
+  }
+
+  return fetch(url, opciones).then(function (response) {
+    if (response.status === 401) {
+      cerrarSesion();
+    }
+    if (escritura && response.ok) {
+      sessionStorage.setItem("ultima_escritura_veterinaria", String(Date.now()));
+      bootstrapPendiente = null;
+    }
+    return response;
+  });
+}
+
+// Los listados devuelven como mucho `limit` filas y el cursor de la siguiente página en
+// X-Next-Cursor. Las tablas se muestran de a una página (fetchPagina); los nombres de
+// personas, dueños, mascotas y veterinarios salen del bootstrap del dashboard.
+const TAMANO_PAGINA = 50;
+// Máximo que admite la API por página; lo usan los selectores ya filtrados en el servidor.
+const LIMITE_SELECTOR = 1000;
+
+// Por listado: cursor de la página actual, los de las páginas anteriores y el siguiente.
+const paginacion = {};
+
+function estadoPaginacion(clave) {
+  if (!paginacion[clave]) {
+    paginacion[clave] = { anteriores: [], actual: null, siguiente: null };
+  }
+  return paginacion[clave];
+}
+
+function reiniciarPaginacion(clave) {
+  paginacion[clave] = { anteriores: [], actual: null, siguiente: null };
+}
+
+function construirUrl(url, parametros) {
+  let partes = [];
+  for (const nombre in parametros) {
+    const valor = parametros[nombre];
+    if (valor === null || valor === undefined || valor === "") continue;
+    partes.push(encodeURIComponent(nombre) + "=" + encodeURIComponent(valor));
+  }
+  return partes.length > 0 ? url + "?" + partes.join("&") : url;
+}
+
+function fetchPagina(clave, url, parametros) {
+  const estado = estadoPaginacion(clave);
+  const consulta = Object.assign({ limit: TAMANO_PAGINA, after: estado.actual }, parametros);
+  return fetchApi(construirUrl(url, consulta), {
+    method: "GET",
+    headers: { "content-type": "application/json" },
+  }).then(function (response) {
+    estado.siguiente = response.headers.get("X-Next-Cursor");
+    return response.json();
+  });
+}
+
+function pintarPaginacion(clave, contenedorId, recargar) {
+  const estado = estadoPaginacion(clave);
+  const contenedor = document.getElementById(contenedorId);
+  contenedor.innerHTML = "";
+
+  const anterior = document.createElement("button");
+  anterior.type = "button";
+  anterior.className = "secondary";
+  anterior.textContent = "Anterior";
+  anterior.disabled = estado.anteriores.length === 0;
+  anterior.addEventListener("click", function () {
+    estado.actual = estado.anteriores.pop() || null;
+    recargar();
+  });
+
+  const pagina = document.createElement("span");
+  pagina.textContent = "Página " + (estado.anteriores.length + 1);
+
+  const siguiente = document.createElement("button");
+  siguiente.type = "button";
+  siguiente.className = "secondary";
+  siguiente.textContent = "Siguiente";
+  siguiente.disabled = !estado.siguiente;
+  siguiente.addEventListener("click", function () {
+    estado.anteriores.push(estado.actual);
+    estado.actual = estado.siguiente;
+    recargar();
+  });
+
+  contenedor.appendChild(anterior);
+  contenedor.appendChild(pagina);
+  contenedor.appendChild(siguiente);
+}
+
+// Resuelve por id (GET {url}batch?ids=...) solo las filas referenciadas por la página visible.
+function fetchLote(url, ids) {
+  let unicos = [];
+  for (let i = 0; i < ids.length; i++) {
+    if (ids[i] && unicos.indexOf(ids[i]) < 0) unicos.push(ids[i]);
+  }
+  if (unicos.length === 0) return Promise.resolve({});
+
+  return fetchApi(url + "batch?ids=" + unicos.join(","), {
+    method: "GET",
+    headers: { "content-type": "application/json" },
+  })
+    .then(function (response) {
+      return response.json();
+    })
+    .then(function (data) {
+      return (data && data.datos) || {};
+    });
+}
+
+function diaSiguiente(fecha) {
+  const dia = new Date(fecha + "T00:00:00");
+  dia.setDate(dia.getDate() + 1);
+  return (
+    dia.getFullYear() +
+    "-" +
+    String(dia.getMonth() + 1).padStart(2, "0") +
+    "-" +
+    String(dia.getDate()).padStart(2, "0") +
+    "T00:00:00"
+  );
+}
+
+// Las proyecciones de nombres y los contadores llegan juntos desde /dashboard/bootstrap.
+// Selectores y tablas comparten la misma promesa; fetchApi la descarta tras cada escritura.
+let bootstrapPendiente = null;
+
+function datosBootstrap() {
+  if (!bootstrapPendiente) {
+    const pendiente = fetchApi(construirUrl(urlBootstrap, { limit: TAMANO_PAGINA }), {
+      method: "GET",
+      headers: { "content-type": "application/json" },
+    })
+      .then(function (response) {
+        return response.json();
+      })
+      .then(function (data) {
+        if (!data || !Array.isArray(data.personas)) {
+          throw new Error((data && data.detail) || "Error al cargar el dashboard");
+        }
+        return data;
+      });
+    pendiente.catch(function () {
+      if (bootstrapPendiente === pendiente) bootstrapPendiente = null;
+    });
+    bootstrapPendiente = pendiente;
+  }
+  return bootstrapPendiente;
+}
+
+function mapaNombres(filas) {
+  let mapa = {};
+  for (let i = 0; i < filas.length; i++) {
+    mapa[filas[i].id] = filas[i].nombre;
+  }
+  return mapa;
+}
+
+function etiquetaMascota(mascota) {
+  return mascota.nombre + " (" + mascota.especie + ")";
+}
+
+function etiquetaNombre(fila) {
+  return fila.nombre || "Sin nombre";
+}
+
+function llenarSelect(select, textoVacio, filas, etiqueta, selectedId) {
+  let opciones = '<option value="">' + textoVacio + "</option>";
+  for (let i = 0; i < filas.length; i++) {
+    opciones += '<option value="' + filas[i].id + '">' + etiqueta(filas[i]) + "</option>";
+  }
+  select.innerHTML = opciones;
+  if (selectedId) {
+    select.value = String(selectedId);
+  }
+}
 
 let idPersonaEditando = null;
 let idDuenoEditando = null;
 let idMascotaEditando = null;
 let idCitaEditando = null;
-let personasCache = [];
-let duenosCache = [];
 
 const viewDashboard = document.getElementById("viewDashboard");
 const viewPersonas = document.getElementById("viewPersonas");
@@ -120,6 +318,7 @@ const estadoTratamiento = document.getElementById("estadoTratamiento");
 const fechaInicioTratamiento = document.getElementById("fechaInicioTratamiento");
 const fechaFinTratamiento = document.getElementById("fechaFinTratamiento");
 const objetivoTratamiento = document.getElementById("objetivoTratamiento");
+const mascotaTratamiento = document.getElementById("mascotaTratamiento");
 const historialTratamiento = document.getElementById("historialTratamiento");
 const tablaTratamientos = document.getElementById("tablaTratamientos");
 const msgTratamiento = document.getElementById("msgTratamiento");
@@ -155,34 +354,56 @@ const btnReporteGeneral = document.getElementById("btnReporteGeneral");
 const salidaReporteIndividual = document.getElementById("salidaReporteIndividual");
 const salidaReporteGeneral = document.getElementById("salidaReporteGeneral");
 
+const filtroEstadoCita = document.getElementById("filtroEstadoCita");
+const filtroDesdeCita = document.getElementById("filtroDesdeCita");
+const filtroHastaCita = document.getElementById("filtroHastaCita");
+const btnFiltrarCita = document.getElementById("btnFiltrarCita");
+const filtroMascotaHistorial = document.getElementById("filtroMascotaHistorial");
+const filtroDesdeHistorial = document.getElementById("filtroDesdeHistorial");
+const filtroHastaHistorial = document.getElementById("filtroHastaHistorial");
+const btnFiltrarHistorial = document.getElementById("btnFiltrarHistorial");
+const filtroEstadoTratamiento = document.getElementById("filtroEstadoTratamiento");
+const btnFiltrarTratamiento = document.getElementById("btnFiltrarTratamiento");
+const filtroEstadoControl = document.getElementById("filtroEstadoControl");
+const btnFiltrarControl = document.getElementById("btnFiltrarControl");
+
+function esNombreAsignable(nombre) {
+  const completo = String(nombre || "").toUpperCase().replace(/\s+/g, " ").trim();
+  return completo.indexOf("SIN ASIGNAR") < 0;
+}
+
 function esPersonaAsignable(persona) {
-  const nom = String(persona.nombres || "").toUpperCase().trim();
-  const ape = String(persona.apellidos || "").toUpperCase().trim();
-  const completo = (nom + " " + ape).replace(/\s+/g, " ").trim();
-
-  if (nom === "SIN ASIGNAR" || ape === "SIN ASIGNAR") return false;
-  if (completo === "SIN ASIGNAR") return false;
-  if (completo.indexOf("SIN ASIGNAR") >= 0) return false;
-  return true;
+  return esNombreAsignable((persona.nombres || "") + " " + (persona.apellidos || ""));
 }
 
-function cargarContador(url, targetId) {
-  fetch(url, {
-    method: "GET",
-    headers: { "content-type": "application/json" },
-  })
-    .then(function (response) {
-      return response.json();
-    })
+function personasAsignables(personas) {
+  let filas = [];
+  for (let i = 0; i < personas.length; i++) {
+    if (esNombreAsignable(personas[i].nombre)) filas.push(personas[i]);
+  }
+  return filas;
+}
+
+function cargarContadores() {
+  const contadores = {
+    personas: "cntPersonas",
+    duenos: "cntDuenos",
+    mascotas: "cntMascotas",
+    veterinarios: "cntVeterinarios",
+    citas: "cntCitas",
+    usuarios: "cntUsuarios",
+  };
+
+  datosBootstrap()
     .then(function (data) {
-      if (Array.isArray(data)) {
-        document.getElementById(targetId).textContent = data.length;
-      } else {
-        document.getElementById(targetId).textContent = "0";
+      for (const clave in contadores) {
+        document.getElementById(contadores[clave]).textContent = String(data.conteos[clave] || 0);
       }
     })
     .catch(function () {
-      document.getElementById(targetId).textContent = "0";
+      for (const clave in contadores) {
+        document.getElementById(contadores[clave]).textContent = "0";
+      }
     });
 }
 
@@ -201,6 +422,7 @@ function mostrarVista(nombreVista) {
 
   if (nombreVista === "dashboard") {
     viewDashboard.classList.remove("hidden");
+    cargarContadores();
   }
   if (nombreVista === "personas") {
     viewPersonas.classList.remove("hidden");
@@ -209,6 +431,7 @@ function mostrarVista(nombreVista) {
   if (nombreVista === "duenos") {
     viewDuenos.classList.remove("hidden");
     listarDuenos();
+    cargarPersonasSelect();
   }
   if (nombreVista === "mascotas") {
     viewMascotas.classList.remove("hidden");
@@ -236,6 +459,7 @@ function mostrarVista(nombreVista) {
   if (nombreVista === "tratamientos") {
     viewTratamientos.classList.remove("hidden");
     listarTratamientos();
+    cargarMascotasTratamientoSelect();
     cargarHistorialTratamientoSelect();
   }
   if (nombreVista === "usuarios") {
@@ -274,119 +498,29 @@ function limpiarFormularioPersona() {
 }
 
 function cargarPersonasSelect(selectedId) {
-  fetch(urlPersonas, {
-    method: "GET",
-    headers: { "content-type": "application/json" },
-  })
-    .then(function (response) {
-      return response.json();
-    })
+  datosBootstrap()
     .then(function (data) {
-      personasCache = Array.isArray(data) ? data : [];
-
-      let opciones = '<option value="">Selecciona persona</option>';
-      for (let i = 0; i < personasCache.length; i++) {
-        if (!esPersonaAsignable(personasCache[i])) continue;
-        opciones +=
-          '<option value="' +
-          personasCache[i].id +
-          '">' +
-          personasCache[i].nombres +
-          " " +
-          personasCache[i].apellidos +
-          "</option>";
-      }
-
-      personaId.innerHTML = opciones;
-      if (selectedId) {
-        personaId.value = String(selectedId);
-      }
+      llenarSelect(personaId, "Selecciona persona", personasAsignables(data.personas), etiquetaNombre, selectedId);
     })
     .catch(function () {
       personaId.innerHTML = '<option value="">Error al cargar personas</option>';
     });
 }
 
-function cargarDatosDuenos(callback) {
-  fetch(urlPersonas, {
-    method: "GET",
-    headers: { "content-type": "application/json" },
-  })
-    .then(function (response) {
-      return response.json();
-    })
-    .then(function (personas) {
-      personasCache = Array.isArray(personas) ? personas : [];
-      fetch(urlDuenos, {
-        method: "GET",
-        headers: { "content-type": "application/json" },
-      })
-        .then(function (response) {
-          return response.json();
-        })
-        .then(function (duenos) {
-          duenosCache = Array.isArray(duenos) ? duenos : [];
-          if (callback) callback();
-        })
-        .catch(function () {
-          duenosCache = [];
-          if (callback) callback();
-        });
+function cargarDuenosSelect(selectedId) {
+  datosBootstrap()
+    .then(function (data) {
+      llenarSelect(duenoMascota, "Selecciona dueño", personasAsignables(data.duenos), etiquetaNombre, selectedId);
     })
     .catch(function () {
-      personasCache = [];
-      duenosCache = [];
-      if (callback) callback();
+      duenoMascota.innerHTML = '<option value="">Error al cargar dueños</option>';
     });
 }
 
-function cargarDuenosSelect(selectedId) {
-  cargarDatosDuenos(function () {
-    let personaMap = {};
-    for (let i = 0; i < personasCache.length; i++) {
-      personaMap[personasCache[i].id] = personasCache[i].nombres + " " + personasCache[i].apellidos;
-    }
-
-    let opciones = '<option value="">Selecciona dueño</option>';
-    for (let i = 0; i < duenosCache.length; i++) {
-      const nombreDueno = String(personaMap[duenosCache[i].persona_id] || "");
-      if (nombreDueno.toUpperCase().indexOf("SIN ASIGNAR") >= 0) continue;
-      opciones += '<option value="' + duenosCache[i].id + '">' + nombreDueno + "</option>";
-    }
-
-    duenoMascota.innerHTML = opciones;
-    if (selectedId) {
-      duenoMascota.value = String(selectedId);
-    }
-  });
-}
-
 function cargarPersonasVeterinarioSelect(selectedId) {
-  fetch(urlPersonas, {
-    method: "GET",
-    headers: { "content-type": "application/json" },
-  })
-    .then(function (response) {
-      return response.json();
-    })
+  datosBootstrap()
     .then(function (data) {
-      personasCache = Array.isArray(data) ? data : [];
-      let opciones = '<option value="">Selecciona persona</option>';
-      for (let i = 0; i < personasCache.length; i++) {
-        if (!esPersonaAsignable(personasCache[i])) continue;
-        opciones +=
-          '<option value="' +
-          personasCache[i].id +
-          '">' +
-          personasCache[i].nombres +
-          " " +
-          personasCache[i].apellidos +
-          "</option>";
-      }
-      personaVeterinario.innerHTML = opciones;
-      if (selectedId) {
-        personaVeterinario.value = String(selectedId);
-      }
+      llenarSelect(personaVeterinario, "Selecciona persona", personasAsignables(data.personas), etiquetaNombre, selectedId);
     })
     .catch(function () {
       personaVeterinario.innerHTML = '<option value="">Error al cargar personas</option>';
@@ -394,24 +528,9 @@ function cargarPersonasVeterinarioSelect(selectedId) {
 }
 
 function cargarMascotasCitaSelect(selectedId) {
-  fetch(urlMascotas, {
-    method: "GET",
-    headers: { "content-type": "application/json" },
-  })
-    .then(function (response) {
-      return response.json();
-    })
+  datosBootstrap()
     .then(function (data) {
-      let opciones = '<option value="">Selecciona mascota</option>';
-      if (Array.isArray(data)) {
-        for (let i = 0; i < data.length; i++) {
-          opciones += '<option value="' + data[i].id + '">' + data[i].nombre + " (" + data[i].especie + ")</option>";
-        }
-      }
-      mascotaCita.innerHTML = opciones;
-      if (selectedId) {
-        mascotaCita.value = String(selectedId);
-      }
+      llenarSelect(mascotaCita, "Selecciona mascota", data.mascotas, etiquetaMascota, selectedId);
     })
     .catch(function () {
       mascotaCita.innerHTML = '<option value="">Error al cargar mascotas</option>';
@@ -419,47 +538,9 @@ function cargarMascotasCitaSelect(selectedId) {
 }
 
 function cargarVeterinariosCitaSelect(selectedId) {
-  fetch(urlPersonas, {
-    method: "GET",
-    headers: { "content-type": "application/json" },
-  })
-    .then(function (response) {
-      return response.json();
-    })
-    .then(function (personas) {
-      personasCache = Array.isArray(personas) ? personas : [];
-      fetch(urlVeterinarios, {
-        method: "GET",
-        headers: { "content-type": "application/json" },
-      })
-        .then(function (response) {
-          return response.json();
-        })
-        .then(function (veterinarios) {
-          let personaMap = {};
-          for (let i = 0; i < personasCache.length; i++) {
-            personaMap[personasCache[i].id] = personasCache[i].nombres + " " + personasCache[i].apellidos;
-          }
-
-          let opciones = '<option value="">Selecciona veterinario</option>';
-          if (Array.isArray(veterinarios)) {
-            for (let i = 0; i < veterinarios.length; i++) {
-              opciones +=
-                '<option value="' +
-                veterinarios[i].id +
-                '">' +
-                (personaMap[veterinarios[i].persona_id] || "Sin nombre") +
-                "</option>";
-            }
-          }
-          veterinarioCita.innerHTML = opciones;
-          if (selectedId) {
-            veterinarioCita.value = String(selectedId);
-          }
-        })
-        .catch(function () {
-          veterinarioCita.innerHTML = '<option value="">Error al cargar veterinarios</option>';
-        });
+  datosBootstrap()
+    .then(function (data) {
+      llenarSelect(veterinarioCita, "Selecciona veterinario", data.veterinarios, etiquetaNombre, selectedId);
     })
     .catch(function () {
       veterinarioCita.innerHTML = '<option value="">Error al cargar veterinarios</option>';
@@ -467,24 +548,10 @@ function cargarVeterinariosCitaSelect(selectedId) {
 }
 
 function cargarMascotasHistorialSelect(selectedId) {
-  fetch(urlMascotas, {
-    method: "GET",
-    headers: { "content-type": "application/json" },
-  })
-    .then(function (response) {
-      return response.json();
-    })
+  datosBootstrap()
     .then(function (data) {
-      let opciones = '<option value="">Selecciona mascota</option>';
-      if (Array.isArray(data)) {
-        for (let i = 0; i < data.length; i++) {
-          opciones += '<option value="' + data[i].id + '">' + data[i].nombre + " (" + data[i].especie + ")</option>";
-        }
-      }
-      mascotaHistorial.innerHTML = opciones;
-      if (selectedId) {
-        mascotaHistorial.value = String(selectedId);
-      }
+      llenarSelect(mascotaHistorial, "Selecciona mascota", data.mascotas, etiquetaMascota, selectedId);
+      llenarSelect(filtroMascotaHistorial, "Todas las mascotas", data.mascotas, etiquetaMascota, filtroMascotaHistorial.value);
     })
     .catch(function () {
       mascotaHistorial.innerHTML = '<option value="">Error al cargar mascotas</option>';
@@ -492,55 +559,23 @@ function cargarMascotasHistorialSelect(selectedId) {
 }
 
 function cargarVeterinariosHistorialSelect(selectedId) {
-  fetch(urlPersonas, {
-    method: "GET",
-    headers: { "content-type": "application/json" },
-  })
-    .then(function (response) {
-      return response.json();
-    })
-    .then(function (personas) {
-      personasCache = Array.isArray(personas) ? personas : [];
-      fetch(urlVeterinarios, {
-        method: "GET",
-        headers: { "content-type": "application/json" },
-      })
-        .then(function (response) {
-          return response.json();
-        })
-        .then(function (veterinarios) {
-          let personaMap = {};
-          for (let i = 0; i < personasCache.length; i++) {
-            personaMap[personasCache[i].id] = personasCache[i].nombres + " " + personasCache[i].apellidos;
-          }
-
-          let opciones = '<option value="">Selecciona veterinario</option>';
-          if (Array.isArray(veterinarios)) {
-            for (let i = 0; i < veterinarios.length; i++) {
-              opciones +=
-                '<option value="' +
-                veterinarios[i].id +
-                '">' +
-                (personaMap[veterinarios[i].persona_id] || "Sin nombre") +
-                "</option>";
-            }
-          }
-          veterinarioHistorial.innerHTML = opciones;
-          if (selectedId) {
-            veterinarioHistorial.value = String(selectedId);
-          }
-        })
-        .catch(function () {
-          veterinarioHistorial.innerHTML = '<option value="">Error al cargar veterinarios</option>';
-        });
+  datosBootstrap()
+    .then(function (data) {
+      llenarSelect(veterinarioHistorial, "Selecciona veterinario", data.veterinarios, etiquetaNombre, selectedId);
     })
     .catch(function () {
       veterinarioHistorial.innerHTML = '<option value="">Error al cargar veterinarios</option>';
     });
 }
 
-function cargarCitasHistorialSelect(selectedId) {
-  fetch(urlCitas, {
+function cargarCitasHistorialSelect(selectedId, mascotaId) {
+  const mascota = mascotaId || mascotaHistorial.value;
+  if (!mascota) {
+    citaHistorial.innerHTML = '<option value="">Sin cita (selecciona mascota para ver sus citas)</option>';
+    return;
+  }
+
+  fetchApi(construirUrl(urlCitas, { mascota_id: mascota, limit: LIMITE_SELECTOR }), {
     method: "GET",
     headers: { "content-type": "application/json" },
   })
@@ -571,51 +606,48 @@ function cargarCitasHistorialSelect(selectedId) {
     });
 }
 
-function cargarHistorialTratamientoSelect(selectedId) {
-  fetch(urlMascotas, {
+function cargarMascotasTratamientoSelect(selectedId) {
+  datosBootstrap()
+    .then(function (data) {
+      llenarSelect(mascotaTratamiento, "Selecciona mascota", data.mascotas, etiquetaMascota, selectedId);
+    })
+    .catch(function () {
+      mascotaTratamiento.innerHTML = '<option value="">Error al cargar mascotas</option>';
+    });
+}
+
+function cargarHistorialTratamientoSelect(selectedId, mascotaId) {
+  const mascota = mascotaId || mascotaTratamiento.value;
+  if (!mascota) {
+    historialTratamiento.innerHTML = '<option value="">Selecciona primero la mascota</option>';
+    return;
+  }
+
+  fetchApi(construirUrl("http://localhost:8000/historial/", { mascota_id: mascota, limit: LIMITE_SELECTOR }), {
     method: "GET",
     headers: { "content-type": "application/json" },
   })
     .then(function (response) {
       return response.json();
     })
-    .then(function (mascotas) {
-      fetch("http://localhost:8000/historial/", {
-        method: "GET",
-        headers: { "content-type": "application/json" },
-      })
-        .then(function (response) {
-          return response.json();
-        })
-        .then(function (historiales) {
-          let mascotaMap = {};
-          if (Array.isArray(mascotas)) {
-            for (let i = 0; i < mascotas.length; i++) {
-              mascotaMap[mascotas[i].id] = mascotas[i].nombre;
-            }
-          }
-
-          let opciones = '<option value="">Selecciona historial</option>';
-          if (Array.isArray(historiales)) {
-            for (let i = 0; i < historiales.length; i++) {
-              opciones +=
-                '<option value="' +
-                historiales[i].id +
-                '">' +
-                (mascotaMap[historiales[i].mascota_id] || "Sin mascota") +
-                " - " +
-                historiales[i].fecha +
-                "</option>";
-            }
-          }
-          historialTratamiento.innerHTML = opciones;
-          if (selectedId) {
-            historialTratamiento.value = String(selectedId);
-          }
-        })
-        .catch(function () {
-          historialTratamiento.innerHTML = '<option value="">Error al cargar historial</option>';
-        });
+    .then(function (historiales) {
+      let opciones = '<option value="">Selecciona historial</option>';
+      if (Array.isArray(historiales)) {
+        for (let i = 0; i < historiales.length; i++) {
+          opciones +=
+            '<option value="' +
+            historiales[i].id +
+            '">' +
+            historiales[i].fecha +
+            " - " +
+            (historiales[i].diagnostico || "Sin diagnóstico") +
+            "</option>";
+        }
+      }
+      historialTratamiento.innerHTML = opciones;
+      if (selectedId) {
+        historialTratamiento.value = String(selectedId);
+      }
     })
     .catch(function () {
       historialTratamiento.innerHTML = '<option value="">Error al cargar historial</option>';
@@ -623,47 +655,9 @@ function cargarHistorialTratamientoSelect(selectedId) {
 }
 
 function cargarVeterinariosUsuarioSelect(selectedId) {
-  fetch(urlPersonas, {
-    method: "GET",
-    headers: { "content-type": "application/json" },
-  })
-    .then(function (response) {
-      return response.json();
-    })
-    .then(function (personas) {
-      personasCache = Array.isArray(personas) ? personas : [];
-      fetch(urlVeterinarios, {
-        method: "GET",
-        headers: { "content-type": "application/json" },
-      })
-        .then(function (response) {
-          return response.json();
-        })
-        .then(function (veterinarios) {
-          let personaMap = {};
-          for (let i = 0; i < personasCache.length; i++) {
-            personaMap[personasCache[i].id] = personasCache[i].nombres + " " + personasCache[i].apellidos;
-          }
-
-          let opciones = '<option value="">Selecciona veterinario</option>';
-          if (Array.isArray(veterinarios)) {
-            for (let i = 0; i < veterinarios.length; i++) {
-              opciones +=
-                '<option value="' +
-                veterinarios[i].id +
-                '">' +
-                (personaMap[veterinarios[i].persona_id] || "Sin nombre") +
-                "</option>";
-            }
-          }
-          veterinarioUsuario.innerHTML = opciones;
-          if (selectedId) {
-            veterinarioUsuario.value = String(selectedId);
-          }
-        })
-        .catch(function () {
-          veterinarioUsuario.innerHTML = '<option value="">Error al cargar veterinarios</option>';
-        });
+  datosBootstrap()
+    .then(function (data) {
+      llenarSelect(veterinarioUsuario, "Selecciona veterinario", data.veterinarios, etiquetaNombre, selectedId);
     })
     .catch(function () {
       veterinarioUsuario.innerHTML = '<option value="">Error al cargar veterinarios</option>';
@@ -671,7 +665,7 @@ function cargarVeterinariosUsuarioSelect(selectedId) {
 }
 
 function cargarTratamientosControlSelect(selectedId) {
-  fetch("http://localhost:8000/tratamientos/", {
+  fetchApi(construirUrl("http://localhost:8000/tratamientos/", { estado: "activo", limit: LIMITE_SELECTOR }), {
     method: "GET",
     headers: { "content-type": "application/json" },
   })
@@ -679,18 +673,29 @@ function cargarTratamientosControlSelect(selectedId) {
       return response.json();
     })
     .then(function (tratamientos) {
+      let lista = Array.isArray(tratamientos) ? tratamientos : [];
+      let incluido = !selectedId;
+      for (let i = 0; i < lista.length; i++) {
+        if (String(lista[i].id) === String(selectedId)) incluido = true;
+      }
+
+      // Al editar un control de un tratamiento ya cerrado se añade ese tratamiento a la lista.
+      if (incluido) return lista;
+      return fetchLote("http://localhost:8000/tratamientos/", [selectedId]).then(function (datos) {
+        return datos[selectedId] ? lista.concat([datos[selectedId]]) : lista;
+      });
+    })
+    .then(function (lista) {
       let opciones = '<option value="">Selecciona tratamiento</option>';
-      if (Array.isArray(tratamientos)) {
-        for (let i = 0; i < tratamientos.length; i++) {
-          opciones +=
-            '<option value="' +
-            tratamientos[i].id +
-            '">' +
-            (tratamientos[i].nombre || "Sin nombre") +
-            " - " +
-            (tratamientos[i].estado || "") +
-            "</option>";
-        }
+      for (let i = 0; i < lista.length; i++) {
+        opciones +=
+          '<option value="' +
+          lista[i].id +
+          '">' +
+          (lista[i].nombre || "Sin nombre") +
+          " - " +
+          (lista[i].estado || "") +
+          "</option>";
       }
       tratamientoControl.innerHTML = opciones;
       if (selectedId) {
@@ -703,21 +708,9 @@ function cargarTratamientosControlSelect(selectedId) {
 }
 
 function cargarMascotasReporte() {
-  fetch(urlMascotas, {
-    method: "GET",
-    headers: { "content-type": "application/json" },
-  })
-    .then(function (response) {
-      return response.json();
-    })
-    .then(function (mascotas) {
-      let opciones = '<option value="">Selecciona mascota</option>';
-      if (Array.isArray(mascotas)) {
-        for (let i = 0; i < mascotas.length; i++) {
-          opciones += '<option value="' + mascotas[i].id + '">' + mascotas[i].nombre + " (" + mascotas[i].especie + ")</option>";
-        }
-      }
-      mascotaReporte.innerHTML = opciones;
+  datosBootstrap()
+    .then(function (data) {
+      llenarSelect(mascotaReporte, "Selecciona mascota", data.mascotas, etiquetaMascota, null);
     })
     .catch(function () {
       mascotaReporte.innerHTML = '<option value="">Error al cargar mascotas</option>';
@@ -730,7 +723,7 @@ function verReporteIndividual() {
     return;
   }
 
-  fetch("http://localhost:8000/reportes/individual/" + mascotaReporte.value, {
+  fetchApi("http://localhost:8000/reportes/individual/" + mascotaReporte.value, {
     method: "GET",
     headers: { "content-type": "application/json" },
   })
@@ -816,7 +809,7 @@ function verReporteIndividual() {
 }
 
 function verReporteGeneral() {
-  fetch("http://localhost:8000/reportes/general", {
+  fetchApi("http://localhost:8000/reportes/general", {
     method: "GET",
     headers: { "content-type": "application/json" },
   })
@@ -895,26 +888,17 @@ function verReporteGeneral() {
 }
 
 function listarPersonas() {
-  fetch(urlPersonas, {
-    method: "GET",
-    headers: { "content-type": "application/json" },
-  })
-    .then(function (response) {
-      return response.json();
-    })
+  fetchPagina("personas", urlPersonas, {})
     .then(function (data) {
       if (!Array.isArray(data)) {
         tablaPersonas.innerHTML = "<tr><td colspan='8'>Error al cargar personas</td></tr>";
         return;
       }
 
-      personasCache = data;
       let filas = "";
-      let total = 0;
 
       for (let i = 0; i < data.length; i++) {
         if (!esPersonaAsignable(data[i])) continue;
-        total = total + 1;
 
         filas +=
           "<tr>" +
@@ -938,7 +922,7 @@ function listarPersonas() {
         tablaPersonas.innerHTML = filas;
       }
 
-      document.getElementById("cntPersonas").textContent = String(total);
+      pintarPaginacion("personas", "pagPersonas", listarPersonas);
       cargarPersonasSelect();
     })
     .catch(function () {
@@ -947,7 +931,7 @@ function listarPersonas() {
 }
 
 window.editarPersona = function (id) {
-  fetch(urlPersonas + id, {
+  fetchApi(urlPersonas + id, {
     method: "GET",
     headers: { "content-type": "application/json" },
   })
@@ -982,7 +966,7 @@ window.editarPersona = function (id) {
 };
 
 window.eliminarPersona = function (id) {
-  fetch(urlPersonas + id, {
+  fetchApi(urlPersonas + id, {
     method: "DELETE",
     headers: { "content-type": "application/json" },
   })
@@ -1022,7 +1006,7 @@ formPersona.addEventListener("submit", function (e) {
   const metodo = idPersonaEditando ? "PUT" : "POST";
   const url = idPersonaEditando ? urlPersonas + idPersonaEditando : urlPersonas;
 
-  fetch(url, {
+  fetchApi(url, {
     method: metodo,
     headers: { "content-type": "application/json" },
     body: JSON.stringify(data),
@@ -1064,36 +1048,24 @@ function limpiarFormularioDueno() {
 }
 
 function listarDuenos() {
-  fetch(urlDuenos, {
-    method: "GET",
-    headers: { "content-type": "application/json" },
-  })
-    .then(function (response) {
-      return response.json();
-    })
-    .then(function (data) {
+  Promise.all([fetchPagina("duenos", urlDuenos, {}), datosBootstrap()])
+    .then(function (resultados) {
+      const data = resultados[0];
       if (!Array.isArray(data)) {
         tablaDuenos.innerHTML = "<tr><td colspan='4'>Error al cargar dueños</td></tr>";
         return;
       }
 
-      let personaMap = {};
-      let personaValida = {};
-
-      for (let i = 0; i < personasCache.length; i++) {
-        personaMap[personasCache[i].id] = personasCache[i].nombres + " " + personasCache[i].apellidos;
-        personaValida[personasCache[i].id] = esPersonaAsignable(personasCache[i]);
-      }
+      const personaMap = mapaNombres(resultados[1].personas);
 
       let filas = "";
-      let total = 0;
       for (let i = 0; i < data.length; i++) {
-        if (!personaValida[data[i].persona_id]) continue;
-        total = total + 1;
+        const nombre = personaMap[data[i].persona_id];
+        if (!nombre || !esNombreAsignable(nombre)) continue;
 
         filas +=
           "<tr>" +
-          "<td>" + (personaMap[data[i].persona_id] || "Sin nombre") + "</td>" +
+          "<td>" + nombre + "</td>" +
           "<td>" + (data[i].direccion || "") + "</td>" +
           "<td>" + (data[i].activo ? "Si" : "No") + "</td>" +
           "<td>" +
@@ -1109,7 +1081,7 @@ function listarDuenos() {
         tablaDuenos.innerHTML = filas;
       }
 
-      document.getElementById("cntDuenos").textContent = String(total);
+      pintarPaginacion("duenos", "pagDuenos", listarDuenos);
     })
     .catch(function () {
       tablaDuenos.innerHTML = "<tr><td colspan='4'>Error al cargar dueños</td></tr>";
@@ -1126,66 +1098,51 @@ function limpiarFormularioMascota() {
 }
 
 function listarMascotas() {
-  cargarDatosDuenos(function () {
-    fetch(urlMascotas, {
-      method: "GET",
-      headers: { "content-type": "application/json" },
-    })
-      .then(function (response) {
-        return response.json();
-      })
-      .then(function (data) {
-        if (!Array.isArray(data)) {
-          tablaMascotas.innerHTML = "<tr><td colspan='10'>Error al cargar mascotas</td></tr>";
-          return;
-        }
-
-        let personaMap = {};
-        for (let i = 0; i < personasCache.length; i++) {
-          personaMap[personasCache[i].id] = personasCache[i].nombres + " " + personasCache[i].apellidos;
-        }
+  Promise.all([fetchPagina("mascotas", urlMascotas, {}), datosBootstrap()])
+    .then(function (resultados) {
+      const data = resultados[0];
+      if (!Array.isArray(data)) {
+        tablaMascotas.innerHTML = "<tr><td colspan='10'>Error al cargar mascotas</td></tr>";
+        return;
+      }
 
-        let duenoMap = {};
-        for (let i = 0; i < duenosCache.length; i++) {
-          duenoMap[duenosCache[i].id] = personaMap[duenosCache[i].persona_id] || "Sin dueño";
-        }
+      const duenoMap = mapaNombres(resultados[1].duenos);
 
-        let filas = "";
-        for (let i = 0; i < data.length; i++) {
-          filas +=
-            "<tr>" +
-            "<td>" + (data[i].nombre || "") + "</td>" +
-            "<td>" + (data[i].especie || "") + "</td>" +
-            "<td>" + (data[i].edad || 0) + "</td>" +
-            "<td>" + (data[i].sexo || "") + "</td>" +
-            "<td>" + (data[i].peso || "") + "</td>" +
-            "<td>" + (data[i].talla || "") + "</td>" +
-            "<td>" + (data[i].grupo_sanguineo || "") + "</td>" +
-            "<td>" + (duenoMap[data[i].dueno_id] || "Sin dueño") + "</td>" +
-            "<td>" + (data[i].activo ? "Si" : "No") + "</td>" +
-            "<td>" +
-            '<button class="mini-btn" type="button" onclick="editarMascota(' + data[i].id + ')">Editar</button> ' +
-            '<button class="mini-btn delete" type="button" onclick="eliminarMascota(' + data[i].id + ')">Eliminar</button>' +
-            "</td>" +
-            "</tr>";
-        }
+      let filas = "";
+      for (let i = 0; i < data.length; i++) {
+        filas +=
+          "<tr>" +
+          "<td>" + (data[i].nombre || "") + "</td>" +
+          "<td>" + (data[i].especie || "") + "</td>" +
+          "<td>" + (data[i].edad || 0) + "</td>" +
+          "<td>" + (data[i].sexo || "") + "</td>" +
+          "<td>" + (data[i].peso || "") + "</td>" +
+          "<td>" + (data[i].talla || "") + "</td>" +
+          "<td>" + (data[i].grupo_sanguineo || "") + "</td>" +
+          "<td>" + (duenoMap[data[i].dueno_id] || "Sin dueño") + "</td>" +
+          "<td>" + (data[i].activo ? "Si" : "No") + "</td>" +
+          "<td>" +
+          '<button class="mini-btn" type="button" onclick="editarMascota(' + data[i].id + ')">Editar</button> ' +
+          '<button class="mini-btn delete" type="button" onclick="eliminarMascota(' + data[i].id + ')">Eliminar</button>' +
+          "</td>" +
+          "</tr>";
+      }
 
-        if (filas === "") {
-          tablaMascotas.innerHTML = "<tr><td colspan='10'>No hay mascotas registradas</td></tr>";
-        } else {
-          tablaMascotas.innerHTML = filas;
-        }
+      if (filas === "") {
+        tablaMascotas.innerHTML = "<tr><td colspan='10'>No hay mascotas registradas</td></tr>";
+      } else {
+        tablaMascotas.innerHTML = filas;
+      }
 
-        document.getElementById("cntMascotas").textContent = String(data.length);
-      })
-      .catch(function () {
-        tablaMascotas.innerHTML = "<tr><td colspan='10'>Error al cargar mascotas</td></tr>";
-      });
-  });
+      pintarPaginacion("mascotas", "pagMascotas", listarMascotas);
+    })
+    .catch(function () {
+      tablaMascotas.innerHTML = "<tr><td colspan='10'>Error al cargar mascotas</td></tr>";
+    });
 }
 
 window.editarMascota = function (id) {
-  fetch(urlMascotas + id, {
+  fetchApi(urlMascotas + id, {
     method: "GET",
     headers: { "content-type": "application/json" },
   })
@@ -1223,7 +1180,7 @@ window.editarMascota = function (id) {
 };
 
 window.eliminarMascota = function (id) {
-  fetch(urlMascotas + id, {
+  fetchApi(urlMascotas + id, {
     method: "DELETE",
     headers: { "content-type": "application/json" },
   })
@@ -1257,58 +1214,38 @@ function limpiarFormularioVeterinario() {
 }
 
 function listarVeterinarios() {
-  fetch(urlPersonas, {
-    method: "GET",
-    headers: { "content-type": "application/json" },
-  })
-    .then(function (response) {
-      return response.json();
-    })
-    .then(function (personas) {
-      personasCache = Array.isArray(personas) ? personas : [];
+  Promise.all([fetchPagina("veterinarios", urlVeterinarios, {}), datosBootstrap()])
+    .then(function (resultados) {
+      const data = resultados[0];
+      if (!Array.isArray(data)) {
+        tablaVeterinarios.innerHTML = "<tr><td colspan='5'>Error al cargar veterinarios</td></tr>";
+        return;
+      }
 
-      fetch(urlVeterinarios, {
-        method: "GET",
-        headers: { "content-type": "application/json" },
-      })
-        .then(function (response) {
-          return response.json();
-        })
-        .then(function (data) {
-          if (!Array.isArray(data)) {
-            tablaVeterinarios.innerHTML = "<tr><td colspan='5'>Error al cargar veterinarios</td></tr>";
-            return;
-          }
+      const personaMap = mapaNombres(resultados[1].personas);
 
-          let personaMap = {};
-          for (let i = 0; i < personasCache.length; i++) {
-            personaMap[personasCache[i].id] = personasCache[i].nombres + " " + personasCache[i].apellidos;
-          }
+      let filas = "";
+      for (let i = 0; i < data.length; i++) {
+        filas +=
+          "<tr>" +
+          "<td>" + (personaMap[data[i].persona_id] || "Sin nombre") + "</td>" +
+          "<td>" + (data[i].licencia || "") + "</td>" +
+          "<td>" + (data[i].especialidad || "") + "</td>" +
+          "<td>" + (data[i].activo ? "Si" : "No") + "</td>" +
+          "<td>" +
+          '<button class="mini-btn" type="button" onclick="editarVeterinario(' + data[i].id + ')">Editar</button> ' +
+          '<button class="mini-btn delete" type="button" onclick="eliminarVeterinario(' + data[i].id + ')">Eliminar</button>' +
+          "</td>" +
+          "</tr>";
+      }
 
-          let filas = "";
-          for (let i = 0; i < data.length; i++) {
-            filas +=
-              "<tr>" +
-              "<td>" + (personaMap[data[i].persona_id] || "Sin nombre") + "</td>" +
-              "<td>" + (data[i].licencia || "") + "</td>" +
-              "<td>" + (data[i].especialidad || "") + "</td>" +
-              "<td>" + (data[i].activo ? "Si" : "No") + "</td>" +
-              "<td>" +
-              '<button class="mini-btn" type="button" onclick="editarVeterinario(' + data[i].id + ')">Editar</button> ' +
-              '<button class="mini-btn delete" type="button" onclick="eliminarVeterinario(' + data[i].id + ')">Eliminar</button>' +
-              "</td>" +
-              "</tr>";
-          }
+      if (filas === "") {
+        tablaVeterinarios.innerHTML = "<tr><td colspan='5'>No hay veterinarios registrados</td></tr>";
+      } else {
+        tablaVeterinarios.innerHTML = filas;
+      }
 
-          if (filas === "") {
-            tablaVeterinarios.innerHTML = "<tr><td colspan='5'>No hay veterinarios registrados</td></tr>";
-          } else {
-            tablaVeterinarios.innerHTML = filas;
-          }
-        })
-        .catch(function () {
-          tablaVeterinarios.innerHTML = "<tr><td colspan='5'>Error al cargar veterinarios</td></tr>";
-        });
+      pintarPaginacion("veterinarios", "pagVeterinarios", listarVeterinarios);
     })
     .catch(function () {
       tablaVeterinarios.innerHTML = "<tr><td colspan='5'>Error al cargar veterinarios</td></tr>";
@@ -1316,7 +1253,7 @@ function listarVeterinarios() {
 }
 
 window.editarVeterinario = function (id) {
-  fetch(urlVeterinarios + id, {
+  fetchApi(urlVeterinarios + id, {
     method: "GET",
     headers: { "content-type": "application/json" },
   })
@@ -1347,7 +1284,7 @@ window.editarVeterinario = function (id) {
 };
 
 window.eliminarVeterinario = function (id) {
-  fetch(urlVeterinarios + id, {
+  fetchApi(urlVeterinarios + id, {
     method: "DELETE",
     headers: { "content-type": "application/json" },
   })
@@ -1364,7 +1301,7 @@ window.eliminarVeterinario = function (id) {
       msgVeterinario.textContent = data.mensaje || "Veterinario eliminado";
       msgVeterinario.className = "mensaje ok";
       listarVeterinarios();
-      cargarContador(urlVeterinarios, "cntVeterinarios");
+      cargarContadores();
     })
     .catch(function (error) {
       msgVeterinario.textContent = error.message;
@@ -1392,101 +1329,60 @@ function formatearFechaInput(valor) {
 }
 
 function listarCitas() {
-  fetch(urlMascotas, {
-    method: "GET",
-    headers: { "content-type": "application/json" },
-  })
-    .then(function (response) {
-      return response.json();
-    })
-    .then(function (mascotas) {
-      fetch(urlPersonas, {
-        method: "GET",
-        headers: { "content-type": "application/json" },
-      })
-        .then(function (response) {
-          return response.json();
-        })
-        .then(function (personas) {
-          fetch(urlVeterinarios, {
-            method: "GET",
-            headers: { "content-type": "application/json" },
-          })
-            .then(function (response) {
-              return response.json();
-            })
-            .then(function (veterinarios) {
-              fetch(urlCitas, {
-                method: "GET",
-                headers: { "content-type": "application/json" },
-              })
-                .then(function (response) {
-                  return response.json();
-                })
-                .then(function (citas) {
-                  if (!Array.isArray(citas)) {
-                    tablaCitas.innerHTML = "<tr><td colspan='8'>Error al cargar citas</td></tr>";
-                    return;
-                  }
-
-                  let mascotaMap = {};
-                  if (Array.isArray(mascotas)) {
-                    for (let i = 0; i < mascotas.length; i++) {
-                      mascotaMap[mascotas[i].id] = mascotas[i].nombre;
-                    }
-                  }
-
-                  let personaMap = {};
-                  if (Array.isArray(personas)) {
-                    for (let i = 0; i < personas.length; i++) {
-                      personaMap[personas[i].id] = personas[i].nombres + " " + personas[i].apellidos;
-                    }
-                  }
-
-                  let veterinarioMap = {};
-                  if (Array.isArray(veterinarios)) {
-                    for (let i = 0; i < veterinarios.length; i++) {
-                      veterinarioMap[veterinarios[i].id] = personaMap[veterinarios[i].persona_id] || "Sin nombre";
-                    }
-                  }
-
-                  let filas = "";
-                  for (let i = 0; i < citas.length; i++) {
-                    filas +=
-                      "<tr>" +
-                      "<td>" + formatearFechaInput(citas[i].fecha_hora).replace("T", " ") + "</td>" +
-                      "<td>" + (mascotaMap[citas[i].mascota_id] || "Sin mascota") + "</td>" +
-                      "<td>" + (veterinarioMap[citas[i].veterinario_id] || "Sin veterinario") + "</td>" +
-                      "<td>" + (citas[i].motivo || "") + "</td>" +
-                      "<td>" + (citas[i].prioridad || "") + "</td>" +
-                      "<td>" + (citas[i].estado || "") + "</td>" +
-                      "<td>" + (citas[i].observaciones || "") + "</td>" +
-                      "<td>" +
-                      '<button class="mini-btn" type="button" onclick="editarCita(' + citas[i].id + ')">Editar</button> ' +
-                      '<button class="mini-btn delete" type="button" onclick="eliminarCita(' + citas[i].id + ')">Eliminar</button>' +
-                      "</td>" +
-                      "</tr>";
-                  }
-
-                  if (filas === "") {
-                    tablaCitas.innerHTML = "<tr><td colspan='8'>No hay citas registradas</td></tr>";
-                  } else {
-                    tablaCitas.innerHTML = filas;
-                  }
-
-                  document.getElementById("cntCitas").textContent = String(citas.length);
-                })
-                .catch(function () {
-                  tablaCitas.innerHTML = "<tr><td colspan='8'>Error al cargar citas</td></tr>";
-                });
-            })
-            .catch(function () {
-              tablaCitas.innerHTML = "<tr><td colspan='8'>Error al cargar citas</td></tr>";
-            });
-        })
-        .catch(function () {
-          tablaCitas.innerHTML = "<tr><td colspan='8'>Error al cargar citas</td></tr>";
-        });
+  const estado = estadoPaginacion("citas");
+  const sinFiltros = !filtroEstadoCita.value && !filtroDesdeCita.value && !filtroHastaCita.value;
+
+  // La primera página sin filtros ya viene en el bootstrap.
+  let pagina;
+  if (sinFiltros && !estado.actual) {
+    pagina = datosBootstrap().then(function (data) {
+      estado.siguiente = data.citas.next_cursor;
+      return data.citas.datos;
+    });
+  } else {
+    pagina = fetchPagina("citas", urlCitas, {
+      estado: filtroEstadoCita.value,
+      desde: filtroDesdeCita.value ? filtroDesdeCita.value + "T00:00:00" : "",
+      hasta: filtroHastaCita.value ? diaSiguiente(filtroHastaCita.value) : "",
+    });
+  }
+
+  Promise.all([pagina, datosBootstrap()])
+    .then(function (resultados) {
+      const citas = resultados[0];
+      if (!Array.isArray(citas)) {
+        tablaCitas.innerHTML = "<tr><td colspan='8'>Error al cargar citas</td></tr>";
+        return;
+      }
+
+      const mascotaMap = mapaNombres(resultados[1].mascotas);
+      const veterinarioMap = mapaNombres(resultados[1].veterinarios);
+
+      let filas = "";
+      for (let i = 0; i < citas.length; i++) {
+        filas +=
+          "<tr>" +
+          "<td>" + formatearFechaInput(citas[i].fecha_hora).replace("T", " ") + "</td>" +
+          "<td>" + (mascotaMap[citas[i].mascota_id] || "Sin mascota") + "</td>" +
+          "<td>" + (veterinarioMap[citas[i].veterinario_id] || "Sin veterinario") + "</td>" +
+          "<td>" + (citas[i].motivo || "") + "</td>" +
+          "<td>" + (citas[i].prioridad || "") + "</td>" +
+          "<td>" + (citas[i].estado || "") + "</td>" +
+          "<td>" + (citas[i].observaciones || "") + "</td>" +
+          "<td>" +
+          '<button class="mini-btn" type="button" onclick="editarCita(' + citas[i].id + ')">Editar</button> ' +
+          '<button class="mini-btn delete" type="button" onclick="eliminarCita(' + citas[i].id + ')">Eliminar</button>' +
+          "</td>" +
+          "</tr>";
+      }
+
+      if (filas === "") {
+        tablaCitas.innerHTML = "<tr><td colspan='8'>No hay citas registradas</td></tr>";
+      } else {
+        tablaCitas.innerHTML = filas;
+      }
+
+      pintarPaginacion("citas", "pagCitas", listarCitas);
     })
     .catch(function () {
       tablaCitas.innerHTML = "<tr><td colspan='8'>Error al cargar citas</td></tr>";
@@ -1494,7 +1390,7 @@ function listarCitas() {
 }
 
 window.editarCita = function (id) {
-  fetch(urlCitas + id, {
+  fetchApi(urlCitas + id, {
     method: "GET",
     headers: { "content-type": "application/json" },
   })
@@ -1528,7 +1424,7 @@ window.editarCita = function (id) {
 };
 
 window.eliminarCita = function (id) {
-  fetch(urlCitas + id, {
+  fetchApi(urlCitas + id, {
     method: "DELETE",
     headers: { "content-type": "application/json" },
   })
@@ -1545,7 +1441,7 @@ window.eliminarCita = function (id) {
       msgCita.textContent = data.mensaje || "Cita eliminada";
       msgCita.className = "mensaje ok";
       listarCitas();
-      cargarContador(urlCitas, "cntCitas");
+      cargarContadores();
     })
     .catch(function (error) {
       msgCita.textContent = error.message;
@@ -1564,118 +1460,57 @@ function limpiarFormularioHistorial() {
 }
 
 function listarHistorial() {
-  fetch(urlMascotas, {
-    method: "GET",
-    headers: { "content-type": "application/json" },
-  })
-    .then(function (response) {
-      return response.json();
-    })
-    .then(function (mascotas) {
-      fetch(urlPersonas, {
-        method: "GET",
-        headers: { "content-type": "application/json" },
-      })
-        .then(function (response) {
-          return response.json();
-        })
-        .then(function (personas) {
-          fetch(urlVeterinarios, {
-            method: "GET",
-            headers: { "content-type": "application/json" },
-          })
-            .then(function (response) {
-              return response.json();
-            })
-            .then(function (veterinarios) {
-              fetch(urlCitas, {
-                method: "GET",
-                headers: { "content-type": "application/json" },
-              })
-                .then(function (response) {
-                  return response.json();
-                })
-                .then(function (citas) {
-                  fetch("http://localhost:8000/historial/", {
-                    method: "GET",
-                    headers: { "content-type": "application/json" },
-                  })
-                    .then(function (response) {
-                      return response.json();
-                    })
-                    .then(function (historiales) {
-                      if (!Array.isArray(historiales)) {
-                        tablaHistorial.innerHTML = "<tr><td colspan='8'>Error al cargar historial</td></tr>";
-                        return;
-                      }
-
-                      let mascotaMap = {};
-                      if (Array.isArray(mascotas)) {
-                        for (let i = 0; i < mascotas.length; i++) {
-                          mascotaMap[mascotas[i].id] = mascotas[i].nombre;
-                        }
-                      }
-
-                      let personaMap = {};
-                      if (Array.isArray(personas)) {
-                        for (let i = 0; i < personas.length; i++) {
-                          personaMap[personas[i].id] = personas[i].nombres + " " + personas[i].apellidos;
-                        }
-                      }
-
-                      let veterinarioMap = {};
-                      if (Array.isArray(veterinarios)) {
-                        for (let i = 0; i < veterinarios.length; i++) {
-                          veterinarioMap[veterinarios[i].id] = personaMap[veterinarios[i].persona_id] || "Sin nombre";
-                        }
-                      }
-
-                      let citaMap = {};
-                      if (Array.isArray(citas)) {
-                        for (let i = 0; i < citas.length; i++) {
-                          citaMap[citas[i].id] = formatearFechaInput(citas[i].fecha_hora).replace("T", " ");
-                        }
-                      }
-
-                      let filas = "";
-                      for (let i = 0; i < historiales.length; i++) {
-                        filas +=
-                          "<tr>" +
-                          "<td>" + (historiales[i].fecha || "") + "</td>" +
-                          "<td>" + (mascotaMap[historiales[i].mascota_id] || "Sin mascota") + "</td>" +
-                          "<td>" + (veterinarioMap[historiales[i].veterinario_id] || "Sin veterinario") + "</td>" +
-                          "<td>" + (citaMap[historiales[i].cita_id] || "Sin cita") + "</td>" +
-                          "<td>" + (historiales[i].sintomas || "") + "</td>" +
-                          "<td>" + (historiales[i].diagnostico || "") + "</td>" +
-                          "<td>" + (historiales[i].observaciones || "") + "</td>" +
-                          "<td>" +
-                          '<button class="mini-btn" type="button" onclick="editarHistorial(' + historiales[i].id + ')">Editar</button> ' +
-                          '<button class="mini-btn delete" type="button" onclick="eliminarHistorial(' + historiales[i].id + ')">Eliminar</button>' +
-                          "</td>" +
-                          "</tr>";
-                      }
-
-                      if (filas === "") {
-                        tablaHistorial.innerHTML = "<tr><td colspan='8'>No hay historiales registrados</td></tr>";
-                      } else {
-                        tablaHistorial.innerHTML = filas;
-                      }
-                    })
-                    .catch(function () {
-                      tablaHistorial.innerHTML = "<tr><td colspan='8'>Error al cargar historial</td></tr>";
-                    });
-                })
-                .catch(function () {
-                  tablaHistorial.innerHTML = "<tr><td colspan='8'>Error al cargar historial</td></tr>";
-                });
-            })
-            .catch(function () {
-              tablaHistorial.innerHTML = "<tr><td colspan='8'>Error al cargar historial</td></tr>";
-            });
-        })
-        .catch(function () {
-          tablaHistorial.innerHTML = "<tr><td colspan='8'>Error al cargar historial</td></tr>";
-        });
+  Promise.all([
+    fetchPagina("historial", "http://localhost:8000/historial/", {
+      mascota_id: filtroMascotaHistorial.value,
+      desde: filtroDesdeHistorial.value,
+      hasta: filtroHastaHistorial.value,
+    }),
+    datosBootstrap(),
+  ])
+    .then(function (resultados) {
+      const historiales = resultados[0];
+      if (!Array.isArray(historiales)) {
+        tablaHistorial.innerHTML = "<tr><td colspan='8'>Error al cargar historial</td></tr>";
+        return;
+      }
+
+      const mascotaMap = mapaNombres(resultados[1].mascotas);
+      const veterinarioMap = mapaNombres(resultados[1].veterinarios);
+
+      let citaIds = [];
+      for (let i = 0; i < historiales.length; i++) {
+        citaIds.push(historiales[i].cita_id);
+      }
+
+      return fetchLote(urlCitas, citaIds).then(function (citas) {
+        let filas = "";
+        for (let i = 0; i < historiales.length; i++) {
+          const cita = citas[historiales[i].cita_id];
+          filas +=
+            "<tr>" +
+            "<td>" + (historiales[i].fecha || "") + "</td>" +
+            "<td>" + (mascotaMap[historiales[i].mascota_id] || "Sin mascota") + "</td>" +
+            "<td>" + (veterinarioMap[historiales[i].veterinario_id] || "Sin veterinario") + "</td>" +
+            "<td>" + (cita ? formatearFechaInput(cita.fecha_hora).replace("T", " ") : "Sin cita") + "</td>" +
+            "<td>" + (historiales[i].sintomas || "") + "</td>" +
+            "<td>" + (historiales[i].diagnostico || "") + "</td>" +
+            "<td>" + (historiales[i].observaciones || "") + "</td>" +
+            "<td>" +
+            '<button class="mini-btn" type="button" onclick="editarHistorial(' + historiales[i].id + ')">Editar</button> ' +
+            '<button class="mini-btn delete" type="button" onclick="eliminarHistorial(' + historiales[i].id + ')">Eliminar</button>' +
+            "</td>" +
+            "</tr>";
+        }
+
+        if (filas === "") {
+          tablaHistorial.innerHTML = "<tr><td colspan='8'>No hay historiales registrados</td></tr>";
+        } else {
+          tablaHistorial.innerHTML = filas;
+        }
+
+        pintarPaginacion("historial", "pagHistorial", listarHistorial);
+      });
     })
     .catch(function () {
       tablaHistorial.innerHTML = "<tr><td colspan='8'>Error al cargar historial</td></tr>";
@@ -1683,7 +1518,7 @@ function listarHistorial() {
 }
 
 window.editarHistorial = function (id) {
-  fetch("http://localhost:8000/historial/" + id, {
+  fetchApi("http://localhost:8000/historial/" + id, {
     method: "GET",
     headers: { "content-type": "application/json" },
   })
@@ -1704,7 +1539,7 @@ window.editarHistorial = function (id) {
       observacionesHistorial.value = data.observaciones || "";
       cargarMascotasHistorialSelect(data.mascota_id);
       cargarVeterinariosHistorialSelect(data.veterinario_id);
-      cargarCitasHistorialSelect(data.cita_id);
+      cargarCitasHistorialSelect(data.cita_id, data.mascota_id);
       formTitleHistorial.textContent = "Editar Historial";
       btnCancelarHistorial.classList.remove("hidden");
       msgHistorial.textContent = "";
@@ -1717,7 +1552,7 @@ window.editarHistorial = function (id) {
 };
 
 window.eliminarHistorial = function (id) {
-  fetch("http://localhost:8000/historial/" + id, {
+  fetchApi("http://localhost:8000/historial/" + id, {
     method: "DELETE",
     headers: { "content-type": "application/json" },
   })
@@ -1747,83 +1582,58 @@ function limpiarFormularioTratamiento() {
   estadoTratamiento.value = "activo";
   formTitleTratamiento.textContent = "Registrar Tratamiento";
   btnCancelarTratamiento.classList.add("hidden");
+  cargarMascotasTratamientoSelect();
   cargarHistorialTratamientoSelect();
 }
 
 function listarTratamientos() {
-  fetch(urlMascotas, {
-    method: "GET",
-    headers: { "content-type": "application/json" },
-  })
-    .then(function (response) {
-      return response.json();
-    })
-    .then(function (mascotas) {
-      fetch("http://localhost:8000/historial/", {
-        method: "GET",
-        headers: { "content-type": "application/json" },
-      })
-        .then(function (response) {
-          return response.json();
-        })
-        .then(function (historiales) {
-          fetch("http://localhost:8000/tratamientos/", {
-            method: "GET",
-            headers: { "content-type": "application/json" },
-          })
-            .then(function (response) {
-              return response.json();
-            })
-            .then(function (tratamientos) {
-              if (!Array.isArray(tratamientos)) {
-                tablaTratamientos.innerHTML = "<tr><td colspan='7'>Error al cargar tratamientos</td></tr>";
-                return;
-              }
-
-              let mascotaMap = {};
-              if (Array.isArray(mascotas)) {
-                for (let i = 0; i < mascotas.length; i++) {
-                  mascotaMap[mascotas[i].id] = mascotas[i].nombre;
-                }
-              }
-
-              let historialMascotaMap = {};
-              if (Array.isArray(historiales)) {
-                for (let i = 0; i < historiales.length; i++) {
-                  historialMascotaMap[historiales[i].id] = mascotaMap[historiales[i].mascota_id] || "Sin mascota";
-                }
-              }
-
-              let filas = "";
-              for (let i = 0; i < tratamientos.length; i++) {
-                filas +=
-                  "<tr>" +
-                  "<td>" + (tratamientos[i].nombre || "") + "</td>" +
-                  "<td>" + (tratamientos[i].estado || "") + "</td>" +
-                  "<td>" + (tratamientos[i].fecha_inicio || "") + "</td>" +
-                  "<td>" + (tratamientos[i].fecha_fin || "") + "</td>" +
-                  "<td>" + (tratamientos[i].objetivo || "") + "</td>" +
-                  "<td>" + (historialMascotaMap[tratamientos[i].historial_id] || "Sin paciente") + "</td>" +
-                  "<td>" +
-                  '<button class="mini-btn" type="button" onclick="editarTratamiento(' + tratamientos[i].id + ')">Editar</button> ' +
-                  '<button class="mini-btn delete" type="button" onclick="eliminarTratamiento(' + tratamientos[i].id + ')">Eliminar</button>' +
-                  "</td>" +
-                  "</tr>";
-              }
-
-              if (filas === "") {
-                tablaTratamientos.innerHTML = "<tr><td colspan='7'>No hay tratamientos registrados</td></tr>";
-              } else {
-                tablaTratamientos.innerHTML = filas;
-              }
-            })
-            .catch(function () {
-              tablaTratamientos.innerHTML = "<tr><td colspan='7'>Error al cargar tratamientos</td></tr>";
-            });
-        })
-        .catch(function () {
-          tablaTratamientos.innerHTML = "<tr><td colspan='7'>Error al cargar tratamientos</td></tr>";
-        });
+  Promise.all([
+    fetchPagina("tratamientos", "http://localhost:8000/tratamientos/", {
+      estado: filtroEstadoTratamiento.value,
+    }),
+    datosBootstrap(),
+  ])
+    .then(function (resultados) {
+      const tratamientos = resultados[0];
+      if (!Array.isArray(tratamientos)) {
+        tablaTratamientos.innerHTML = "<tr><td colspan='7'>Error al cargar tratamientos</td></tr>";
+        return;
+      }
+
+      const mascotaMap = mapaNombres(resultados[1].mascotas);
+
+      let historialIds = [];
+      for (let i = 0; i < tratamientos.length; i++) {
+        historialIds.push(tratamientos[i].historial_id);
+      }
+
+      return fetchLote("http://localhost:8000/historial/", historialIds).then(function (historiales) {
+        let filas = "";
+        for (let i = 0; i < tratamientos.length; i++) {
+          const historial = historiales[tratamientos[i].historial_id];
+          filas +=
+            "<tr>" +
+            "<td>" + (tratamientos[i].nombre || "") + "</td>" +
+            "<td>" + (tratamientos[i].estado || "") + "</td>" +
+            "<td>" + (tratamientos[i].fecha_inicio || "") + "</td>" +
+            "<td>" + (tratamientos[i].fecha_fin || "") + "</td>" +
+            "<td>" + (tratamientos[i].objetivo || "") + "</td>" +
+            "<td>" + ((historial && mascotaMap[historial.mascota_id]) || "Sin paciente") + "</td>" +
+            "<td>" +
+            '<button class="mini-btn" type="button" onclick="editarTratamiento(' + tratamientos[i].id + ')">Editar</button> ' +
+            '<button class="mini-btn delete" type="button" onclick="eliminarTratamiento(' + tratamientos[i].id + ')">Eliminar</button>' +
+            "</td>" +
+            "</tr>";
+        }
+
+        if (filas === "") {
+          tablaTratamientos.innerHTML = "<tr><td colspan='7'>No hay tratamientos registrados</td></tr>";
+        } else {
+          tablaTratamientos.innerHTML = filas;
+        }
+
+        pintarPaginacion("tratamientos", "pagTratamientos", listarTratamientos);
+      });
     })
     .catch(function () {
       tablaTratamientos.innerHTML = "<tr><td colspan='7'>Error al cargar tratamientos</td></tr>";
@@ -1831,7 +1641,7 @@ function listarTratamientos() {
 }
 
 window.editarTratamiento = function (id) {
-  fetch("http://localhost:8000/tratamientos/" + id, {
+  fetchApi("http://localhost:8000/tratamientos/" + id, {
     method: "GET",
     headers: { "content-type": "application/json" },
   })
@@ -1851,7 +1661,12 @@ window.editarTratamiento = function (id) {
       fechaInicioTratamiento.value = data.fecha_inicio || "";
       fechaFinTratamiento.value = data.fecha_fin || "";
       objetivoTratamiento.value = data.objetivo || "";
-      cargarHistorialTratamientoSelect(data.historial_id);
+      fetchLote("http://localhost:8000/historial/", [data.historial_id]).then(function (historiales) {
+        const historial = historiales[data.historial_id];
+        const mascotaId = historial ? historial.mascota_id : null;
+        cargarMascotasTratamientoSelect(mascotaId);
+        cargarHistorialTratamientoSelect(data.historial_id, mascotaId);
+      });
       formTitleTratamiento.textContent = "Editar Tratamiento";
       btnCancelarTratamiento.classList.remove("hidden");
       msgTratamiento.textContent = "";
@@ -1864,7 +1679,7 @@ window.editarTratamiento = function (id) {
 };
 
 window.eliminarTratamiento = function (id) {
-  fetch("http://localhost:8000/tratamientos/" + id, {
+  fetchApi("http://localhost:8000/tratamientos/" + id, {
     method: "DELETE",
     headers: { "content-type": "application/json" },
   })
@@ -1898,77 +1713,37 @@ function limpiarFormularioUsuario() {
 }
 
 function listarUsuarios() {
-  fetch(urlPersonas, {
-    method: "GET",
-    headers: { "content-type": "application/json" },
-  })
-    .then(function (response) {
-      return response.json();
-    })
-    .then(function (personas) {
-      personasCache = Array.isArray(personas) ? personas : [];
-      fetch(urlVeterinarios, {
-        method: "GET",
-        headers: { "content-type": "application/json" },
-      })
-        .then(function (response) {
-          return response.json();
-        })
-        .then(function (veterinarios) {
-          fetch(urlUsuarios, {
-            method: "GET",
-            headers: { "content-type": "application/json" },
-          })
-            .then(function (response) {
-              return response.json();
-            })
-            .then(function (usuarios) {
-              if (!Array.isArray(usuarios)) {
-                tablaUsuarios.innerHTML = "<tr><td colspan='4'>Error al cargar usuarios</td></tr>";
-                return;
-              }
-
-              let personaMap = {};
-              for (let i = 0; i < personasCache.length; i++) {
-                personaMap[personasCache[i].id] = personasCache[i].nombres + " " + personasCache[i].apellidos;
-              }
-
-              let veterinarioMap = {};
-              if (Array.isArray(veterinarios)) {
-                for (let i = 0; i < veterinarios.length; i++) {
-                  veterinarioMap[veterinarios[i].id] = personaMap[veterinarios[i].persona_id] || "Sin nombre";
-                }
-              }
-
-              let filas = "";
-              for (let i = 0; i < usuarios.length; i++) {
-                filas +=
-                  "<tr>" +
-                  "<td>" + (usuarios[i].username || "") + "</td>" +
-                  "<td>" + (veterinarioMap[usuarios[i].veterinario_id] || "Sin veterinario") + "</td>" +
-                  "<td>" + (usuarios[i].activo ? "Si" : "No") + "</td>" +
-                  "<td>" +
-                  '<button class="mini-btn" type="button" onclick="editarUsuario(' + usuarios[i].id + ')">Editar</button> ' +
-                  '<button class="mini-btn delete" type="button" onclick="eliminarUsuario(' + usuarios[i].id + ')">Eliminar</button>' +
-                  "</td>" +
-                  "</tr>";
-              }
-
-              if (filas === "") {
-                tablaUsuarios.innerHTML = "<tr><td colspan='4'>No hay usuarios registrados</td></tr>";
-              } else {
-                tablaUsuarios.innerHTML = filas;
-              }
-
-              document.getElementById("cntUsuarios").textContent = String(usuarios.length);
-            })
-            .catch(function () {
-              tablaUsuarios.innerHTML = "<tr><td colspan='4'>Error al cargar usuarios</td></tr>";
-            });
-        })
-        .catch(function () {
-          tablaUsuarios.innerHTML = "<tr><td colspan='4'>Error al cargar usuarios</td></tr>";
-        });
+  Promise.all([fetchPagina("usuarios", urlUsuarios, {}), datosBootstrap()])
+    .then(function (resultados) {
+      const usuarios = resultados[0];
+      if (!Array.isArray(usuarios)) {
+        tablaUsuarios.innerHTML = "<tr><td colspan='4'>Error al cargar usuarios</td></tr>";
+        return;
+      }
+
+      const veterinarioMap = mapaNombres(resultados[1].veterinarios);
+
+      let filas = "";
+      for (let i = 0; i < usuarios.length; i++) {
+        filas +=
+          "<tr>" +
+          "<td>" + (usuarios[i].username || "") + "</td>" +
+          "<td>" + (veterinarioMap[usuarios[i].veterinario_id] || "Sin veterinario") + "</td>" +
+          "<td>" + (usuarios[i].activo ? "Si" : "No") + "</td>" +
+          "<td>" +
+          '<button class="mini-btn" type="button" onclick="editarUsuario(' + usuarios[i].id + ')">Editar</button> ' +
+          '<button class="mini-btn delete" type="button" onclick="eliminarUsuario(' + usuarios[i].id + ')">Eliminar</button>' +
+          "</td>" +
+          "</tr>";
+      }
+
+      if (filas === "") {
+        tablaUsuarios.innerHTML = "<tr><td colspan='4'>No hay usuarios registrados</td></tr>";
+      } else {
+        tablaUsuarios.innerHTML = filas;
+      }
+
+      pintarPaginacion("usuarios", "pagUsuarios", listarUsuarios);
     })
     .catch(function () {
       tablaUsuarios.innerHTML = "<tr><td colspan='4'>Error al cargar usuarios</td></tr>";
@@ -1976,7 +1751,7 @@ function listarUsuarios() {
 }
 
 window.editarUsuario = function (id) {
-  fetch(urlUsuarios + id, {
+  fetchApi(urlUsuarios + id, {
     method: "GET",
     headers: { "content-type": "application/json" },
   })
@@ -2007,7 +1782,7 @@ window.editarUsuario = function (id) {
 };
 
 window.eliminarUsuario = function (id) {
-  fetch(urlUsuarios + id, {
+  fetchApi(urlUsuarios + id, {
     method: "DELETE",
     headers: { "content-type": "application/json" },
   })
@@ -2024,7 +1799,7 @@ window.eliminarUsuario = function (id) {
       msgUsuario.textContent = data.mensaje || "Usuario eliminado";
       msgUsuario.className = "mensaje ok";
       listarUsuarios();
-      cargarContador(urlUsuarios, "cntUsuarios");
+      cargarContadores();
     })
     .catch(function (error) {
       msgUsuario.textContent = error.message;
@@ -2042,142 +1817,67 @@ function limpiarFormularioControl() {
 }
 
 function listarControles() {
-  fetch("http://localhost:8000/tratamientos/", {
-    method: "GET",
-    headers: { "content-type": "application/json" },
-  })
-    .then(function (response) {
-      return response.json();
-    })
-    .then(function (tratamientos) {
-      fetch("http://localhost:8000/historial/", {
-        method: "GET",
-        headers: { "content-type": "application/json" },
-      })
-        .then(function (response) {
-          return response.json();
-        })
-        .then(function (historiales) {
-          fetch(urlMascotas, {
-            method: "GET",
-            headers: { "content-type": "application/json" },
-          })
-            .then(function (response) {
-              return response.json();
-            })
-            .then(function (mascotas) {
-              fetch(urlDuenos, {
-                method: "GET",
-                headers: { "content-type": "application/json" },
-              })
-                .then(function (response) {
-                  return response.json();
-                })
-                .then(function (duenos) {
-                  fetch(urlPersonas, {
-                    method: "GET",
-                    headers: { "content-type": "application/json" },
-                  })
-                    .then(function (response) {
-                      return response.json();
-                    })
-                    .then(function (personas) {
-                      fetch("http://localhost:8000/control/", {
-                        method: "GET",
-                        headers: { "content-type": "application/json" },
-                      })
-                        .then(function (response) {
-                          return response.json();
-                        })
-                        .then(function (controles) {
-                          if (!Array.isArray(controles)) {
-                            tablaControl.innerHTML = "<tr><td colspan='7'>Error al cargar controles</td></tr>";
-                            return;
-                          }
-
-                          let tratamientoMap = {};
-                          if (Array.isArray(tratamientos)) {
-                            for (let i = 0; i < tratamientos.length; i++) {
-                              tratamientoMap[tratamientos[i].id] = tratamientos[i];
-                            }
-                          }
-
-                          let historialMap = {};
-                          if (Array.isArray(historiales)) {
-                            for (let i = 0; i < historiales.length; i++) {
-                              historialMap[historiales[i].id] = historiales[i];
-                            }
-                          }
-
-                          let mascotaMap = {};
-                          if (Array.isArray(mascotas)) {
-                            for (let i = 0; i < mascotas.length; i++) {
-                              mascotaMap[mascotas[i].id] = mascotas[i];
-                            }
-                          }
-
-                          let duenoMap = {};
-                          if (Array.isArray(duenos)) {
-                            for (let i = 0; i < duenos.length; i++) {
-                              duenoMap[duenos[i].id] = duenos[i];
-                            }
-                          }
-
-                          let personaMap = {};
-                          if (Array.isArray(personas)) {
-                            for (let i = 0; i < personas.length; i++) {
-                              personaMap[personas[i].id] = personas[i].nombres + " " + personas[i].apellidos;
-                            }
-                          }
-
-                          let filas = "";
-                          for (let i = 0; i < controles.length; i++) {
-                            const tratamiento = tratamientoMap[controles[i].tratamiento_id];
-                            const historial = tratamiento ? historialMap[tratamiento.historial_id] : null;
-                            const mascota = historial ? mascotaMap[historial.mascota_id] : null;
-                            const dueno = mascota ? duenoMap[mascota.dueno_id] : null;
-                            const nombreDueno = dueno ? personaMap[dueno.persona_id] || "Sin dueño" : "Sin dueño";
-
-                            filas +=
-                              "<tr>" +
-                              "<td>" + (controles[i].fecha_control || "") + "</td>" +
-                              "<td>" + (controles[i].estado || "") + "</td>" +
-                              "<td>" + (tratamiento ? tratamiento.nombre : "Sin tratamiento") + "</td>" +
-                              "<td>" + (mascota ? mascota.nombre : "Sin paciente") + "</td>" +
-                              "<td>" + nombreDueno + "</td>" +
-                              "<td>" + (controles[i].observaciones || "") + "</td>" +
-                              "<td>" +
-                              '<button class="mini-btn" type="button" onclick="editarControl(' + controles[i].id + ')">Editar</button> ' +
-                              '<button class="mini-btn delete" type="button" onclick="eliminarControl(' + controles[i].id + ')">Eliminar</button>' +
-                              "</td>" +
-                              "</tr>";
-                          }
-
-                          if (filas === "") {
-                            tablaControl.innerHTML = "<tr><td colspan='7'>No hay controles registrados</td></tr>";
-                          } else {
-                            tablaControl.innerHTML = filas;
-                          }
-                        })
-                        .catch(function () {
-                          tablaControl.innerHTML = "<tr><td colspan='7'>Error al cargar controles</td></tr>";
-                        });
-                    })
-                    .catch(function () {
-                      tablaControl.innerHTML = "<tr><td colspan='7'>Error al cargar controles</td></tr>";
-                    });
-                })
-                .catch(function () {
-                  tablaControl.innerHTML = "<tr><td colspan='7'>Error al cargar controles</td></tr>";
-                });
-            })
-            .catch(function () {
-              tablaControl.innerHTML = "<tr><td colspan='7'>Error al cargar controles</td></tr>";
-            });
-        })
-        .catch(function () {
-          tablaControl.innerHTML = "<tr><td colspan='7'>Error al cargar controles</td></tr>";
+  Promise.all([
+    fetchPagina("control", "http://localhost:8000/control/", {
+      estado: filtroEstadoControl.value,
+    }),
+    datosBootstrap(),
+  ])
+    .then(function (resultados) {
+      const controles = resultados[0];
+      if (!Array.isArray(controles)) {
+        tablaControl.innerHTML = "<tr><td colspan='7'>Error al cargar controles</td></tr>";
+        return;
+      }
+
+      let mascotaMap = {};
+      for (let i = 0; i < resultados[1].mascotas.length; i++) {
+        mascotaMap[resultados[1].mascotas[i].id] = resultados[1].mascotas[i];
+      }
+      const duenoMap = mapaNombres(resultados[1].duenos);
+
+      let tratamientoIds = [];
+      for (let i = 0; i < controles.length; i++) {
+        tratamientoIds.push(controles[i].tratamiento_id);
+      }
+
+      // Tratamientos e historiales se resuelven solo para los ids de la página visible.
+      return fetchLote("http://localhost:8000/tratamientos/", tratamientoIds).then(function (tratamientos) {
+        let historialIds = [];
+        for (const id in tratamientos) historialIds.push(tratamientos[id].historial_id);
+
+        return fetchLote("http://localhost:8000/historial/", historialIds).then(function (historiales) {
+          let filas = "";
+          for (let i = 0; i < controles.length; i++) {
+            const tratamiento = tratamientos[controles[i].tratamiento_id];
+            const historial = tratamiento ? historiales[tratamiento.historial_id] : null;
+            const mascota = historial ? mascotaMap[historial.mascota_id] : null;
+            const nombreDueno = mascota ? duenoMap[mascota.dueno_id] || "Sin dueño" : "Sin dueño";
+
+            filas +=
+              "<tr>" +
+              "<td>" + (controles[i].fecha_control || "") + "</td>" +
+              "<td>" + (controles[i].estado || "") + "</td>" +
+              "<td>" + (tratamiento ? tratamiento.nombre : "Sin tratamiento") + "</td>" +
+              "<td>" + (mascota ? mascota.nombre : "Sin paciente") + "</td>" +
+              "<td>" + nombreDueno + "</td>" +
+              "<td>" + (controles[i].observaciones || "") + "</td>" +
+              "<td>" +
+              '<button class="mini-btn" type="button" onclick="editarControl(' + controles[i].id + ')">Editar</button> ' +
+              '<button class="mini-btn delete" type="button" onclick="eliminarControl(' + controles[i].id + ')">Eliminar</button>' +
+              "</td>" +
+              "</tr>";
+          }
+
+          if (filas === "") {
+            tablaControl.innerHTML = "<tr><td colspan='7'>No hay controles registrados</td></tr>";
+          } else {
+            tablaControl.innerHTML = filas;
+          }
+
+          pintarPaginacion("control", "pagControl", listarControles);
         });
+      });
     })
     .catch(function () {
       tablaControl.innerHTML = "<tr><td colspan='7'>Error al cargar controles</td></tr>";
@@ -2185,7 +1885,7 @@ function listarControles() {
 }
 
 window.editarControl = function (id) {
-  fetch("http://localhost:8000/control/" + id, {
+  fetchApi("http://localhost:8000/control/" + id, {
     method: "GET",
     headers: { "content-type": "application/json" },
   })
@@ -2216,7 +1916,7 @@ window.editarControl = function (id) {
 };
 
 window.eliminarControl = function (id) {
-  fetch("http://localhost:8000/control/" + id, {
+  fetchApi("http://localhost:8000/control/" + id, {
     method: "DELETE",
     headers: { "content-type": "application/json" },
   })
@@ -2241,7 +1941,7 @@ window.eliminarControl = function (id) {
 };
 
 window.editarDueno = function (id) {
-  fetch(urlDuenos + id, {
+  fetchApi(urlDuenos + id, {
     method: "GET",
     headers: { "content-type": "application/json" },
   })
@@ -2269,7 +1969,7 @@ window.editarDueno = function (id) {
 };
 
 window.eliminarDueno = function (id) {
-  fetch(urlDuenos + id, {
+  fetchApi(urlDuenos + id, {
     method: "DELETE",
     headers: { "content-type": "application/json" },
   })
@@ -2305,7 +2005,7 @@ formDueno.addEventListener("submit", function (e) {
   const metodo = idDuenoEditando ? "PUT" : "POST";
   const url = idDuenoEditando ? urlDuenos + idDuenoEditando : urlDuenos;
 
-  fetch(url, {
+  fetchApi(url, {
     method: metodo,
     headers: { "content-type": "application/json" },
     body: JSON.stringify(data),
@@ -2351,7 +2051,7 @@ formMascota.addEventListener("submit", function (e) {
   const metodo = idMascotaEditando ? "PUT" : "POST";
   const url = idMascotaEditando ? urlMascotas + idMascotaEditando : urlMascotas;
 
-  fetch(url, {
+  fetchApi(url, {
     method: metodo,
     headers: { "content-type": "application/json" },
     body: JSON.stringify(data),
@@ -2390,7 +2090,7 @@ formVeterinario.addEventListener("submit", function (e) {
   const metodo = idVeterinarioEditando ? "PUT" : "POST";
   const url = idVeterinarioEditando ? urlVeterinarios + idVeterinarioEditando : urlVeterinarios;
 
-  fetch(url, {
+  fetchApi(url, {
     method: metodo,
     headers: { "content-type": "application/json" },
     body: JSON.stringify(data),
@@ -2409,7 +2109,7 @@ formVeterinario.addEventListener("submit", function (e) {
       msgVeterinario.className = "mensaje ok";
       limpiarFormularioVeterinario();
       listarVeterinarios();
-      cargarContador(urlVeterinarios, "cntVeterinarios");
+      cargarContadores();
     })
     .catch(function (error) {
       msgVeterinario.textContent = error.message;
@@ -2433,7 +2133,7 @@ formCita.addEventListener("submit", function (e) {
   const metodo = idCitaEditando ? "PUT" : "POST";
   const url = idCitaEditando ? urlCitas + idCitaEditando : urlCitas;
 
-  fetch(url, {
+  fetchApi(url, {
     method: metodo,
     headers: { "content-type": "application/json" },
     body: JSON.stringify(data),
@@ -2452,7 +2152,7 @@ formCita.addEventListener("submit", function (e) {
       msgCita.className = "mensaje ok";
       limpiarFormularioCita();
       listarCitas();
-      cargarContador(urlCitas, "cntCitas");
+      cargarContadores();
     })
     .catch(function (error) {
       msgCita.textContent = error.message;
@@ -2479,7 +2179,7 @@ formHistorial.addEventListener("submit", function (e) {
     ? "http://localhost:8000/historial/" + idHistorialEditando
     : "http://localhost:8000/historial/";
 
-  fetch(url, {
+  fetchApi(url, {
     method: metodo,
     headers: { "content-type": "application/json" },
     body: JSON.stringify(data),
@@ -2524,7 +2224,7 @@ formTratamiento.addEventListener("submit", function (e) {
     ? "http://localhost:8000/tratamientos/" + idTratamientoEditando
     : "http://localhost:8000/tratamientos/";
 
-  fetch(url, {
+  fetchApi(url, {
     method: metodo,
     headers: { "content-type": "application/json" },
     body: JSON.stringify(data),
@@ -2563,7 +2263,7 @@ formUsuario.addEventListener("submit", function (e) {
   const metodo = idUsuarioEditando ? "PUT" : "POST";
   const url = idUsuarioEditando ? urlUsuarios + idUsuarioEditando : urlUsuarios;
 
-  fetch(url, {
+  fetchApi(url, {
     method: metodo,
     headers: { "content-type": "application/json" },
     body: JSON.stringify(data),
@@ -2582,7 +2282,7 @@ formUsuario.addEventListener("submit", function (e) {
       msgUsuario.className = "mensaje ok";
       limpiarFormularioUsuario();
       listarUsuarios();
-      cargarContador(urlUsuarios, "cntUsuarios");
+      cargarContadores();
     })
     .catch(function (error) {
       msgUsuario.textContent = error.message;
@@ -2606,7 +2306,7 @@ formControl.addEventListener("submit", function (e) {
     ? "http://localhost:8000/control/" + idControlEditando
     : "http://localhost:8000/control/";
 
-  fetch(url, {
+  fetchApi(url, {
     method: metodo,
     headers: { "content-type": "application/json" },
     body: JSON.stringify(data),
@@ -2680,6 +2380,34 @@ btnCancelarControl.addEventListener("click", function () {
   msgControl.className = "mensaje";
 });
 
+mascotaHistorial.addEventListener("change", function () {
+  cargarCitasHistorialSelect();
+});
+
+mascotaTratamiento.addEventListener("change", function () {
+  cargarHistorialTratamientoSelect();
+});
+
+btnFiltrarCita.addEventListener("click", function () {
+  reiniciarPaginacion("citas");
+  listarCitas();
+});
+
+btnFiltrarHistorial.addEventListener("click", function () {
+  reiniciarPaginacion("historial");
+  listarHistorial();
+});
+
+btnFiltrarTratamiento.addEventListener("click", function () {
+  reiniciarPaginacion("tratamientos");
+  listarTratamientos();
+});
+
+btnFiltrarControl.addEventListener("click", function () {
+  reiniciarPaginacion("control");
+  listarControles();
+});
+
 btnReporteIndividual.addEventListener("click", function () {
   verReporteIndividual();
 });
@@ -2688,30 +2416,6 @@ btnReporteGeneral.addEventListener("click", function () {
   verReporteGeneral();
 });
 
-cargarContador(urlPersonas, "cntPersonas");
-cargarContador(urlMascotas, "cntMascotas");
-cargarContador(urlVeterinarios, "cntVeterinarios");
-cargarContador(urlCitas, "cntCitas");
-cargarContador(urlUsuarios, "cntUsuarios");
-
-cargarPersonasSelect();
-cargarDuenosSelect();
-cargarPersonasVeterinarioSelect();
-cargarMascotasCitaSelect();
-cargarVeterinariosCitaSelect();
-cargarMascotasHistorialSelect();
-cargarVeterinariosHistorialSelect();
-cargarCitasHistorialSelect();
-cargarHistorialTratamientoSelect();
-cargarVeterinariosUsuarioSelect();
-cargarTratamientosControlSelect();
-cargarMascotasReporte();
-listarPersonas();
-listarDuenos();
-listarMascotas();
-listarVeterinarios();
-listarCitas();
-listarHistorial();
-listarTratamientos();
-listarUsuarios();
-listarControles();
+// Al abrir solo se ve el panel: una única petición al bootstrap llena los contadores y deja
+// en caché los nombres que usarán los selectores y las tablas de las demás vistas.
+cargarContadores();
@@ -53,6 +53,7 @@ formulario.addEventListener("submit", (e) => {
 
       localStorage.setItem("sesion_veterinaria", "ok");
       localStorage.setItem("usuario_veterinaria", resultado.body.usuario.username);
+      localStorage.setItem("token_veterinaria", resultado.body.token);
       mostrarMensaje("Login correcto. Redirigiendo...", "ok");
 
       setTimeout(() => {
@@ -0,0 +1,121 @@
+"""Latencia por petición con y sin sentencias preparadas, y secuencial frente a pipeline.
+
+Uso (con la base de .env poblada, por ejemplo con benchmarks.sembrar):
+    python -m benchmarks.bench_consultas --iteraciones 2000
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import time
+
+import psycopg
+from psycopg.rows import dict_row
+
+from config.conexionDB import DB_URL
+from routes.reportes import calcular_reporte_general
+
+CONSULTA_DETALLE = """
+    SELECT id, fecha_hora, motivo, prioridad, estado, observaciones, mascota_id, veterinario_id
+    FROM cita
+    WHERE id = %s
+"""
+
+
+def _resumen(muestras: list[float]) -> dict:
+    ordenadas = sorted(muestras)
+    return {
+        "p50_ms": round(statistics.median(ordenadas) * 1000, 4),
+        "p95_ms": round(ordenadas[int(len(ordenadas) * 0.95) - 1] * 1000, 4),
+        "media_ms": round(statistics.fmean(ordenadas) * 1000, 4),
+    }
+
+
+async def _medir(funcion, iteraciones: int) -> dict:
+    muestras = []
+    for indice in range(iteraciones):
+        inicio = time.perf_counter()
+        await funcion(indice)
+        muestras.append(time.perf_counter() - inicio)
+    return _resumen(muestras)
+
+
+async def _ids_cita(conn) -> list[int]:
+    cursor = await conn.execute("SELECT id FROM cita ORDER BY id LIMIT 1000")
+    ids = [fila["id"] for fila in await cursor.fetchall()]
+    return ids or [1]
+
+
+async def bench_preparadas(iteraciones: int) -> dict:
+    resultados = {}
+    for nombre, umbral in (("sin_preparar", None), ("preparada", 0), ("umbral_5", 5)):
+        async with await psycopg.AsyncConnection.connect(DB_URL, row_factory=dict_row) as conn:
+            conn.prepare_threshold = umbral
+            ids = await _ids_cita(conn)
+
+            async def detalle(indice, conn=conn, ids=ids):
+                cursor = await conn.execute(CONSULTA_DETALLE, (ids[indice % len(ids)],))
+                await cursor.fetchone()
+                await conn.commit()
+
+            resultados[nombre] = await _medir(detalle, iteraciones)
+    return resultados
+
+
+async def bench_reporte_general(iteraciones: int) -> dict:
+    async with await psycopg.AsyncConnection.connect(DB_URL, row_factory=dict_row) as conn:
+        conn.prepare_threshold = 0
+
+        async def pipeline(_indice):
+            await calcular_reporte_general(conn, None, None)
+            await conn.commit()
+
+        return {"pipeline": await _medir(pipeline, iteraciones)}
+
+
+async def bench_secuencial_vs_pipeline(iteraciones: int) -> dict:
+    consultas = [
+        ("SELECT COUNT(*) FROM cita WHERE estado = %s", ("pendiente",)),
+        ("SELECT COUNT(*) FROM mascota WHERE activo = %s", (True,)),
+        ("SELECT COUNT(*) FROM veterinario WHERE activo = %s", (True,)),
+        ("SELECT COUNT(*) FROM tratamiento WHERE estado = %s", ("activo",)),
+        ("SELECT COUNT(*) FROM control_tratamiento WHERE estado = %s", ("pendiente",)),
+    ]
+    async with await psycopg.AsyncConnection.connect(DB_URL) as conn:
+        conn.prepare_threshold = 0
+
+        async def secuencial(_indice):
+            for consulta, parametros in consultas:
+                cursor = await conn.execute(consulta, parametros)
+                await cursor.fetchone()
+            await conn.commit()
+
+        async def pipeline(_indice):
+            async with conn.pipeline():
+                cursores = [await conn.execute(consulta, parametros) for consulta, parametros in consultas]
+                for cursor in cursores:
+                    await cursor.fetchone()
+            await conn.commit()
+
+        return {
+            "secuencial": await _medir(secuencial, iteraciones),
+            "pipeline": await _medir(pipeline, iteraciones),
+        }
+
+
+async def principal(iteraciones: int) -> dict:
+    return {
+        "benchmark": "consultas",
+        "iteraciones": iteraciones,
+        "detalle_cita": await bench_preparadas(iteraciones),
+        "cinco_consultas": await bench_secuencial_vs_pipeline(iteraciones),
+        "reporte_general": await bench_reporte_general(max(iteraciones // 10, 1)),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iteraciones", type=int, default=2000)
+    argumentos = parser.parse_args()
+    print(json.dumps(asyncio.run(principal(argumentos.iteraciones)), indent=2))
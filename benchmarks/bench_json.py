@@ -0,0 +1,98 @@
+"""Serialización de listados: dict_row + jsonable_encoder + json frente a tuplas + json_rapido.
+
+No necesita base de datos: genera filas con la forma de historial_clinico (TEXT largos)
+y de mascota (peso/talla Decimal), como las devuelve psycopg.
+
+Uso:
+    python -m benchmarks.bench_json --filas 1000 --iteraciones 200
+"""
+
+import argparse
+import json
+import random
+import statistics
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+
+from fastapi.encoders import jsonable_encoder
+
+from config.json_rapido import filas_a_json, orjson
+
+COLUMNAS_HISTORIAL = ("id", "fecha", "sintomas", "diagnostico", "observaciones", "mascota_id", "veterinario_id", "cita_id")
+COLUMNAS_MASCOTA = (
+    "id", "nombre", "especie", "edad", "sexo", "peso", "talla", "grupo_sanguineo",
+    "alergias", "antecedentes", "activo", "dueno_id",
+)
+
+
+def _filas_historial(cantidad: int) -> list[tuple]:
+    texto = "Paciente con sintomas persistentes, se recomienda seguimiento. " * 8
+    return [
+        (indice, date(2024, 1, 1) + timedelta(days=indice % 700), texto, texto[:200], texto, indice % 3000, indice % 20, indice)
+        for indice in range(1, cantidad + 1)
+    ]
+
+
+def _filas_mascota(cantidad: int) -> list[tuple]:
+    return [
+        (
+            indice, "Max", "Perro", 4, "M",
+            Decimal(f"{random.uniform(1, 45):.2f}"), Decimal(f"{random.uniform(0.1, 0.9):.2f}"),
+            "DEA1", "Ninguna", "Sin antecedentes", True, indice % 1500,
+        )
+        for indice in range(1, cantidad + 1)
+    ]
+
+
+def _actual(columnas, filas) -> bytes:
+    # Lo que hacía el listado: dict_row por fila, jsonable_encoder y JSONResponse.render.
+    diccionarios = [dict(zip(columnas, fila)) for fila in filas]
+    return json.dumps(
+        jsonable_encoder(diccionarios),
+        ensure_ascii=False,
+        allow_nan=False,
+        indent=None,
+        separators=(",", ":"),
+    ).encode("utf-8")
+
+
+def _medir(funcion, columnas, filas, iteraciones: int) -> dict:
+    muestras = []
+    for _ in range(iteraciones):
+        inicio = time.perf_counter()
+        funcion(columnas, filas)
+        muestras.append(time.perf_counter() - inicio)
+    ordenadas = sorted(muestras)
+    return {
+        "p50_ms": round(statistics.median(ordenadas) * 1000, 4),
+        "p95_ms": round(ordenadas[int(len(ordenadas) * 0.95) - 1] * 1000, 4),
+        "media_ms": round(statistics.fmean(ordenadas) * 1000, 4),
+    }
+
+
+def ejecutar(cantidad: int, iteraciones: int) -> dict:
+    resultados = {"benchmark": "json", "orjson": orjson is not None, "filas": cantidad, "iteraciones": iteraciones}
+    for nombre, columnas, filas in (
+        ("historial", COLUMNAS_HISTORIAL, _filas_historial(cantidad)),
+        ("mascota", COLUMNAS_MASCOTA, _filas_mascota(cantidad)),
+    ):
+        if json.loads(_actual(columnas, filas)) != json.loads(filas_a_json(columnas, filas)):
+            raise SystemExit(f"Las dos rutas producen JSON distinto para {nombre}")
+        actual = _medir(_actual, columnas, filas, iteraciones)
+        rapido = _medir(filas_a_json, columnas, filas, iteraciones)
+        resultados[nombre] = {
+            "actual": actual,
+            "rapido": rapido,
+            "aceleracion_p50": round(actual["p50_ms"] / rapido["p50_ms"], 2) if rapido["p50_ms"] else None,
+            "bytes": len(filas_a_json(columnas, filas)),
+        }
+    return resultados
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--filas", type=int, default=1000)
+    parser.add_argument("--iteraciones", type=int, default=200)
+    argumentos = parser.parse_args()
+    print(json.dumps(ejecutar(argumentos.filas, argumentos.iteraciones), indent=2))
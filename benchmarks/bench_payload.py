@@ -0,0 +1,71 @@
+"""Bytes en el cable de un listado: objetos frente a columnas, con y sin fields=, por codificación.
+
+No necesita base de datos: usa las mismas filas sintéticas que benchmarks.bench_json y los
+compresores de MiddlewareCompresion (zstd y brotli solo si están disponibles).
+
+Uso:
+    python -m benchmarks.bench_payload --filas 1000 --iteraciones 50
+"""
+
+import argparse
+import json
+import statistics
+import time
+
+from benchmarks.bench_json import COLUMNAS_HISTORIAL, COLUMNAS_MASCOTA, _filas_historial, _filas_mascota
+from config.compresion import CODIFICACIONES
+from config.json_rapido import filas_a_columnas_json, filas_a_json
+
+CAMPOS = {
+    "historial": ("id", "fecha", "diagnostico", "mascota_id"),
+    "mascota": ("id", "nombre", "especie", "dueno_id"),
+}
+
+
+def _recortar(columnas: tuple[str, ...], filas: list[tuple], campos: tuple[str, ...]):
+    indices = [columnas.index(campo) for campo in campos]
+    return campos, [tuple(fila[indice] for indice in indices) for fila in filas]
+
+
+def _comprimir(codificacion: str, cuerpo: bytes, iteraciones: int) -> dict:
+    muestras = []
+    for _ in range(iteraciones):
+        inicio = time.perf_counter()
+        comprimido = CODIFICACIONES[codificacion]().terminar(cuerpo)
+        muestras.append(time.perf_counter() - inicio)
+    return {
+        "bytes": len(comprimido),
+        "ratio": round(len(cuerpo) / len(comprimido), 2),
+        "p50_ms": round(statistics.median(muestras) * 1000, 4),
+    }
+
+
+def ejecutar(cantidad: int, iteraciones: int) -> dict:
+    resultados = {"benchmark": "payload", "filas": cantidad, "codificaciones": list(CODIFICACIONES)}
+    for nombre, columnas, filas in (
+        ("historial", COLUMNAS_HISTORIAL, _filas_historial(cantidad)),
+        ("mascota", COLUMNAS_MASCOTA, _filas_mascota(cantidad)),
+    ):
+        columnas_recortadas, filas_recortadas = _recortar(columnas, filas, CAMPOS[nombre])
+        variantes = {
+            "objetos": filas_a_json(columnas, filas),
+            "columnas": filas_a_columnas_json(columnas, filas),
+            "objetos_fields": filas_a_json(columnas_recortadas, filas_recortadas),
+            "columnas_fields": filas_a_columnas_json(columnas_recortadas, filas_recortadas),
+        }
+        resultados[nombre] = {
+            variante: {
+                "identity": len(cuerpo),
+                **{codificacion: _comprimir(codificacion, cuerpo, iteraciones) for codificacion in CODIFICACIONES},
+            }
+            for variante, cuerpo in variantes.items()
+        }
+    return resultados
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--filas", type=int, default=1000)
+    parser.add_argument("--iteraciones", type=int, default=50)
+    argumentos = parser.parse_args()
+    print(json.dumps(ejecutar(argumentos.filas, argumentos.iteraciones), indent=2))
@@ -0,0 +1,149 @@
+"""Latencia de escritura en la primaria con la carga de lectura en la primaria o en la réplica.
+
+En cada fase corre una carga de lectura fija (reporte general, listado de citas y búsqueda
+por texto) y, en paralelo, un escritor que mide UPDATE + COMMIT sobre cita. La fase
+"primaria" es la situación sin DB_LECTURA_HOST; la fase "replica" envía las mismas
+lecturas a la réplica. pg_stat_database muestra en qué servidor se ejecutaron.
+
+Uso (con benchmarks/replica/docker-compose.yml levantado, DB_LECTURA_HOST en .env y la
+base poblada con benchmarks.sembrar):
+    python -m benchmarks.bench_replica --segundos 30 --lectores 16
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import time
+
+import psycopg
+from psycopg.rows import dict_row
+
+from config.conexionDB import DB_URL, DB_URL_LECTURA
+from routes.buscar import CONSULTA_HISTORIAL
+from routes.reportes import calcular_reporte_general
+
+CONSULTA_LISTADO = """
+    SELECT id, fecha_hora, motivo, prioridad, estado, observaciones, mascota_id, veterinario_id
+    FROM cita
+    WHERE id > %s
+    ORDER BY id
+    LIMIT 50
+"""
+
+CONSULTA_ESCRITURA = "UPDATE cita SET observaciones = observaciones WHERE id = %s"
+
+CONSULTA_ESTADISTICAS = """
+    SELECT xact_commit, tup_returned, tup_fetched, blks_hit + blks_read AS bloques
+    FROM pg_stat_database
+    WHERE datname = current_database()
+"""
+
+
+def _resumen(muestras: list[float]) -> dict:
+    if not muestras:
+        return {}
+    ordenadas = sorted(muestras)
+    return {
+        "cantidad": len(ordenadas),
+        "p50_ms": round(statistics.median(ordenadas) * 1000, 4),
+        "p95_ms": round(ordenadas[int(len(ordenadas) * 0.95) - 1] * 1000, 4),
+        "p99_ms": round(ordenadas[int(len(ordenadas) * 0.99) - 1] * 1000, 4),
+    }
+
+
+async def _estadisticas(url: str) -> dict:
+    async with await psycopg.AsyncConnection.connect(url, row_factory=dict_row, autocommit=True) as conn:
+        cursor = await conn.execute(CONSULTA_ESTADISTICAS)
+        return await cursor.fetchone()
+
+
+async def _diferencia(url: str, antes: dict) -> dict:
+    despues = await _estadisticas(url)
+    return {clave: despues[clave] - antes[clave] for clave in antes}
+
+
+async def _lector(url: str, numero: int, fin: float, conteo: list):
+    async with await psycopg.AsyncConnection.connect(url, row_factory=dict_row) as conn:
+        conn.prepare_threshold = 0
+        vuelta = 0
+        while time.perf_counter() < fin:
+            match (numero + vuelta) % 3:
+                case 0:
+                    await calcular_reporte_general(conn, None, None)
+                case 1:
+                    cursor = await conn.execute(CONSULTA_LISTADO, ((vuelta * 50) % 10000,))
+                    await cursor.fetchall()
+                case _:
+                    cursor = await conn.execute(
+                        CONSULTA_HISTORIAL, {"q": "vomito fiebre", "limite": 20, "desplazamiento": 0}
+                    )
+                    await cursor.fetchall()
+            await conn.commit()
+            conteo[0] += 1
+            vuelta += 1
+
+
+async def _escritor(fin: float, muestras: list):
+    async with await psycopg.AsyncConnection.connect(DB_URL) as conn:
+        cursor = await conn.execute("SELECT id FROM cita ORDER BY id LIMIT 1000")
+        ids = [fila[0] for fila in await cursor.fetchall()] or [1]
+        await conn.commit()
+        indice = 0
+        while time.perf_counter() < fin:
+            inicio = time.perf_counter()
+            await conn.execute(CONSULTA_ESCRITURA, (ids[indice % len(ids)],))
+            await conn.commit()
+            muestras.append(time.perf_counter() - inicio)
+            indice += 1
+
+
+async def _retraso_replica() -> float | None:
+    async with await psycopg.AsyncConnection.connect(DB_URL_LECTURA, autocommit=True) as conn:
+        cursor = await conn.execute(
+            "SELECT EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp())"
+        )
+        (retraso,) = await cursor.fetchone()
+        return float(retraso) if retraso is not None else None
+
+
+async def fase(destino: str, segundos: float, lectores: int) -> dict:
+    url_lecturas = DB_URL if destino == "primaria" else DB_URL_LECTURA
+    antes = {"primaria": await _estadisticas(DB_URL), "replica": await _estadisticas(DB_URL_LECTURA)}
+    fin = time.perf_counter() + segundos
+    conteo = [0]
+    escrituras: list[float] = []
+    await asyncio.gather(
+        _escritor(fin, escrituras),
+        *(_lector(url_lecturas, numero, fin, conteo) for numero in range(lectores)),
+    )
+    return {
+        "lecturas_por_segundo": round(conteo[0] / segundos, 2),
+        "escritura": _resumen(escrituras),
+        "pg_stat_database": {
+            "primaria": await _diferencia(DB_URL, antes["primaria"]),
+            "replica": await _diferencia(DB_URL_LECTURA, antes["replica"]),
+        },
+        "retraso_replica_s": await _retraso_replica(),
+    }
+
+
+async def principal(segundos: float, lectores: int) -> dict:
+    return {
+        "benchmark": "replica",
+        "segundos": segundos,
+        "lectores": lectores,
+        "escritura_sola": await fase("primaria", segundos, 0),
+        "lecturas_en_primaria": await fase("primaria", segundos, lectores),
+        "lecturas_en_replica": await fase("replica", segundos, lectores),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--segundos", type=float, default=30)
+    parser.add_argument("--lectores", type=int, default=16)
+    argumentos = parser.parse_args()
+    if DB_URL_LECTURA is None:
+        parser.error("DB_LECTURA_HOST no está configurado en .env")
+    print(json.dumps(asyncio.run(principal(argumentos.segundos, argumentos.lectores)), indent=2))
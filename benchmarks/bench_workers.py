@@ -0,0 +1,121 @@
+"""Escalado del throughput con la cantidad de workers de `python -m servidor`.
+
+Para cada cantidad de workers levanta el servidor, espera a que responda, lo carga con
+benchmarks.carga y lo detiene con SIGTERM midiendo cuánto tarda en drenar. La carga corre
+en varios procesos (--generadores) para que el cliente no sea el cuello de botella.
+
+Uso (con la base sembrada con benchmarks.sembrar):
+    python -m benchmarks.bench_workers --workers 1 2 4 8 --duracion 20 --reuseport
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import signal
+import sys
+import time
+
+from benchmarks.carga import ClienteHTTP
+
+PUERTO = 8100
+
+
+async def _esperar_listo(puerto: int, limite: float = 60):
+    fin = time.monotonic() + limite
+    while time.monotonic() < fin:
+        cliente = ClienteHTTP("127.0.0.1", puerto)
+        try:
+            estado, _ = await cliente.solicitar("GET", "/")
+            if estado == 200:
+                return
+        except (OSError, asyncio.IncompleteReadError, IndexError):
+            pass
+        finally:
+            await cliente.cerrar()
+        await asyncio.sleep(0.5)
+    raise RuntimeError(f"El servidor no respondió en {limite} s")
+
+
+async def _generador(puerto: int, concurrencia: int, duracion: float, calentamiento: float) -> dict:
+    proceso = await asyncio.create_subprocess_exec(
+        sys.executable, "-m", "benchmarks.carga",
+        "--url", f"http://127.0.0.1:{puerto}",
+        "--concurrencia", str(concurrencia),
+        "--duracion", str(duracion),
+        "--calentamiento", str(calentamiento),
+        stdout=asyncio.subprocess.PIPE,
+    )
+    salida, _ = await proceso.communicate()
+    return json.loads(salida)["total"]
+
+
+async def medir(workers: int, reuseport: bool, generadores: int, concurrencia: int, duracion: float) -> dict:
+    servidor = await asyncio.create_subprocess_exec(
+        sys.executable, "-m", "servidor",
+        "--workers", str(workers),
+        "--puerto", str(PUERTO),
+        "--reuseport" if reuseport else "--no-reuseport",
+    )
+    try:
+        await _esperar_listo(PUERTO)
+        totales = await asyncio.gather(
+            *(_generador(PUERTO, concurrencia, duracion, 3) for _ in range(generadores))
+        )
+    finally:
+        inicio = time.perf_counter()
+        servidor.send_signal(signal.SIGTERM)
+        await servidor.wait()
+        drenaje = time.perf_counter() - inicio
+
+    return {
+        "workers": workers,
+        "rps": round(sum(total["rps"] for total in totales), 2),
+        "errores": sum(total["errores"] for total in totales),
+        "p50_ms": max(total["p50_ms"] for total in totales),
+        "p99_ms": max(total["p99_ms"] for total in totales),
+        "drenaje_s": round(drenaje, 2),
+        "codigo_salida": servidor.returncode,
+    }
+
+
+async def principal(lista_workers: list[int], reuseport: bool, generadores: int, concurrencia: int, duracion: float) -> dict:
+    resultados = []
+    for workers in lista_workers:
+        resultados.append(await medir(workers, reuseport, generadores, concurrencia, duracion))
+    base = resultados[0]["rps"] or 1
+    for resultado in resultados:
+        resultado["aceleracion"] = round(resultado["rps"] / base, 2)
+    return {
+        "benchmark": "workers",
+        "cpus": os.process_cpu_count(),
+        "reuseport": reuseport,
+        "generadores": generadores,
+        "concurrencia_por_generador": concurrencia,
+        "duracion_s": duracion,
+        "resultados": resultados,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--reuseport", action=argparse.BooleanOptionalAction, default=False)
+    parser.add_argument("--generadores", type=int, default=2)
+    parser.add_argument("--concurrencia", type=int, default=32)
+    parser.add_argument("--duracion", type=float, default=20)
+    argumentos = parser.parse_args()
+    print(
+        json.dumps(
+            asyncio.run(
+                principal(
+                    argumentos.workers,
+                    argumentos.reuseport,
+                    argumentos.generadores,
+                    argumentos.concurrencia,
+                    argumentos.duracion,
+                )
+            ),
+            indent=2,
+        )
+    )
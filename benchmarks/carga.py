@@ -0,0 +1,286 @@
+"""Generador de carga asíncrono para la API veterinaria.
+
+Recorre todos los routers (CRUD, /usuarios/login, /reportes/*) con una mezcla
+ponderada de peticiones sobre conexiones keep-alive y emite JSON con p50/p95/p99,
+RPS, errores y el tiempo de espera del pool (leído de /metrics). Incluye el commit
+actual para poder comparar resultados entre versiones.
+
+Uso (con la API levantada y la base sembrada con benchmarks.sembrar):
+    python -m benchmarks.carga --url http://127.0.0.1:8000 --concurrencia 64 --duracion 30 \\
+        --salida resultados.json
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import subprocess
+import time
+from datetime import date, datetime, timedelta
+from urllib.parse import urlsplit
+
+import psycopg
+
+from config.conexionDB import DB_URL
+
+
+class ClienteHTTP:
+    """Cliente HTTP/1.1 mínimo con keep-alive; evita añadir dependencias al proyecto."""
+
+    def __init__(self, host: str, puerto: int, token: str | None = None):
+        self.host = host
+        self.puerto = puerto
+        self.token = token
+        self._lector = None
+        self._escritor = None
+
+    async def _conectar(self):
+        self._lector, self._escritor = await asyncio.open_connection(self.host, self.puerto)
+
+    async def cerrar(self):
+        if self._escritor is not None:
+            self._escritor.close()
+            self._escritor = None
+
+    async def solicitar(self, metodo: str, ruta: str, cuerpo=None) -> tuple[int, bytes]:
+        if self._escritor is None:
+            await self._conectar()
+        datos = json.dumps(cuerpo, default=str).encode() if cuerpo is not None else b""
+        autorizacion = f"Authorization: Bearer {self.token}\r\n" if self.token else ""
+        cabeceras = (
+            f"{metodo} {ruta} HTTP/1.1\r\n"
+            f"Host: {self.host}\r\n"
+            f"{autorizacion}"
+            "Content-Type: application/json\r\n"
+            f"Content-Length: {len(datos)}\r\n"
+            "\r\n"
+        )
+        try:
+            self._escritor.write(cabeceras.encode() + datos)
+            await self._escritor.drain()
+            return await self._leer_respuesta()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            await self.cerrar()
+            raise
+
+    async def _leer_respuesta(self) -> tuple[int, bytes]:
+        estado = int((await self._lector.readline()).split()[1])
+        cabeceras = {}
+        while (linea := await self._lector.readline()) not in (b"\r\n", b""):
+            nombre, _, valor = linea.decode("latin-1").partition(":")
+            cabeceras[nombre.strip().lower()] = valor.strip()
+
+        if cabeceras.get("transfer-encoding", "").lower() == "chunked":
+            partes = []
+            while (tamano := int((await self._lector.readline()).strip(), 16)) > 0:
+                partes.append(await self._lector.readexactly(tamano))
+                await self._lector.readline()
+            await self._lector.readline()
+            cuerpo = b"".join(partes)
+        else:
+            cuerpo = await self._lector.readexactly(int(cabeceras.get("content-length", 0)))
+
+        if cabeceras.get("connection", "").lower() == "close":
+            await self.cerrar()
+        return estado, cuerpo
+
+
+async def _rangos_ids() -> dict:
+    async with await psycopg.AsyncConnection.connect(DB_URL) as conn:
+        rangos = {}
+        for tabla in ("persona", "dueno", "mascota", "veterinario", "cita", "historial_clinico", "tratamiento", "control_tratamiento"):
+            cursor = await conn.execute(f"SELECT COALESCE(MAX(id), 1) FROM {tabla}")
+            rangos[tabla] = (await cursor.fetchone())[0]
+        cursor = await conn.execute("SELECT username FROM usuario ORDER BY id LIMIT 50")
+        rangos["usernames"] = [fila[0] for fila in await cursor.fetchall()] or ["vet1"]
+        return rangos
+
+
+BUSQUEDAS = ("dermatitis", "vomitos", "cojera", "tos", "Max", "Luna", "Quispe", "Rojas", "CI00001")
+
+
+def _escenarios(rangos: dict, password: str) -> list[tuple[str, int, callable]]:
+    """(nombre, peso, generador) donde el generador devuelve (método, ruta, cuerpo)."""
+
+    def al_azar(tabla: str) -> int:
+        return random.randint(1, rangos[tabla])
+
+    def nueva_cita():
+        fecha = datetime.now() + timedelta(minutes=random.randrange(60 * 24 * 90))
+        return {
+            "fecha_hora": fecha.replace(second=0, microsecond=0),
+            "motivo": "Carga de prueba",
+            "prioridad": "normal",
+            "estado": "pendiente",
+            "observaciones": "Generada por benchmarks.carga",
+            "mascota_id": al_azar("mascota"),
+            "veterinario_id": al_azar("veterinario"),
+        }
+
+    def rango_agenda():
+        inicio = date.today() + timedelta(days=random.randrange(30))
+        return f"desde={inicio}T00:00:00&hasta={inicio + timedelta(days=7)}T00:00:00"
+
+    def rango_reporte():
+        fin = date.today() - timedelta(days=random.randrange(365))
+        return f"fecha_inicio={fin - timedelta(days=90)}&fecha_fin={fin}"
+
+    return [
+        ("GET /personas/", 4, lambda: ("GET", "/personas/?limit=50", None)),
+        ("GET /personas/{id}", 6, lambda: ("GET", f"/personas/{al_azar('persona')}", None)),
+        ("GET /duenos/", 2, lambda: ("GET", "/duenos/?limit=50", None)),
+        ("GET /duenos/{id}", 2, lambda: ("GET", f"/duenos/{al_azar('dueno')}", None)),
+        ("GET /mascotas/", 4, lambda: ("GET", "/mascotas/?limit=50", None)),
+        ("GET /mascotas/{id}", 8, lambda: ("GET", f"/mascotas/{al_azar('mascota')}", None)),
+        ("GET /veterinarios/", 2, lambda: ("GET", "/veterinarios/", None)),
+        ("GET /veterinarios/{id}", 3, lambda: ("GET", f"/veterinarios/{al_azar('veterinario')}", None)),
+        ("GET /citas/", 6, lambda: ("GET", f"/citas/?veterinario_id={al_azar('veterinario')}&limit=50", None)),
+        ("GET /citas/disponibilidad", 2, lambda: ("GET", f"/citas/disponibilidad?{rango_agenda()}&veterinario_id={al_azar('veterinario')}", None)),
+        ("GET /veterinarios/{id}/agenda", 2, lambda: ("GET", f"/veterinarios/{al_azar('veterinario')}/agenda?{rango_agenda()}", None)),
+        ("GET /citas/{id}", 8, lambda: ("GET", f"/citas/{al_azar('cita')}", None)),
+        ("GET /historial/", 4, lambda: ("GET", f"/historial/?mascota_id={al_azar('mascota')}", None)),
+        ("GET /historial/{id}", 4, lambda: ("GET", f"/historial/{al_azar('historial_clinico')}", None)),
+        ("GET /tratamientos/{id}", 3, lambda: ("GET", f"/tratamientos/{al_azar('tratamiento')}", None)),
+        ("GET /control/{id}", 3, lambda: ("GET", f"/control/{al_azar('control_tratamiento')}", None)),
+        ("GET /buscar/", 3, lambda: ("GET", f"/buscar/?q={random.choice(BUSQUEDAS)}", None)),
+        ("GET /usuarios/", 1, lambda: ("GET", "/usuarios/", None)),
+        ("POST /usuarios/login", 2, lambda: ("POST", "/usuarios/login", {"username": random.choice(rangos["usernames"]), "password": password})),
+        ("POST /citas/", 4, lambda: ("POST", "/citas/", nueva_cita())),
+        ("PUT /citas/{id}", 1, lambda: ("PUT", f"/citas/{al_azar('cita')}", nueva_cita())),
+        ("PATCH /citas/{id}", 2, lambda: ("PATCH", f"/citas/{al_azar('cita')}", {"estado": random.choice(("confirmada", "completada"))})),
+        ("GET /dashboard/bootstrap", 1, lambda: ("GET", "/dashboard/bootstrap", None)),
+        ("GET /reportes/individual/{id}", 4, lambda: ("GET", f"/reportes/individual/{al_azar('mascota')}", None)),
+        ("GET /reportes/general", 1, lambda: ("GET", f"/reportes/general?{rango_reporte()}", None)),
+    ]
+
+
+def _percentil(ordenadas: list[float], fraccion: float) -> float:
+    if not ordenadas:
+        return 0.0
+    return ordenadas[min(len(ordenadas) - 1, int(len(ordenadas) * fraccion))]
+
+
+def _resumen(muestras: list[float], errores: int, duracion: float) -> dict:
+    ordenadas = sorted(muestras)
+    return {
+        "peticiones": len(ordenadas),
+        "errores": errores,
+        "rps": round(len(ordenadas) / duracion, 2),
+        "p50_ms": round(_percentil(ordenadas, 0.50) * 1000, 3),
+        "p95_ms": round(_percentil(ordenadas, 0.95) * 1000, 3),
+        "p99_ms": round(_percentil(ordenadas, 0.99) * 1000, 3),
+    }
+
+
+async def _espera_pool(cliente: ClienteHTTP) -> tuple[float, float]:
+    """(suma en segundos, cantidad) del histograma de espera del pool en /metrics."""
+    estado, cuerpo = await cliente.solicitar("GET", "/metrics")
+    suma = cantidad = 0.0
+    if estado == 200:
+        for linea in cuerpo.decode().splitlines():
+            if linea.startswith("veterinaria_pool_espera_segundos_sum"):
+                suma += float(linea.rsplit(" ", 1)[1])
+            elif linea.startswith("veterinaria_pool_espera_segundos_count"):
+                cantidad += float(linea.rsplit(" ", 1)[1])
+    return suma, cantidad
+
+
+async def _trabajador(cliente: ClienteHTTP, escenarios, fin: float, muestras: dict, errores: dict):
+    nombres = [nombre for nombre, _, _ in escenarios]
+    pesos = [peso for _, peso, _ in escenarios]
+    generadores = {nombre: generador for nombre, _, generador in escenarios}
+    while time.monotonic() < fin:
+        nombre = random.choices(nombres, pesos)[0]
+        metodo, ruta, cuerpo = generadores[nombre]()
+        inicio = time.perf_counter()
+        try:
+            estado, _ = await cliente.solicitar(metodo, ruta, cuerpo)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            estado = 599
+        muestras[nombre].append(time.perf_counter() - inicio)
+        # 404 (id borrado) y 409 (horario ocupado) son respuestas esperadas del escenario.
+        if estado >= 400 and estado not in (404, 409):
+            errores[nombre] += 1
+
+
+def _commit_actual() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def _iniciar_sesion(host: str, puerto: int, username: str, password: str) -> str:
+    cliente = ClienteHTTP(host, puerto)
+    try:
+        estado, cuerpo = await cliente.solicitar("POST", "/usuarios/login", {"username": username, "password": password})
+    finally:
+        await cliente.cerrar()
+    if estado != 200:
+        raise SystemExit(f"No se pudo iniciar sesión como {username}: HTTP {estado}")
+    return json.loads(cuerpo)["token"]
+
+
+async def ejecutar(url: str, concurrencia: int, duracion: float, calentamiento: float, password: str) -> dict:
+    partes = urlsplit(url)
+    host, puerto = partes.hostname, partes.port or 80
+    rangos = await _rangos_ids()
+    escenarios = _escenarios(rangos, password)
+    token = await _iniciar_sesion(host, puerto, rangos["usernames"][0], password)
+    clientes = [ClienteHTTP(host, puerto, token) for _ in range(concurrencia)]
+    monitor = ClienteHTTP(host, puerto)
+
+    if calentamiento > 0:
+        descartadas = {nombre: [] for nombre, _, _ in escenarios}
+        fin = time.monotonic() + calentamiento
+        await asyncio.gather(*(_trabajador(cliente, escenarios, fin, descartadas, dict.fromkeys(descartadas, 0)) for cliente in clientes))
+
+    muestras = {nombre: [] for nombre, _, _ in escenarios}
+    errores = dict.fromkeys(muestras, 0)
+    espera_inicial = await _espera_pool(monitor)
+    inicio = time.monotonic()
+    await asyncio.gather(*(_trabajador(cliente, escenarios, inicio + duracion, muestras, errores) for cliente in clientes))
+    transcurrido = time.monotonic() - inicio
+    espera_final = await _espera_pool(monitor)
+
+    for cliente in [*clientes, monitor]:
+        await cliente.cerrar()
+
+    todas = [muestra for lista in muestras.values() for muestra in lista]
+    esperas = espera_final[1] - espera_inicial[1]
+    return {
+        "benchmark": "carga",
+        "commit": _commit_actual(),
+        "fecha": datetime.now().isoformat(timespec="seconds"),
+        "url": url,
+        "concurrencia": concurrencia,
+        "duracion_s": round(transcurrido, 2),
+        "total": _resumen(todas, sum(errores.values()), transcurrido),
+        "pool": {
+            "adquisiciones": int(esperas),
+            "espera_media_ms": round((espera_final[0] - espera_inicial[0]) / esperas * 1000, 3) if esperas else None,
+        },
+        "endpoints": {nombre: _resumen(lista, errores[nombre], transcurrido) for nombre, lista in muestras.items()},
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--concurrencia", type=int, default=32)
+    parser.add_argument("--duracion", type=float, default=30)
+    parser.add_argument("--calentamiento", type=float, default=5)
+    parser.add_argument("--password", default="bench123", help="Contraseña usada por benchmarks.sembrar")
+    parser.add_argument("--salida", help="Archivo JSON de resultados (por defecto, stdout)")
+    argumentos = parser.parse_args()
+    resultado = asyncio.run(
+        ejecutar(argumentos.url, argumentos.concurrencia, argumentos.duracion, argumentos.calentamiento, argumentos.password)
+    )
+    texto = json.dumps(resultado, indent=2)
+    if argumentos.salida:
+        with open(argumentos.salida, "w", encoding="utf-8") as archivo:
+            archivo.write(texto + "\n")
+    else:
+        print(texto)
@@ -0,0 +1,9 @@
+#!/bin/bash
+# Rol de replicación para pg_basebackup y el walreceiver de la réplica.
+set -e
+
+psql -v ON_ERROR_STOP=1 --username "$POSTGRES_USER" --dbname "$POSTGRES_DB" <<-SQL
+    CREATE ROLE replicador WITH REPLICATION LOGIN PASSWORD 'replicador';
+SQL
+
+echo "host replication replicador all scram-sha-256" >> "$PGDATA/pg_hba.conf"
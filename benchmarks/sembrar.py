@@ -0,0 +1,273 @@
+"""Carga un conjunto de datos sintético y reproducible en la base configurada en .env.
+
+Sigue el esquema que usan los routers (persona, dueno, veterinario, usuario, mascota,
+cita, historial_clinico, tratamiento, control_tratamiento). Con --limpiar vacía antes
+todas las tablas; sin esa opción se niega a sembrar sobre datos existentes.
+
+Uso:
+    python -m benchmarks.sembrar --limpiar --personas 5000 --veterinarios 40 \\
+        --mascotas 8000 --citas-por-mascota 12
+"""
+
+import argparse
+import asyncio
+import json
+import random
+from datetime import date, datetime, timedelta
+
+import psycopg
+
+from config.autenticacion import hashear_password
+from config.conexionDB import DB_URL
+from config.identificadores import sincronizar_secuencias
+
+TABLAS = (
+    "control_tratamiento",
+    "tratamiento",
+    "historial_clinico",
+    "cita",
+    "mascota",
+    "usuario",
+    "veterinario",
+    "dueno",
+    "persona",
+)
+
+NOMBRES = ("Ana", "Luis", "Carla", "Jorge", "Maria", "Pedro", "Sofia", "Diego", "Lucia", "Mateo")
+APELLIDOS = ("Quispe", "Rojas", "Mamani", "Flores", "Vargas", "Choque", "Gutierrez", "Lopez")
+ESPECIES = ("Perro", "Gato", "Conejo", "Ave", "Hamster")
+NOMBRES_MASCOTA = ("Max", "Mishi", "Luna", "Rocky", "Toby", "Nala", "Coco", "Simba", "Kira", "Bruno")
+ESPECIALIDADES = ("Medicina General", "Dermatologia", "Cirugia", "Cardiologia", "Odontologia")
+# Las citas sembradas son pasadas: sin estados activos no chocan con ex_cita_veterinario_horario
+ESTADOS_CITA = ("completada", "completada", "completada", "completada", "cancelada", "no_asistio")
+ESTADOS_TRATAMIENTO = ("activo", "finalizado", "finalizado", "suspendido")
+ESTADOS_CONTROL = ("pendiente", "realizado", "realizado", "cancelado")
+SINTOMAS = (
+    "Picazon y enrojecimiento en la piel",
+    "Vomitos ocasionales y falta de apetito",
+    "Cojera en la pata trasera derecha",
+    "Tos persistente por las noches",
+    "Sin sintomas relevantes, control de rutina",
+)
+DIAGNOSTICOS = (
+    "Dermatitis alergica",
+    "Gastritis leve",
+    "Esguince",
+    "Traqueobronquitis infecciosa",
+    "Paciente sano",
+)
+
+
+async def _copiar(cursor, tabla: str, columnas: tuple[str, ...], filas):
+    async with cursor.copy(f"COPY {tabla} ({', '.join(columnas)}) FROM STDIN") as copia:
+        for fila in filas:
+            await copia.write_row(fila)
+
+
+async def sembrar(argumentos) -> dict:
+    aleatorio = random.Random(argumentos.semilla)
+    hoy = datetime.now().replace(minute=0, second=0, microsecond=0)
+
+    async with await psycopg.AsyncConnection.connect(DB_URL) as conn:
+        async with conn.cursor() as cursor:
+            if argumentos.limpiar:
+                await cursor.execute(f"TRUNCATE {', '.join(TABLAS)}, resumen_cita_diario RESTART IDENTITY CASCADE")
+            else:
+                await cursor.execute("SELECT EXISTS (SELECT 1 FROM persona)")
+                if (await cursor.fetchone())[0]:
+                    raise SystemExit("La base ya tiene datos; use --limpiar para reemplazarlos")
+
+            personas = [
+                (
+                    indice,
+                    aleatorio.choice(NOMBRES),
+                    aleatorio.choice(APELLIDOS),
+                    f"CI{indice:08d}",
+                    f"7{aleatorio.randrange(10**7):07d}",
+                    f"persona{indice}@correo.com",
+                    f"Calle {aleatorio.randrange(1, 500)}",
+                    True,
+                )
+                for indice in range(1, argumentos.personas + 1)
+            ]
+            await _copiar(cursor, "persona", ("id", "nombres", "apellidos", "ci", "telefono", "email", "direccion", "activo"), personas)
+
+            veterinarios = range(1, argumentos.veterinarios + 1)
+            password_hash = hashear_password(argumentos.password)
+            await _copiar(
+                cursor,
+                "veterinario",
+                ("id", "licencia", "especialidad", "activo", "persona_id"),
+                ((indice, f"VET-{indice:05d}", aleatorio.choice(ESPECIALIDADES), True, indice) for indice in veterinarios),
+            )
+            await _copiar(
+                cursor,
+                "usuario",
+                ("id", "username", "password_hash", "activo", "veterinario_id"),
+                ((indice, f"vet{indice}", password_hash, True, indice) for indice in veterinarios),
+            )
+
+            duenos = range(1, argumentos.personas - argumentos.veterinarios + 1)
+            await _copiar(
+                cursor,
+                "dueno",
+                ("id", "persona_id", "direccion", "activo"),
+                ((indice, argumentos.veterinarios + indice, f"Zona {indice % 20}", True) for indice in duenos),
+            )
+
+            mascotas = []
+            for indice in range(1, argumentos.mascotas + 1):
+                mascotas.append(
+                    (
+                        indice,
+                        aleatorio.choice(NOMBRES_MASCOTA),
+                        aleatorio.choice(ESPECIES),
+                        aleatorio.randrange(1, 16),
+                        aleatorio.choice(("M", "H")),
+                        round(aleatorio.uniform(0.5, 45), 2),
+                        round(aleatorio.uniform(0.1, 0.9), 2),
+                        aleatorio.choice(("A", "B", "DEA1")),
+                        "Ninguna",
+                        "Sin antecedentes",
+                        True,
+                        aleatorio.choice(duenos),
+                    )
+                )
+            await _copiar(
+                cursor,
+                "mascota",
+                (
+                    "id", "nombre", "especie", "edad", "sexo", "peso", "talla", "grupo_sanguineo",
+                    "alergias", "antecedentes", "activo", "dueno_id",
+                ),
+                mascotas,
+            )
+
+            citas = []
+            historiales = []
+            tratamientos = []
+            controles = []
+            for mascota_id in range(1, argumentos.mascotas + 1):
+                citas_mascota = []
+                for _ in range(argumentos.citas_por_mascota):
+                    cita_id = len(citas) + 1
+                    fecha_hora = hoy - timedelta(hours=aleatorio.randrange(24 * argumentos.dias_historia))
+                    veterinario_id = aleatorio.choice(veterinarios)
+                    citas.append(
+                        (
+                            cita_id,
+                            fecha_hora,
+                            "Consulta de control",
+                            aleatorio.choice(("normal", "normal", "urgente")),
+                            aleatorio.choice(ESTADOS_CITA),
+                            "Observacion de prueba",
+                            mascota_id,
+                            veterinario_id,
+                        )
+                    )
+                    citas_mascota.append((cita_id, fecha_hora, veterinario_id))
+
+                for cita_id, fecha_hora, veterinario_id in citas_mascota[: argumentos.historial_por_mascota]:
+                    historial_id = len(historiales) + 1
+                    fecha = fecha_hora.date()
+                    historiales.append(
+                        (
+                            historial_id,
+                            fecha,
+                            aleatorio.choice(SINTOMAS),
+                            aleatorio.choice(DIAGNOSTICOS),
+                            "Seguimiento recomendado",
+                            mascota_id,
+                            veterinario_id,
+                            cita_id,
+                        )
+                    )
+                    for _ in range(argumentos.tratamientos_por_historial):
+                        tratamiento_id = len(tratamientos) + 1
+                        tratamientos.append(
+                            (
+                                tratamiento_id,
+                                "Tratamiento de prueba",
+                                aleatorio.choice(ESTADOS_TRATAMIENTO),
+                                fecha,
+                                fecha + timedelta(days=aleatorio.randrange(7, 60)),
+                                "Objetivo de prueba",
+                                historial_id,
+                            )
+                        )
+                        for numero in range(argumentos.controles_por_tratamiento):
+                            controles.append(
+                                (
+                                    len(controles) + 1,
+                                    fecha + timedelta(days=7 * (numero + 1)),
+                                    aleatorio.choice(ESTADOS_CONTROL),
+                                    "Control de prueba",
+                                    tratamiento_id,
+                                )
+                            )
+
+            await _copiar(
+                cursor,
+                "cita",
+                ("id", "fecha_hora", "motivo", "prioridad", "estado", "observaciones", "mascota_id", "veterinario_id"),
+                citas,
+            )
+            await _copiar(
+                cursor,
+                "historial_clinico",
+                ("id", "fecha", "sintomas", "diagnostico", "observaciones", "mascota_id", "veterinario_id", "cita_id"),
+                historiales,
+            )
+            await _copiar(
+                cursor,
+                "tratamiento",
+                ("id", "nombre", "estado", "fecha_inicio", "fecha_fin", "objetivo", "historial_id"),
+                tratamientos,
+            )
+            await _copiar(
+                cursor,
+                "control_tratamiento",
+                ("id", "fecha_control", "estado", "observaciones", "tratamiento_id"),
+                controles,
+            )
+        await conn.commit()
+        await sincronizar_secuencias(conn)
+        async with conn.cursor() as cursor:
+            for tabla in TABLAS:
+                await cursor.execute(f"ANALYZE {tabla}")
+        await conn.commit()
+
+    return dict(
+        personas=len(personas),
+        veterinarios=len(veterinarios),
+        duenos=len(duenos),
+        mascotas=len(mascotas),
+        citas=len(citas),
+        historial_clinico=len(historiales),
+        tratamientos=len(tratamientos),
+        controles=len(controles),
+        generado=date.today().isoformat(),
+    )
+
+
+def _argumentos():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--limpiar", action="store_true", help="TRUNCATE de todas las tablas antes de sembrar")
+    parser.add_argument("--semilla", type=int, default=42)
+    parser.add_argument("--personas", type=int, default=2000)
+    parser.add_argument("--veterinarios", type=int, default=20)
+    parser.add_argument("--mascotas", type=int, default=3000)
+    parser.add_argument("--citas-por-mascota", type=int, default=10)
+    parser.add_argument("--historial-por-mascota", type=int, default=4)
+    parser.add_argument("--tratamientos-por-historial", type=int, default=1)
+    parser.add_argument("--controles-por-tratamiento", type=int, default=2)
+    parser.add_argument("--dias-historia", type=int, default=3 * 365)
+    parser.add_argument("--password", default="bench123", help="Contraseña de los usuarios vetN")
+    argumentos = parser.parse_args()
+    if argumentos.personas <= argumentos.veterinarios:
+        parser.error("--personas debe ser mayor que --veterinarios (el resto son dueños)")
+    return argumentos
+
+
+if __name__ == "__main__":
+    print(json.dumps(asyncio.run(sembrar(_argumentos())), indent=2))
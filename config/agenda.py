@@ -0,0 +1,83 @@
+from datetime import datetime, timedelta
+
+from fastapi import HTTPException
+
+from config.configuracion import config
+
+# Estados que ocupan el horario del veterinario; coinciden con el WHERE de la
+# restricción ex_cita_veterinario_horario en "base de datos.md".
+ESTADOS_ACTIVOS = ("pendiente", "confirmada", "en_atencion")
+
+CONSULTA_AGENDA = """
+    SELECT c.id, c.fecha_hora, c.fecha_hora + %s AS fecha_fin,
+           c.motivo, c.prioridad, c.estado, c.mascota_id, m.nombre AS mascota
+    FROM cita c
+    LEFT JOIN mascota m ON m.id = c.mascota_id
+    WHERE c.veterinario_id = %s
+      AND c.fecha_hora >= %s
+      AND c.fecha_hora < %s
+    ORDER BY c.fecha_hora
+"""
+
+# Cada turno candidato es una sonda por índice sobre (veterinario_id, fecha_hora):
+# el coste depende de los turnos pedidos, no del histórico de citas.
+CONSULTA_DISPONIBILIDAD = """
+    SELECT v.id AS veterinario_id, v.especialidad,
+           json_agg(s.inicio ORDER BY s.inicio) AS turnos
+    FROM veterinario v
+    CROSS JOIN generate_series(%(primero)s::timestamp, %(ultimo)s::timestamp, %(duracion)s) AS s(inicio)
+    WHERE v.activo
+      AND (%(veterinario_id)s::bigint IS NULL OR v.id = %(veterinario_id)s)
+      AND (%(especialidad)s::text IS NULL OR v.especialidad = %(especialidad)s)
+      AND s.inicio >= LOCALTIMESTAMP
+      AND EXTRACT(ISODOW FROM s.inicio)::int = ANY(%(dias)s)
+      AND s.inicio::time >= %(hora_inicio)s
+      AND s.inicio::time <= %(ultimo_turno)s
+      AND NOT EXISTS (
+          SELECT 1
+          FROM cita c
+          WHERE c.veterinario_id = v.id
+            AND c.estado = ANY(%(estados)s)
+            AND c.fecha_hora > s.inicio - %(duracion)s
+            AND c.fecha_hora < s.inicio + %(duracion)s
+      )
+    GROUP BY v.id, v.especialidad
+    ORDER BY v.id
+"""
+
+
+def duracion_turno() -> timedelta:
+    return timedelta(minutes=config.AGENDA_DURACION_MINUTOS)
+
+
+def validar_rango(desde: datetime, hasta: datetime):
+    if (desde.tzinfo is None) != (hasta.tzinfo is None):
+        raise HTTPException(status_code=400, detail="desde y hasta deben indicar zona horaria ambos o ninguno")
+    if hasta <= desde:
+        raise HTTPException(status_code=400, detail="hasta debe ser posterior a desde")
+    if hasta - desde > timedelta(days=config.AGENDA_MAX_DIAS):
+        raise HTTPException(status_code=400, detail=f"El rango no puede superar {config.AGENDA_MAX_DIAS} días")
+
+
+def primer_turno(desde: datetime) -> datetime:
+    """Alinea `desde` hacia arriba a la rejilla de turnos contada desde medianoche."""
+    medianoche = desde.replace(hour=0, minute=0, second=0, microsecond=0)
+    duracion = duracion_turno()
+    turnos = -((medianoche - desde) // duracion)
+    return medianoche + turnos * duracion
+
+
+def parametros_disponibilidad(desde: datetime, hasta: datetime, veterinario_id: int | None, especialidad: str | None) -> dict:
+    duracion = duracion_turno()
+    ultimo_turno = (datetime.combine(desde.date(), config.AGENDA_HORA_FIN) - duracion).time()
+    return {
+        "primero": primer_turno(desde),
+        "ultimo": hasta - duracion,
+        "duracion": duracion,
+        "veterinario_id": veterinario_id,
+        "especialidad": especialidad,
+        "dias": list(config.AGENDA_DIAS_LABORALES),
+        "hora_inicio": config.AGENDA_HORA_INICIO,
+        "ultimo_turno": ultimo_turno,
+        "estados": list(ESTADOS_ACTIVOS),
+    }
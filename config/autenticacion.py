@@ -0,0 +1,169 @@
+import asyncio
+import base64
+import hashlib
+import hmac
+import json
+import secrets
+import time
+
+from fastapi import Header, HTTPException
+
+from config.cache import CacheLRU
+from config.configuracion import config
+
+PREFIJO_SCRYPT = "scrypt"
+SCRYPT_N = 2**14
+SCRYPT_R = 8
+SCRYPT_P = 1
+SCRYPT_LONGITUD = 32
+
+
+def _b64(datos: bytes) -> str:
+    return base64.urlsafe_b64encode(datos).decode().rstrip("=")
+
+
+def _desde_b64(texto: str) -> bytes:
+    return base64.urlsafe_b64decode(texto + "=" * (-len(texto) % 4))
+
+
+def es_hash(valor: str) -> bool:
+    return valor.startswith(f"{PREFIJO_SCRYPT}$")
+
+
+def hashear_password(password: str) -> str:
+    sal = secrets.token_bytes(16)
+    derivada = hashlib.scrypt(
+        password.encode(), salt=sal, n=SCRYPT_N, r=SCRYPT_R, p=SCRYPT_P, dklen=SCRYPT_LONGITUD
+    )
+    return f"{PREFIJO_SCRYPT}${SCRYPT_N}${SCRYPT_R}${SCRYPT_P}${_b64(sal)}${_b64(derivada)}"
+
+
+def verificar_password(password: str, almacenado: str) -> bool:
+    """Compara en tiempo constante. Acepta también contraseñas antiguas guardadas en texto plano."""
+    if not es_hash(almacenado):
+        return hmac.compare_digest(password.encode(), almacenado.encode())
+    _, n, r, p, sal, esperado = almacenado.split("$")
+    esperado = _desde_b64(esperado)
+    derivada = hashlib.scrypt(
+        password.encode(), salt=_desde_b64(sal), n=int(n), r=int(r), p=int(p), dklen=len(esperado)
+    )
+    return hmac.compare_digest(derivada, esperado)
+
+
+# Se verifica contra este hash cuando el usuario no existe, para no delatarlo por el tiempo de respuesta.
+HASH_FICTICIO = hashear_password(secrets.token_urlsafe(16))
+
+
+async def hashear_password_async(password: str) -> str:
+    return await asyncio.to_thread(hashear_password, password)
+
+
+async def verificar_password_async(password: str, almacenado: str | None) -> bool:
+    if almacenado is None:
+        await asyncio.to_thread(verificar_password, password, HASH_FICTICIO)
+        return False
+    return await asyncio.to_thread(verificar_password, password, almacenado)
+
+
+async def preparar_password(valores: dict) -> dict:
+    """Hashea `password_hash` si llega en texto plano (el formulario envía la contraseña ahí)."""
+    password = valores.get("password_hash")
+    if password is not None and not es_hash(password):
+        valores["password_hash"] = await hashear_password_async(password)
+    return valores
+
+
+class LimitadorIntentos:
+    """Cuenta intentos por clave en una ventana deslizante; acotado en memoria por CacheLRU.
+
+    Los contadores son de cada proceso: con varios workers el límite efectivo puede llegar
+    a `maximo` por worker.
+    """
+
+    def __init__(self, maximo: int, ventana: float, tamano_maximo: int):
+        self.maximo = maximo
+        self.ventana = ventana
+        self._fallos = CacheLRU(tamano_maximo=tamano_maximo, ttl=ventana)
+
+    def bloqueado(self, clave: str) -> bool:
+        return (self._fallos.obtener(clave) or 0) >= self.maximo
+
+    def registrar_fallo(self, clave: str):
+        self._fallos.guardar(clave, (self._fallos.obtener(clave) or 0) + 1)
+
+    def descontar(self, clave: str):
+        fallos = self._fallos.obtener(clave) or 0
+        if fallos > 1:
+            self._fallos.guardar(clave, fallos - 1)
+        else:
+            self._fallos.invalidar(clave)
+
+    def reiniciar(self, clave: str):
+        self._fallos.invalidar(clave)
+
+
+limitador_usuario = LimitadorIntentos(
+    config.LOGIN_MAX_FALLOS_USUARIO, config.LOGIN_VENTANA, config.LOGIN_CACHE_TAMANO
+)
+limitador_ip = LimitadorIntentos(
+    config.LOGIN_MAX_FALLOS_IP, config.LOGIN_VENTANA, config.LOGIN_CACHE_TAMANO
+)
+
+
+def reservar_intento_login(username: str, ip: str):
+    """Comprueba el límite y cuenta el intento como fallido antes de verificar la contraseña.
+
+    Entre la comprobación y el registro no hay ningún await, así que una ráfaga concurrente
+    no puede colarse mientras las verificaciones anteriores siguen en scrypt.
+    """
+    if limitador_usuario.bloqueado(username) or limitador_ip.bloqueado(ip):
+        raise HTTPException(
+            status_code=429,
+            detail="Demasiados intentos fallidos, intente más tarde",
+            headers={"Retry-After": str(int(config.LOGIN_VENTANA))},
+        )
+    limitador_usuario.registrar_fallo(username)
+    limitador_ip.registrar_fallo(ip)
+
+
+def liberar_intento_login(username: str, ip: str):
+    """Devuelve el intento reservado cuando no llegó a verificarse (p. ej. error de base de datos)."""
+    limitador_usuario.descontar(username)
+    limitador_ip.descontar(ip)
+
+
+def registrar_exito_login(username: str, ip: str):
+    limitador_usuario.reiniciar(username)
+    limitador_ip.descontar(ip)
+
+
+def _firmar(datos: str) -> str:
+    return _b64(hmac.new(config.SESION_SECRETO.encode(), datos.encode(), hashlib.sha256).digest())
+
+
+def crear_token(usuario: dict) -> str:
+    """Token firmado con HMAC y caducidad corta; no requiere almacenamiento compartido entre workers."""
+    datos = _b64(json.dumps({**usuario, "exp": int(time.time() + config.SESION_TTL)}).encode())
+    return f"{datos}.{_firmar(datos)}"
+
+
+def leer_token(token: str) -> dict | None:
+    datos, _, firma = token.partition(".")
+    if not firma or not hmac.compare_digest(firma.encode(), _firmar(datos).encode()):
+        return None
+    try:
+        contenido = json.loads(_desde_b64(datos))
+    except ValueError:
+        return None
+    if contenido.get("exp", 0) < time.time():
+        return None
+    return contenido
+
+
+async def sesion_actual(authorization: str | None = Header(default=None)) -> dict:
+    """Dependencia: usuario del token `Authorization: Bearer <token>` sin consultar la base."""
+    esquema, _, token = (authorization or "").partition(" ")
+    sesion = leer_token(token) if esquema.lower() == "bearer" else None
+    if sesion is None:
+        raise HTTPException(status_code=401, detail="Sesión inválida o expirada")
+    return sesion
@@ -0,0 +1,59 @@
+import time
+from collections import OrderedDict
+from contextvars import ContextVar
+
+# MiddlewareVersiones fija un dict por petición GET; obtener() marca en él cada acierto.
+# Un cuerpo servido desde la caché de un worker puede ser anterior a la versión que leyó
+# el middleware (la notificación aún no llegó), así que no debe llevar ese ETag.
+aciertos_peticion: ContextVar[dict | None] = ContextVar("aciertos_peticion", default=None)
+
+
+class CacheLRU:
+    """Caché en memoria del proceso con expulsión LRU y caducidad por TTL."""
+
+    def __init__(self, tamano_maximo: int, ttl: float):
+        self.tamano_maximo = tamano_maximo
+        self.ttl = ttl
+        self.aciertos = 0
+        self.fallos = 0
+        self._datos: OrderedDict = OrderedDict()
+        self._generacion = 0
+
+    def __len__(self) -> int:
+        return len(self._datos)
+
+    def generacion(self) -> int:
+        """Se toma antes de consultar la base y se pasa a `guardar` para no cachear datos
+        leídos antes de una invalidación concurrente."""
+        return self._generacion
+
+    def obtener(self, clave):
+        entrada = self._datos.get(clave)
+        if entrada is None or entrada[0] < time.monotonic():
+            if entrada is not None:
+                del self._datos[clave]
+            self.fallos += 1
+            return None
+        self._datos.move_to_end(clave)
+        self.aciertos += 1
+        marca = aciertos_peticion.get()
+        if marca is not None:
+            marca["acierto"] = True
+        return entrada[1]
+
+    def guardar(self, clave, valor, generacion: int | None = None):
+        if generacion is not None and generacion != self._generacion:
+            return
+        self._datos[clave] = (time.monotonic() + self.ttl, valor)
+        self._datos.move_to_end(clave)
+        while len(self._datos) > self.tamano_maximo:
+            self._datos.popitem(last=False)
+
+    def invalidar(self, *claves):
+        self._generacion += 1
+        for clave in claves:
+            self._datos.pop(clave, None)
+
+    def limpiar(self):
+        self._generacion += 1
+        self._datos.clear()
@@ -0,0 +1,81 @@
+from config.cache import CacheLRU
+from config.configuracion import config
+from config.metricas import Indicador
+from config.notificaciones import suscribir
+
+CANAL_ENTIDADES = "entidad_cambiada"
+
+_caches: dict[str, "CacheEntidad"] = {}
+
+
+class CacheEntidad:
+    """Caché read-through por id para una tabla de consulta frecuente.
+
+    Los handlers de escritura llaman a `notificar` antes del commit (pg_notify es
+    transaccional) y a `invalidar` después; el resto de workers invalida al recibir
+    la notificación en CANAL_ENTIDADES.
+    """
+
+    def __init__(self, tabla: str):
+        self.tabla = tabla
+        self.cache = CacheLRU(
+            tamano_maximo=config.CACHE_ENTIDADES_TAMANO,
+            ttl=config.CACHE_ENTIDADES_TTL,
+        )
+        _caches[tabla] = self
+
+    async def obtener(self, cursor, consulta: str, id_entidad: int) -> dict | None:
+        fila = self.cache.obtener(id_entidad)
+        if fila is not None:
+            return fila
+        generacion = self.cache.generacion()
+        await cursor.execute(consulta, (id_entidad,))
+        fila = await cursor.fetchone()
+        if fila is not None:
+            self.cache.guardar(id_entidad, fila, generacion)
+        return fila
+
+    async def notificar(self, cursor, id_entidad: int):
+        await cursor.execute("SELECT pg_notify(%s, %s)", (CANAL_ENTIDADES, f"{self.tabla}:{id_entidad}"))
+
+    def invalidar(self, id_entidad: int):
+        self.cache.invalidar(id_entidad)
+
+
+async def _al_cambiar_entidad(payload: str | None):
+    if payload is None:
+        for cache_entidad in _caches.values():
+            cache_entidad.cache.limpiar()
+        return
+    tabla, _, id_entidad = payload.partition(":")
+    cache_entidad = _caches.get(tabla)
+    if cache_entidad is not None and id_entidad.isdigit():
+        cache_entidad.invalidar(int(id_entidad))
+
+
+suscribir(CANAL_ENTIDADES, _al_cambiar_entidad)
+
+cache_personas = CacheEntidad("persona")
+cache_veterinarios = CacheEntidad("veterinario")
+cache_mascotas = CacheEntidad("mascota")
+
+Indicador(
+    "veterinaria_cache_entidades_aciertos_total",
+    "Lecturas por id servidas desde la caché de entidades",
+    lambda: {(tabla,): entidad.cache.aciertos for tabla, entidad in _caches.items()},
+    etiquetas=("tabla",),
+    tipo="counter",
+)
+Indicador(
+    "veterinaria_cache_entidades_fallos_total",
+    "Lecturas por id que fueron a la base de datos",
+    lambda: {(tabla,): entidad.cache.fallos for tabla, entidad in _caches.items()},
+    etiquetas=("tabla",),
+    tipo="counter",
+)
+Indicador(
+    "veterinaria_cache_entidades_tamano",
+    "Entradas actualmente en la caché de entidades",
+    lambda: {(tabla,): len(entidad.cache) for tabla, entidad in _caches.items()},
+    etiquetas=("tabla",),
+)
@@ -0,0 +1,54 @@
+import re
+from functools import lru_cache
+
+from fastapi import HTTPException, Query
+
+_LISTA_SELECT = re.compile(r"^\s*SELECT\s+(.+?)\s+FROM\s", re.IGNORECASE | re.DOTALL)
+
+
+@lru_cache(maxsize=256)
+def columnas_de(consulta: str) -> tuple[str, ...]:
+    """Columnas de un `SELECT col, col, ... FROM tabla` como los de los routers (sin alias ni expresiones)."""
+    return tuple(columna.strip() for columna in _LISTA_SELECT.match(consulta).group(1).split(","))
+
+
+class Campos:
+    """?fields=nombre,especie: columnas que devuelve un listado o detalle; id va siempre."""
+
+    def __init__(self, fields: str | None = Query(default=None, description="Columnas separadas por comas")):
+        self.campos = tuple(dict.fromkeys(campo.strip() for campo in (fields or "").split(",") if campo.strip()))
+
+    def validar(self, permitidas: tuple[str, ...]):
+        desconocidas = [campo for campo in self.campos if campo not in permitidas]
+        if desconocidas:
+            raise HTTPException(
+                status_code=400,
+                detail=f"fields no válido: {', '.join(desconocidas)} (opciones: {', '.join(permitidas)})",
+            )
+
+    def seleccion(self, permitidas: tuple[str, ...]) -> tuple[str, ...]:
+        """id y los campos pedidos en el orden de `permitidas`, no en el del cliente: así
+        ?fields=a,b y ?fields=b,a generan la misma consulta (y sentencia preparada)."""
+        return tuple(dict.fromkeys(("id", *(columna for columna in permitidas if columna in self.campos))))
+
+    def recortar(self, fila: dict) -> dict:
+        """Para filas que ya vienen completas de una caché."""
+        if not self.campos:
+            return fila
+        permitidas = tuple(fila)
+        self.validar(permitidas)
+        return {campo: fila[campo] for campo in self.seleccion(permitidas)}
+
+
+def proyectar(consulta: str, campos: Campos, permitidas: tuple[str, ...] | None = None) -> str:
+    """Reemplaza la lista del primer SELECT de `consulta` por las columnas de `fields`.
+
+    `permitidas` por defecto son las columnas de la propia consulta; con `expandir` se pasan
+    las de la consulta base más las relaciones, porque el SELECT exterior es `SELECT *`.
+    Los filtros y el ORDER BY que se añaden después pueden seguir usando columnas no pedidas.
+    """
+    if not campos.campos:
+        return consulta
+    permitidas = permitidas or columnas_de(consulta)
+    campos.validar(permitidas)
+    return _LISTA_SELECT.sub(f"SELECT {', '.join(campos.seleccion(permitidas))} FROM ", consulta, count=1)
@@ -0,0 +1,89 @@
+import json
+
+import psycopg
+from fastapi import HTTPException, Request
+from pydantic import BaseModel, ValidationError
+
+from config.identificadores import asignador
+
+
+async def leer_filas(request: Request) -> list:
+    """Acepta un arreglo JSON o un flujo NDJSON (Content-Type: application/x-ndjson)."""
+    if not request.headers.get("content-type", "").startswith("application/x-ndjson"):
+        try:
+            filas = await request.json()
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Cuerpo JSON inválido")
+        if not isinstance(filas, list):
+            raise HTTPException(status_code=400, detail="Se esperaba un arreglo de filas")
+        return filas
+
+    filas = []
+    pendiente = b""
+    numero_linea = 0
+    async for trozo in request.stream():
+        pendiente += trozo
+        *lineas, pendiente = pendiente.split(b"\n")
+        for linea in lineas:
+            numero_linea += 1
+            if linea.strip():
+                filas.append(_leer_linea(linea, numero_linea))
+    if pendiente.strip():
+        filas.append(_leer_linea(pendiente, numero_linea + 1))
+    return filas
+
+
+def _leer_linea(linea: bytes, numero_linea: int):
+    try:
+        return json.loads(linea)
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Línea NDJSON inválida: {numero_linea}")
+
+
+async def insertar_masivo(conn, tabla: str, modelo: type[BaseModel], filas: list) -> dict:
+    """Valida cada fila con `modelo` y carga las válidas con COPY en una sola transacción.
+
+    Si COPY falla (por ejemplo, una clave foránea inexistente) se repite la carga fila por
+    fila con savepoints para informar qué filas fallaron sin descartar las demás.
+    """
+    resultados = []
+    validas = []
+    for indice, fila in enumerate(filas):
+        try:
+            validas.append((indice, modelo.model_validate(fila).model_dump()))
+        except ValidationError as e:
+            resultados.append({"fila": indice, "error": e.errors(include_url=False, include_context=False)})
+
+    if validas:
+        columnas = ("id", *modelo.model_fields)
+        async with conn.cursor() as cursor:
+            ids = await asignador.reservar(cursor, tabla, len(validas))
+            await conn.commit()
+            try:
+                async with conn.transaction():
+                    async with cursor.copy(f"COPY {tabla} ({', '.join(columnas)}) FROM STDIN") as copia:
+                        for nuevo_id, (_, valores) in zip(ids, validas):
+                            await copia.write_row((nuevo_id, *valores.values()))
+                resultados.extend({"fila": indice, "id": nuevo_id} for nuevo_id, (indice, _) in zip(ids, validas))
+            except psycopg.Error:
+                consulta = (
+                    f"INSERT INTO {tabla} ({', '.join(columnas)}) "
+                    f"VALUES ({', '.join(['%s'] * len(columnas))})"
+                )
+                async with conn.transaction():
+                    for nuevo_id, (indice, valores) in zip(ids, validas):
+                        try:
+                            async with conn.transaction():
+                                await cursor.execute(consulta, (nuevo_id, *valores.values()))
+                            resultados.append({"fila": indice, "id": nuevo_id})
+                        except psycopg.Error as e:
+                            resultados.append({"fila": indice, "error": str(e).strip()})
+
+    resultados.sort(key=lambda resultado: resultado["fila"])
+    fallidos = sum(1 for resultado in resultados if "error" in resultado)
+    return {
+        "mensaje": "Carga masiva procesada",
+        "insertados": len(resultados) - fallidos,
+        "fallidos": fallidos,
+        "resultados": resultados,
+    }
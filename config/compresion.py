@@ -0,0 +1,162 @@
+import zlib
+
+from starlette.datastructures import Headers, MutableHeaders
+
+from config.configuracion import config
+from config.metricas import Contador
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    from compression import zstd
+except ImportError:
+    zstd = None
+
+TIPOS_COMPRIMIBLES = ("application/json", "application/x-ndjson", "text/")
+
+bytes_compresion = Contador(
+    "veterinaria_compresion_bytes_total",
+    "Bytes de respuesta antes y después de comprimir",
+    etiquetas=("codificacion", "etapa"),
+)
+
+
+class _Gzip:
+    def __init__(self):
+        self._compresor = zlib.compressobj(config.COMPRESION_NIVEL_GZIP, zlib.DEFLATED, 31)
+
+    def comprimir(self, datos: bytes) -> bytes:
+        return self._compresor.compress(datos) + self._compresor.flush(zlib.Z_SYNC_FLUSH)
+
+    def terminar(self, datos: bytes) -> bytes:
+        return self._compresor.compress(datos) + self._compresor.flush()
+
+
+class _Brotli:
+    def __init__(self):
+        self._compresor = brotli.Compressor(quality=config.COMPRESION_NIVEL_BROTLI)
+
+    def comprimir(self, datos: bytes) -> bytes:
+        return self._compresor.process(datos) + self._compresor.flush()
+
+    def terminar(self, datos: bytes) -> bytes:
+        return self._compresor.process(datos) + self._compresor.finish()
+
+
+class _Zstd:
+    def __init__(self):
+        self._compresor = zstd.ZstdCompressor(level=config.COMPRESION_NIVEL_ZSTD)
+
+    def comprimir(self, datos: bytes) -> bytes:
+        return self._compresor.compress(datos, mode=zstd.ZstdCompressor.FLUSH_BLOCK)
+
+    def terminar(self, datos: bytes) -> bytes:
+        return self._compresor.compress(datos, mode=zstd.ZstdCompressor.FLUSH_FRAME)
+
+
+# En orden de preferencia del servidor ante codificaciones con el mismo q.
+CODIFICACIONES = {
+    nombre: fabrica
+    for nombre, fabrica, disponible in (
+        ("zstd", _Zstd, zstd is not None),
+        ("br", _Brotli, brotli is not None),
+        ("gzip", _Gzip, True),
+    )
+    if disponible
+}
+
+
+def elegir_codificacion(accept_encoding: str) -> str | None:
+    """La codificación disponible con mayor q en Accept-Encoding (q=0 la excluye)."""
+    calidades = {}
+    for parte in accept_encoding.split(","):
+        nombre, _, parametros = parte.strip().partition(";")
+        calidad = 1.0
+        parametro = parametros.strip()
+        if parametro.startswith("q="):
+            try:
+                calidad = float(parametro[2:])
+            except ValueError:
+                calidad = 0.0
+        calidades[nombre.strip().lower()] = calidad
+    comodin = calidades.get("*", 0.0)
+    candidatas = [(calidades.get(nombre, comodin), nombre) for nombre in CODIFICACIONES]
+    calidad, nombre = max(candidatas, key=lambda candidata: candidata[0], default=(0.0, None))
+    return nombre if calidad > 0 else None
+
+
+class MiddlewareCompresion:
+    """Comprime con zstd, brotli o gzip según Accept-Encoding.
+
+    Las respuestas de un solo bloque se comprimen si superan COMPRESION_MINIMO bytes;
+    las de streaming (exportaciones) se comprimen bloque a bloque con flush, para que el
+    cliente siga recibiendo filas mientras se generan. Es ASGI puro para no acumular
+    esas respuestas en memoria.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] == "HEAD":
+            await self.app(scope, receive, send)
+            return
+        codificacion = elegir_codificacion(Headers(scope=scope).get("accept-encoding", ""))
+        if codificacion is None:
+            await self.app(scope, receive, send)
+            return
+
+        inicio = None
+        compresor = None
+
+        async def enviar(mensaje):
+            nonlocal inicio, compresor
+            if mensaje["type"] == "http.response.start":
+                inicio = mensaje
+                return
+            if mensaje["type"] != "http.response.body":
+                await send(mensaje)
+                return
+
+            cuerpo = mensaje.get("body", b"")
+            hay_mas = mensaje.get("more_body", False)
+            if inicio is not None:
+                cabeceras = MutableHeaders(raw=list(inicio["headers"]))
+                comprimible = (
+                    "content-encoding" not in cabeceras
+                    and cabeceras.get("content-type", "").startswith(TIPOS_COMPRIMIBLES)
+                )
+                if comprimible:
+                    cabeceras.add_vary_header("Accept-Encoding")
+                if comprimible and (hay_mas or len(cuerpo) >= config.COMPRESION_MINIMO):
+                    compresor = CODIFICACIONES[codificacion]()
+                    cabeceras["Content-Encoding"] = codificacion
+                    del cabeceras["content-length"]
+                    if not hay_mas:
+                        cuerpo = _comprimir(compresor, codificacion, cuerpo, final=True)
+                        cabeceras["Content-Length"] = str(len(cuerpo))
+                        compresor = None
+                        await send({**inicio, "headers": cabeceras.raw})
+                        inicio = None
+                        await send({"type": "http.response.body", "body": cuerpo})
+                        return
+                await send({**inicio, "headers": cabeceras.raw})
+                inicio = None
+
+            if compresor is None:
+                await send(mensaje)
+                return
+            cuerpo = _comprimir(compresor, codificacion, cuerpo, final=not hay_mas)
+            await send({"type": "http.response.body", "body": cuerpo, "more_body": hay_mas})
+
+        await self.app(scope, receive, enviar)
+
+
+def _comprimir(compresor, codificacion: str, datos: bytes, final: bool) -> bytes:
+    comprimido = compresor.terminar(datos) if final else compresor.comprimir(datos)
+    bytes_compresion.incrementar(codificacion, "original", cantidad=len(datos))
+    bytes_compresion.incrementar(codificacion, "comprimido", cantidad=len(comprimido))
+    return comprimido
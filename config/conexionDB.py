@@ -1,8 +1,16 @@
+import asyncio
+import math
+import time
 from contextlib import asynccontextmanager
-from fastapi import FastAPI
-from psycopg_pool import AsyncConnectionPool
+from fastapi import FastAPI, HTTPException, Request
+from psycopg_pool import AsyncConnectionPool, PoolTimeout
 from psycopg.rows import dict_row
+from starlette.middleware.base import BaseHTTPMiddleware
 from config.configuracion import config
+from config.esquema import esquema
+from config.instrumentacion import CursorMedido, registrar_espera_pool
+from config.metricas import Contador, Histograma, Indicador
+from config.notificaciones import escuchar, suscribir
 
 DB_config = {
     "dbname": config.DB_NAME,
@@ -17,22 +25,228 @@ DB_URL = (
     f"@{config.DB_HOST}:{config.DB_PORT}/{config.DB_NAME}"
 )
 
-pool = AsyncConnectionPool(conninfo=DB_URL, open=False)
+DB_URL_LECTURA = (
+    f"postgresql://{config.DB_USER}:{config.DB_PASSWORD}"
+    f"@{config.DB_LECTURA_HOST}:{config.DB_LECTURA_PORT or config.DB_PORT}/{config.DB_NAME}"
+    if config.DB_LECTURA_HOST
+    else None
+)
+
+
+async def configurar_conexion(conn):
+    """Cada conexión prepara (PREPARE) un texto SQL tras DB_PREPARE_THRESHOLD ejecuciones.
+
+    El texto no es estático: fields=, expand= y los filtros de los listados generan variantes
+    distintas. Con el umbral por defecto solo se preparan las que se repiten en la conexión;
+    las puntuales no pagan el PREPARE ni desplazan a las frecuentes de las DB_PREPARED_MAX.
+    """
+    conn.prepare_threshold = config.DB_PREPARE_THRESHOLD
+    conn.prepared_max = config.DB_PREPARED_MAX
+    if config.DB_INSTRUMENTACION:
+        conn.cursor_factory = CursorMedido
+
+
+pool = AsyncConnectionPool(
+    conninfo=DB_URL,
+    configure=configurar_conexion,
+    min_size=config.DB_POOL_MIN_SIZE,
+    max_size=config.DB_POOL_MAX_SIZE,
+    max_idle=config.DB_POOL_MAX_IDLE,
+    max_lifetime=config.DB_POOL_MAX_LIFETIME,
+    timeout=config.DB_POOL_TIMEOUT,
+    check=AsyncConnectionPool.check_connection if config.DB_POOL_CHECK else None,
+    open=False,
+)
+
+# Pool opcional contra una réplica de solo lectura; sin DB_LECTURA_HOST todo va a `pool`.
+pool_lectura = (
+    AsyncConnectionPool(
+        conninfo=DB_URL_LECTURA,
+        configure=configurar_conexion,
+        min_size=config.DB_LECTURA_POOL_MIN_SIZE,
+        max_size=config.DB_LECTURA_POOL_MAX_SIZE,
+        max_idle=config.DB_POOL_MAX_IDLE,
+        max_lifetime=config.DB_POOL_MAX_LIFETIME,
+        timeout=config.DB_POOL_TIMEOUT,
+        check=AsyncConnectionPool.check_connection if config.DB_POOL_CHECK else None,
+        open=False,
+    )
+    if DB_URL_LECTURA
+    else None
+)
+
+
+def _pools() -> dict:
+    pools = {"primaria": pool}
+    if pool_lectura is not None:
+        pools["lectura"] = pool_lectura
+    return pools
+
+
+def _por_pool(funcion):
+    return lambda: {(nombre,): funcion(destino) for nombre, destino in _pools().items()}
+
+
+espera_pool = Histograma(
+    "veterinaria_pool_espera_segundos",
+    "Tiempo de espera para obtener una conexion del pool",
+    etiquetas=("pool",),
+)
+errores_pool = Contador(
+    "veterinaria_pool_errores_total",
+    "Fallos al obtener una conexion del pool",
+    etiquetas=("pool", "tipo"),
+)
+Indicador(
+    "veterinaria_pool_tamano",
+    "Conexiones abiertas por el pool",
+    _por_pool(lambda destino: destino.get_stats().get("pool_size", 0)),
+    etiquetas=("pool",),
+)
+Indicador(
+    "veterinaria_pool_en_uso",
+    "Conexiones prestadas a peticiones",
+    _por_pool(lambda destino: destino.get_stats().get("pool_size", 0) - destino.get_stats().get("pool_available", 0)),
+    etiquetas=("pool",),
+)
+Indicador(
+    "veterinaria_pool_esperando",
+    "Peticiones en cola esperando conexion",
+    _por_pool(lambda destino: destino.get_stats().get("requests_waiting", 0)),
+    etiquetas=("pool",),
+)
+Indicador(
+    "veterinaria_pool_maximo",
+    "Tamano maximo configurado del pool",
+    _por_pool(lambda destino: destino.max_size),
+    etiquetas=("pool",),
+)
+Indicador(
+    "veterinaria_pool_conexiones_fallidas",
+    "Intentos fallidos de abrir conexiones desde el arranque",
+    _por_pool(lambda destino: destino.get_stats().get("connections_errors", 0)),
+    etiquetas=("pool",),
+)
+Indicador(
+    "veterinaria_pool_conexiones_perdidas",
+    "Conexiones descartadas por el check del pool desde el arranque",
+    _por_pool(lambda destino: destino.get_stats().get("connections_lost", 0)),
+    etiquetas=("pool",),
+)
+
+
+@asynccontextmanager
+async def conexion_medida(lectura: bool = False):
+    """pool.connection() registrando el tiempo de espera y los timeouts en las métricas.
+
+    Con `lectura=True` usa la réplica si está configurada.
+    """
+    nombre = "lectura" if lectura and pool_lectura is not None else "primaria"
+    destino = _pools()[nombre]
+    inicio = time.perf_counter()
+    try:
+        async with destino.connection() as conn:
+            espera = time.perf_counter() - inicio
+            espera_pool.observar(espera, nombre)
+            registrar_espera_pool(espera)
+            yield conn
+    except PoolTimeout:
+        espera_pool.observar(time.perf_counter() - inicio, nombre)
+        errores_pool.incrementar(nombre, "timeout")
+        raise
 
 
 async def get_conexion():
-    async with pool.connection() as conn:
-        conn.row_factory = dict_row
-        yield conn
+    try:
+        async with conexion_medida() as conn:
+            conn.row_factory = dict_row
+            yield conn
+    except PoolTimeout:
+        raise HTTPException(status_code=503, detail="Base de datos saturada, intente nuevamente")
+
+
+COOKIE_ESCRITURA = "veterinaria_escritura"
+CABECERA_PRIMARIA = "x-leer-primaria"
+METODOS_ESCRITURA = ("POST", "PUT", "PATCH", "DELETE")
+
+
+def leer_de_replica(request: Request) -> bool:
+    """Lectura-tras-escritura: la sesión que acaba de escribir (cookie con la hora de su
+    última escritura) o que lo pide con `X-Leer-Primaria` lee de la primaria."""
+    if pool_lectura is None or request.headers.get(CABECERA_PRIMARIA):
+        return False
+    try:
+        ultima_escritura = float(request.cookies.get(COOKIE_ESCRITURA, 0))
+    except ValueError:
+        return True
+    return time.time() - ultima_escritura > config.DB_LECTURA_TRAS_ESCRITURA
+
+
+async def get_conexion_lectura(request: Request):
+    """Como get_conexion, pero contra la réplica cuando la petición lo permite.
+
+    La réplica puede ir algo por detrás de la primaria; los endpoints que alimentan
+    cachés en memoria siguen usando get_conexion para no guardar datos atrasados.
+    """
+    try:
+        async with conexion_medida(lectura=leer_de_replica(request)) as conn:
+            conn.row_factory = dict_row
+            yield conn
+    except PoolTimeout:
+        raise HTTPException(status_code=503, detail="Base de datos saturada, intente nuevamente")
+
+
+class MiddlewareLecturaTrasEscritura(BaseHTTPMiddleware):
+    """Marca con una cookie de vida corta a quien escribió, para que sus siguientes
+    lecturas vayan a la primaria mientras la réplica se pone al día."""
+
+    async def dispatch(self, request, call_next):
+        response = await call_next(request)
+        if pool_lectura is not None and request.method in METODOS_ESCRITURA and response.status_code < 400:
+            response.set_cookie(
+                COOKIE_ESCRITURA,
+                f"{time.time():.3f}",
+                max_age=max(1, math.ceil(config.DB_LECTURA_TRAS_ESCRITURA)),
+                httponly=True,
+                samesite="lax",
+            )
+        return response
+
+
+async def refrescar_esquema(_payload: str | None = None):
+    async with conexion_medida() as conn:
+        await esquema.cargar(conn)
+
+
+_tareas_de_fondo: list = []
+
+
+def registrar_tarea(funcion):
+    """Registra una corrutina `funcion()` que corre mientras la app está levantada y se cancela al cerrar."""
+    _tareas_de_fondo.append(funcion)
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    tareas = []
     try:
         await pool.open()
         print("Pool de conexiones abierto exitosamente")
+        if pool_lectura is not None:
+            await pool_lectura.open()
+            print("Pool de lectura (réplica) abierto exitosamente")
+        async with pool.connection() as conn:
+            await esquema.cargar(conn)
+        suscribir("esquema_cambiado", refrescar_esquema)
+        tareas.append(asyncio.create_task(escuchar(DB_URL)))
+        tareas.extend(asyncio.create_task(funcion()) for funcion in _tareas_de_fondo)
         yield
     finally:
+        for tarea in tareas:
+            tarea.cancel()
+        await asyncio.gather(*tareas, return_exceptions=True)
+        if pool_lectura is not None:
+            await pool_lectura.close()
         await pool.close()
         print("Pool de conexiones cerrado")
 app = FastAPI(lifespan=lifespan)
@@ -1,3 +1,6 @@
+import secrets
+from datetime import time
+
 from pydantic_settings import BaseSettings
 
 
@@ -7,6 +10,69 @@ class Constantes(BaseSettings):
     DB_PASSWORD: str
     DB_HOST: str
     DB_PORT: int
+    DB_POOL_MIN_SIZE: int = 4
+    DB_POOL_MAX_SIZE: int = 20
+    DB_POOL_MAX_IDLE: float = 600
+    DB_POOL_MAX_LIFETIME: float = 3600
+    DB_POOL_TIMEOUT: float = 5
+    DB_POOL_CHECK: bool = True
+    # Ejecuciones de un mismo texto SQL antes de prepararlo por conexión (5 es el valor de psycopg)
+    DB_PREPARE_THRESHOLD: int | None = 5
+    DB_PREPARED_MAX: int = 256
+    DB_INSTRUMENTACION: bool = True
+    # Recorre cada celda del resultado para estimar su tamaño; útil al perfilar, caro siempre
+    DB_MEDIR_BYTES: bool = False
+    # Server-Timing incluye el texto de las consultas: solo para desarrollo
+    DB_SERVER_TIMING: bool = False
+    DB_CONSULTA_LENTA_MS: float = 200
+    # Réplica de solo lectura (streaming replication); sin host, las lecturas van a la primaria
+    DB_LECTURA_HOST: str | None = None
+    DB_LECTURA_PORT: int | None = None
+    DB_LECTURA_POOL_MIN_SIZE: int = 4
+    DB_LECTURA_POOL_MAX_SIZE: int = 20
+    # Segundos que una sesión sigue leyendo de la primaria después de escribir
+    DB_LECTURA_TRAS_ESCRITURA: float = 5
+    # Conexiones que puede abrir la API entre todos los workers (python -m servidor);
+    # sin valor, cada worker usa DB_POOL_MAX_SIZE / DB_LECTURA_POOL_MAX_SIZE tal cual
+    DB_CONEXIONES_TOTALES: int | None = None
+    DB_LECTURA_CONEXIONES_TOTALES: int | None = None
+    SERVIDOR_HOST: str = "0.0.0.0"
+    SERVIDOR_PUERTO: int = 8000
+    # 0 = un worker por CPU disponible
+    SERVIDOR_WORKERS: int = 0
+    SERVIDOR_REUSEPORT: bool = False
+    SERVIDOR_BACKLOG: int = 2048
+    # Segundos que se esperan las peticiones en curso al recibir SIGTERM
+    SERVIDOR_DRENAJE: float = 30
+    # Debe coincidir con el intervalo de la restricción ex_cita_veterinario_horario
+    AGENDA_DURACION_MINUTOS: int = 30
+    AGENDA_HORA_INICIO: time = time(8, 0)
+    AGENDA_HORA_FIN: time = time(18, 0)
+    AGENDA_DIAS_LABORALES: list[int] = [1, 2, 3, 4, 5, 6]
+    AGENDA_MAX_DIAS: int = 31
+    ID_ESTRATEGIA: str = "secuencia"
+    ID_TAMANO_BLOQUE: int = 50
+    CACHE_REPORTES_TAMANO: int = 1000
+    CACHE_REPORTES_TTL: float = 300
+    REPORTES_WORKERS: int = 2
+    REPORTES_POLL: float = 5
+    REPORTES_JOB_TIMEOUT: float = 900
+    REPORTES_MAX_INTENTOS: int = 3
+    REPORTES_JOB_RETENCION: float = 86400
+    CACHE_ENTIDADES_TAMANO: int = 5000
+    CACHE_ENTIDADES_TTL: float = 60
+    LOGIN_MAX_FALLOS_USUARIO: int = 5
+    LOGIN_MAX_FALLOS_IP: int = 50
+    LOGIN_VENTANA: float = 300
+    LOGIN_CACHE_TAMANO: int = 10000
+    # Respuestas de un solo bloque más chicas que esto se envían sin comprimir
+    COMPRESION_MINIMO: int = 1024
+    COMPRESION_NIVEL_GZIP: int = 5
+    COMPRESION_NIVEL_BROTLI: int = 4
+    COMPRESION_NIVEL_ZSTD: int = 3
+    SESION_TTL: float = 900
+    # Fijarlo en .env cuando hay varios workers: con el valor aleatorio cada proceso firma distinto.
+    SESION_SECRETO: str = secrets.token_urlsafe(32)
 
     class Config:
         env_file = ".env"
@@ -0,0 +1,48 @@
+from fastapi import HTTPException
+from pydantic import BaseModel, create_model
+
+
+def modelo_parcial(modelo: type[BaseModel]) -> type[BaseModel]:
+    """Copia de `modelo` con todos los campos opcionales, para los endpoints PATCH."""
+    campos = {nombre: (campo.annotation | None, None) for nombre, campo in modelo.model_fields.items()}
+    return create_model(f"{modelo.__name__}Parcial", **campos)
+
+
+async def actualizar_por_id(
+    cursor,
+    tabla: str,
+    id_registro: int,
+    valores: dict,
+    no_encontrado: str,
+    retorno: str = "t.id",
+):
+    """UPDATE ... RETURNING en un solo viaje; si no hay fila, responde 404.
+
+    En `retorno` se puede usar el alias `anterior` para leer los valores previos a la
+    actualización (por ejemplo, la mascota anterior de una cita para invalidar su caché).
+    """
+    if not valores:
+        raise HTTPException(status_code=400, detail="No se enviaron campos para actualizar")
+
+    asignaciones = ", ".join(f"{columna} = %s" for columna in valores)
+    desde = ""
+    condicion = "t.id = %s"
+    if "anterior." in retorno:
+        desde = f"FROM {tabla} AS anterior"
+        condicion += " AND anterior.id = t.id"
+    await cursor.execute(
+        f"UPDATE {tabla} AS t SET {asignaciones} {desde} WHERE {condicion} RETURNING {retorno}",
+        (*valores.values(), id_registro),
+    )
+    fila = await cursor.fetchone()
+    if not fila:
+        raise HTTPException(status_code=404, detail=no_encontrado)
+    return fila
+
+
+async def eliminar_por_id(cursor, tabla: str, id_registro: int, no_encontrado: str, retorno: str = "t.id"):
+    await cursor.execute(f"DELETE FROM {tabla} AS t WHERE t.id = %s RETURNING {retorno}", (id_registro,))
+    fila = await cursor.fetchone()
+    if not fila:
+        raise HTTPException(status_code=404, detail=no_encontrado)
+    return fila
@@ -0,0 +1,51 @@
+from psycopg.rows import tuple_row
+
+
+class RegistroEsquema:
+    """Columnas e índices del esquema public, leídos del catálogo una sola vez.
+
+    Se carga en el arranque y solo se vuelve a leer a pedido o cuando llega una
+    notificación de DDL, para que ningún endpoint consulte el catálogo en cada petición.
+    """
+
+    def __init__(self):
+        self.columnas: dict[str, list[str]] = {}
+        self.indices: dict[str, list[str]] = {}
+
+    async def cargar(self, conn):
+        columnas: dict[str, list[str]] = {}
+        indices: dict[str, list[str]] = {}
+        async with conn.cursor(row_factory=tuple_row) as cursor:
+            await cursor.execute(
+                """
+                SELECT table_name, column_name
+                FROM information_schema.columns
+                WHERE table_schema = 'public'
+                ORDER BY table_name, ordinal_position
+                """
+            )
+            for tabla, columna in await cursor.fetchall():
+                columnas.setdefault(tabla, []).append(columna)
+
+            await cursor.execute(
+                """
+                SELECT tablename, indexname
+                FROM pg_indexes
+                WHERE schemaname = 'public'
+                ORDER BY tablename, indexname
+                """
+            )
+            for tabla, indice in await cursor.fetchall():
+                indices.setdefault(tabla, []).append(indice)
+        await conn.commit()
+        self.columnas = columnas
+        self.indices = indices
+
+    def tiene_columna(self, tabla: str, columna: str) -> bool:
+        return columna in self.columnas.get(tabla, ())
+
+    def primera_columna(self, tabla: str, candidatas: tuple[str, ...]) -> str | None:
+        return next((columna for columna in candidatas if self.tiene_columna(tabla, columna)), None)
+
+
+esquema = RegistroEsquema()
@@ -0,0 +1,101 @@
+from fastapi import HTTPException, Query
+
+# Cada relación: joins que necesita sobre la fila base, relaciones de las que depende
+# y la proyección JSON que se añade como columna con el nombre de la relación.
+RELACIONES = {
+    "mascota": {
+        "requiere": (),
+        "joins": "LEFT JOIN mascota m ON m.id = base.mascota_id",
+        "proyeccion": """
+            CASE WHEN m.id IS NULL THEN NULL ELSE json_build_object(
+                'id', m.id,
+                'nombre', m.nombre,
+                'especie', m.especie,
+                'edad', m.edad,
+                'sexo', m.sexo,
+                'dueno_id', m.dueno_id
+            ) END
+        """,
+    },
+    "veterinario": {
+        "requiere": (),
+        "joins": """
+            LEFT JOIN veterinario v ON v.id = base.veterinario_id
+            LEFT JOIN persona pv ON pv.id = v.persona_id
+        """,
+        "proyeccion": """
+            CASE WHEN v.id IS NULL THEN NULL ELSE json_build_object(
+                'id', v.id,
+                'nombre_completo', TRIM(CONCAT(TRIM(pv.nombres), ' ', TRIM(pv.apellidos))),
+                'especialidad', v.especialidad,
+                'licencia', v.licencia
+            ) END
+        """,
+    },
+    "dueno": {
+        "requiere": ("mascota",),
+        "joins": """
+            LEFT JOIN dueno d ON d.id = m.dueno_id
+            LEFT JOIN persona pd ON pd.id = d.persona_id
+        """,
+        "proyeccion": """
+            CASE WHEN d.id IS NULL THEN NULL ELSE json_build_object(
+                'id', d.id,
+                'persona_id', d.persona_id,
+                'nombre_completo', TRIM(CONCAT(TRIM(pd.nombres), ' ', TRIM(pd.apellidos))),
+                'telefono', pd.telefono,
+                'email', pd.email
+            ) END
+        """,
+    },
+}
+
+# Tablas que leen las relaciones expandidas; las usa el ETag de versiones.
+TABLAS_POR_RELACION = {
+    "mascota": ("mascota",),
+    "veterinario": ("veterinario", "persona"),
+    "dueno": ("mascota", "dueno", "persona"),
+}
+
+
+def leer_relaciones(expand: str | None) -> tuple[str, ...]:
+    relaciones = tuple(dict.fromkeys(nombre.strip() for nombre in (expand or "").split(",") if nombre.strip()))
+    desconocidas = [nombre for nombre in relaciones if nombre not in RELACIONES]
+    if desconocidas:
+        raise HTTPException(
+            status_code=400,
+            detail=f"expand no válido: {', '.join(desconocidas)} (opciones: {', '.join(RELACIONES)})",
+        )
+    return relaciones
+
+
+class Expansion:
+    def __init__(self, expand: str | None = Query(default=None, description="mascota,veterinario,dueno")):
+        self.relaciones = leer_relaciones(expand)
+
+
+def expandir(consulta: str, relaciones: tuple[str, ...]) -> str:
+    """Envuelve `consulta` (SELECT ... FROM tabla) y une solo las relaciones pedidas.
+
+    El resultado sigue siendo un SELECT sin WHERE ni ORDER BY con las columnas base sin
+    calificar, así que `listar_paginado_json` puede añadir filtros y el cursor por id;
+    Postgres aplana las subconsultas y empuja esos filtros hasta la tabla base.
+    """
+    if not relaciones:
+        return consulta
+
+    necesarias = []
+    for nombre in relaciones:
+        for relacion in (*RELACIONES[nombre]["requiere"], nombre):
+            if relacion not in necesarias:
+                necesarias.append(relacion)
+
+    joins = "\n".join(RELACIONES[nombre]["joins"] for nombre in necesarias)
+    proyecciones = ",\n".join(f"{RELACIONES[nombre]['proyeccion']} AS {nombre}" for nombre in relaciones)
+    return f"""
+        SELECT * FROM (
+            SELECT base.*, {proyecciones}
+            FROM ({consulta}) AS base
+            {joins}
+        ) AS expandida
+    """
@@ -0,0 +1,91 @@
+import asyncio
+from collections import deque
+
+from config.configuracion import config
+
+TABLAS_CON_SECUENCIA = (
+    "persona",
+    "dueno",
+    "usuario",
+    "veterinario",
+    "mascota",
+    "cita",
+    "historial_clinico",
+    "tratamiento",
+    "control_tratamiento",
+)
+
+
+class AsignadorSecuencia:
+    """Deja que la secuencia BIGSERIAL de la tabla asigne el id y lo recupera con RETURNING."""
+
+    async def reservar(self, cursor, tabla: str, cantidad: int) -> list[int]:
+        await cursor.execute(
+            "SELECT nextval(pg_get_serial_sequence(%s, 'id')) AS id FROM generate_series(1, %s)",
+            (tabla, cantidad),
+        )
+        return [fila["id"] for fila in await cursor.fetchall()]
+
+    async def insertar(self, cursor, tabla: str, valores: dict) -> int:
+        columnas = ", ".join(valores)
+        marcadores = ", ".join(["%s"] * len(valores))
+        await cursor.execute(
+            f"INSERT INTO {tabla} ({columnas}) VALUES ({marcadores}) RETURNING id",
+            tuple(valores.values()),
+        )
+        fila = await cursor.fetchone()
+        return fila["id"]
+
+
+class AsignadorBloques(AsignadorSecuencia):
+    """Reserva bloques de ids de la secuencia por proceso y los reparte sin volver a la base."""
+
+    def __init__(self, tamano_bloque: int):
+        self.tamano_bloque = tamano_bloque
+        self._libres: dict[str, deque[int]] = {}
+        self._bloqueos: dict[str, asyncio.Lock] = {}
+
+    async def siguiente_id(self, cursor, tabla: str) -> int:
+        libres = self._libres.setdefault(tabla, deque())
+        if not libres:
+            async with self._bloqueos.setdefault(tabla, asyncio.Lock()):
+                if not libres:
+                    libres.extend(await self.reservar(cursor, tabla, self.tamano_bloque))
+        return libres.popleft()
+
+    async def insertar(self, cursor, tabla: str, valores: dict) -> int:
+        return await super().insertar(cursor, tabla, {"id": await self.siguiente_id(cursor, tabla), **valores})
+
+
+def crear_asignador(estrategia: str) -> AsignadorSecuencia:
+    if estrategia == "secuencia":
+        return AsignadorSecuencia()
+    if estrategia == "bloques":
+        return AsignadorBloques(config.ID_TAMANO_BLOQUE)
+    raise ValueError(f"Estrategia de ids desconocida: {estrategia}")
+
+
+asignador = crear_asignador(config.ID_ESTRATEGIA)
+
+
+async def sincronizar_secuencias(conn):
+    """Adelanta cada secuencia hasta MAX(id) tras cargar filas con id explícito (benchmarks.sembrar).
+
+    No corre al arrancar la API: con varios workers, un setval concurrente con nextval o con
+    la reserva de bloques podría retroceder la secuencia. Aun así solo la mueve hacia
+    adelante y bajo un advisory lock, por si dos cargas coinciden. En bases existentes se
+    usa la migración equivalente de "base de datos.md".
+    """
+    async with conn.cursor() as cursor:
+        await cursor.execute("SELECT pg_advisory_xact_lock(hashtextextended('sincronizar_secuencias', 0))")
+        for tabla in TABLAS_CON_SECUENCIA:
+            await cursor.execute(
+                f"""
+                SELECT setval(s.secuencia, u.ultimo, true)
+                FROM (SELECT pg_get_serial_sequence('{tabla}', 'id') AS secuencia) s,
+                LATERAL (SELECT MAX(id) AS ultimo FROM {tabla}) u
+                WHERE s.secuencia IS NOT NULL
+                  AND u.ultimo > COALESCE(pg_sequence_last_value(s.secuencia::regclass), 0)
+                """
+            )
+    await conn.commit()
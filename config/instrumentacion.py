@@ -0,0 +1,167 @@
+import hashlib
+import json
+import time
+from contextvars import ContextVar
+from functools import lru_cache
+
+from psycopg import AsyncCursor
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from config.configuracion import config
+from config.metricas import Contador, Histograma
+
+MAXIMO_CONSULTAS_CABECERA = 10
+
+duracion_consulta = Histograma(
+    "veterinaria_consulta_segundos",
+    "Tiempo de cursor.execute por endpoint y consulta",
+    etiquetas=("endpoint", "consulta"),
+)
+filas_consulta = Contador(
+    "veterinaria_consulta_filas_total",
+    "Filas devueltas o afectadas por endpoint y consulta",
+    etiquetas=("endpoint", "consulta"),
+)
+bytes_consulta = Contador(
+    "veterinaria_consulta_bytes_total",
+    "Bytes de resultado recibidos por endpoint y consulta",
+    etiquetas=("endpoint", "consulta"),
+)
+duracion_peticion = Histograma(
+    "veterinaria_peticion_segundos",
+    "Duracion total de la peticion por endpoint",
+    etiquetas=("metodo", "endpoint"),
+)
+duracion_db_peticion = Histograma(
+    "veterinaria_peticion_db_segundos",
+    "Tiempo acumulado en la base de datos por peticion",
+    etiquetas=("metodo", "endpoint"),
+)
+
+
+class Traza:
+    """Consultas y espera de pool de una petición; la comparte el middleware con los cursores."""
+
+    def __init__(self, scope: dict):
+        self.scope = scope
+        self.consultas: list[tuple[str, float, int, int]] = []
+        self.espera_pool = 0.0
+
+    def endpoint(self) -> str:
+        ruta = self.scope.get("route")
+        return getattr(ruta, "path", None) or "sin_ruta"
+
+
+traza_actual: ContextVar[Traza | None] = ContextVar("traza_actual", default=None)
+
+
+@lru_cache(maxsize=512)
+def etiqueta_consulta(texto: str) -> str:
+    """Inicio legible del SQL compactado más un hash del texto completo.
+
+    Listado, obtención por id y lote de una tabla empiezan igual; el hash los separa en
+    series distintas, mientras que la misma consulta con otros parámetros comparte etiqueta.
+    """
+    normalizado = " ".join(texto.split())
+    huella = hashlib.blake2b(normalizado.encode(), digest_size=4).hexdigest()
+    return f"{normalizado[:60]} #{huella}"
+
+
+def _bytes_resultado(cursor) -> int:
+    resultado = cursor.pgresult
+    if resultado is None:
+        return 0
+    total = 0
+    for fila in range(resultado.ntuples):
+        for columna in range(resultado.nfields):
+            valor = resultado.get_value(fila, columna)
+            if valor is not None:
+                total += len(valor)
+    return total
+
+
+def registrar_espera_pool(segundos: float):
+    traza = traza_actual.get()
+    if traza is not None:
+        traza.espera_pool += segundos
+
+
+def registrar_consulta(consulta: str, segundos: float, filas: int, bytes_resultado: int):
+    traza = traza_actual.get()
+    endpoint = traza.endpoint() if traza is not None else "fuera_de_peticion"
+    duracion_consulta.observar(segundos, endpoint, consulta)
+    filas_consulta.incrementar(endpoint, consulta, cantidad=filas)
+    bytes_consulta.incrementar(endpoint, consulta, cantidad=bytes_resultado)
+    if traza is not None:
+        traza.consultas.append((consulta, segundos, filas, bytes_resultado))
+
+    if segundos * 1000 >= config.DB_CONSULTA_LENTA_MS:
+        print(json.dumps({
+            "evento": "consulta_lenta",
+            "endpoint": endpoint,
+            "consulta": consulta,
+            "duracion_ms": round(segundos * 1000, 3),
+            "filas": filas,
+            "bytes": bytes_resultado,
+        }, ensure_ascii=False))
+
+
+class CursorMedido(AsyncCursor):
+    """Cursor del pool que mide cada execute (tiempo, filas y bytes).
+
+    En modo pipeline el execute solo encola la consulta, así que el tiempo medido es el
+    de envío y las filas se reportan como 0 hasta que se leen los resultados.
+    """
+
+    async def execute(self, query, params=None, **kwargs):
+        inicio = time.perf_counter()
+        try:
+            return await super().execute(query, params, **kwargs)
+        finally:
+            segundos = time.perf_counter() - inicio
+            texto = query if isinstance(query, str) else query.as_string(self)
+            registrar_consulta(
+                etiqueta_consulta(texto),
+                segundos,
+                max(self.rowcount, 0),
+                _bytes_resultado(self) if config.DB_MEDIR_BYTES else 0,
+            )
+
+
+def _texto_cabecera(texto: str) -> str:
+    return texto.replace("\\", "\\\\").replace('"', "'")
+
+
+def cabecera_server_timing(traza: Traza) -> str:
+    total = sum(segundos for _, segundos, _, _ in traza.consultas)
+    filas = sum(filas for _, _, filas, _ in traza.consultas)
+    bytes_resultado = sum(cantidad for _, _, _, cantidad in traza.consultas)
+    partes = [
+        f'pool;dur={traza.espera_pool * 1000:.3f}',
+        f'db;dur={total * 1000:.3f};desc="{len(traza.consultas)} consultas, {filas} filas, {bytes_resultado} bytes"',
+    ]
+    for indice, (consulta, segundos, filas, cantidad) in enumerate(traza.consultas[:MAXIMO_CONSULTAS_CABECERA], start=1):
+        descripcion = _texto_cabecera(f"{consulta} ({filas} filas, {cantidad} bytes)")
+        partes.append(f'db{indice};dur={segundos * 1000:.3f};desc="{descripcion}"')
+    return ", ".join(partes)
+
+
+class MiddlewareInstrumentacion(BaseHTTPMiddleware):
+    """Abre una Traza por petición, alimenta los histogramas por endpoint y, con
+    DB_SERVER_TIMING, añade Server-Timing."""
+
+    async def dispatch(self, request, call_next):
+        traza = Traza(request.scope)
+        token = traza_actual.set(traza)
+        inicio = time.perf_counter()
+        try:
+            response = await call_next(request)
+        finally:
+            traza_actual.reset(token)
+
+        endpoint = traza.endpoint()
+        duracion_peticion.observar(time.perf_counter() - inicio, request.method, endpoint)
+        duracion_db_peticion.observar(sum(segundos for _, segundos, _, _ in traza.consultas), request.method, endpoint)
+        if config.DB_SERVER_TIMING:
+            response.headers["Server-Timing"] = cabecera_server_timing(traza)
+        return response
@@ -0,0 +1,112 @@
+import json
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from functools import partial
+from math import isfinite
+
+from fastapi import Response
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _por_defecto(valor):
+    """Mismas conversiones que jsonable_encoder para los tipos que devuelve psycopg."""
+    if isinstance(valor, Decimal):
+        return int(valor) if valor.as_tuple().exponent >= 0 else float(valor)
+    if isinstance(valor, (datetime, date, time)):
+        return valor.isoformat()
+    if isinstance(valor, timedelta):
+        return valor.total_seconds()
+    raise TypeError(f"Tipo no serializable: {type(valor).__name__}")
+
+
+def a_json(contenido) -> bytes:
+    """orjson si está instalado (fechas nativas, Decimal por `default`); si no, json de la stdlib."""
+    if orjson is not None:
+        return orjson.dumps(contenido, default=_por_defecto)
+    return json.dumps(
+        contenido,
+        default=_por_defecto,
+        ensure_ascii=False,
+        allow_nan=False,
+        separators=(",", ":"),
+    ).encode()
+
+
+_codificador = json.JSONEncoder(
+    default=_por_defecto,
+    ensure_ascii=False,
+    allow_nan=False,
+    separators=(",", ":"),
+)
+_cadena_json = json.encoder.encode_basestring
+_valor_orjson = partial(orjson.dumps, default=_por_defecto) if orjson is not None else None
+
+
+def _valor_json(valor) -> str:
+    """Un valor suelto con json de la stdlib; atajos para los tipos más comunes en las filas."""
+    tipo = type(valor)
+    if tipo is str:
+        return _cadena_json(valor)
+    if tipo is int:
+        return int.__repr__(valor)
+    if valor is None:
+        return "null"
+    if tipo is bool:
+        return "true" if valor else "false"
+    if tipo is Decimal:
+        valor = _por_defecto(valor)
+        tipo = type(valor)
+    if tipo is float and isfinite(valor):
+        return float.__repr__(valor)
+    if tipo is date or tipo is datetime:
+        return '"' + valor.isoformat() + '"'
+    return _codificador.encode(valor)
+
+
+def _columna_json(valores: tuple) -> list:
+    """Codifica una columna entera; las de solo str o solo int van por funciones en C."""
+    if orjson is not None:
+        return list(map(_valor_orjson, valores))
+    tipos = set(map(type, valores))
+    if tipos == {str}:
+        return list(map(_cadena_json, valores))
+    if tipos == {int}:
+        return list(map(int.__repr__, valores))
+    return list(map(_valor_json, valores))
+
+
+def filas_a_json(columnas: tuple[str, ...], filas: list[tuple]) -> bytes:
+    """Serializa filas de tuple_row como arreglo de objetos sin crear un dict por fila.
+
+    Las claves se codifican una vez en una plantilla `{"a":%s,"b":%s}`; los valores se
+    codifican por columna y cada objeto sale de aplicar la plantilla a su tupla.
+    """
+    if not filas:
+        return b"[]"
+    if not columnas:
+        return a_json([{} for _ in filas])
+
+    plantilla = "{" + ",".join(_cadena_json(columna).replace("%", "%%") + ":%s" for columna in columnas) + "}"
+    codificadas = [_columna_json(valores) for valores in zip(*filas)]
+    if orjson is not None:
+        plantilla = plantilla.encode()
+        return b"[" + b",".join([plantilla % fila for fila in zip(*codificadas)]) + b"]"
+    return ("[" + ",".join([plantilla % fila for fila in zip(*codificadas)]) + "]").encode()
+
+
+def filas_a_columnas_json(columnas: tuple[str, ...], filas: list[tuple]) -> bytes:
+    """Formato columnar: los nombres una sola vez y las tuplas tal cual, como arreglos."""
+    return a_json({"columnas": columnas, "filas": filas})
+
+
+class RespuestaJSON(Response):
+    media_type = "application/json"
+
+    def render(self, content) -> bytes:
+        if isinstance(content, bytes):
+            return content
+        return a_json(content)
@@ -0,0 +1,51 @@
+from fastapi import HTTPException, Query
+
+from config.json_rapido import RespuestaJSON
+from config.paginacion import LIMITE_MAXIMO
+
+
+class IdsLote:
+    """?ids=1,2,3 (también admite ?ids=1&ids=2); sin duplicados y como máximo LIMITE_MAXIMO."""
+
+    def __init__(self, ids: list[str] = Query(min_length=1)):
+        try:
+            valores = [int(valor) for texto in ids for valor in texto.split(",") if valor.strip()]
+        except ValueError:
+            raise HTTPException(status_code=400, detail="ids debe ser una lista de enteros separados por comas")
+        self.ids = list(dict.fromkeys(valores))
+        if not self.ids:
+            raise HTTPException(status_code=400, detail="Debe indicar al menos un id")
+        if len(self.ids) > LIMITE_MAXIMO:
+            raise HTTPException(status_code=400, detail=f"Se permiten como máximo {LIMITE_MAXIMO} ids")
+
+
+async def obtener_lote(conn, consulta: str, lote: IdsLote, cache=None) -> RespuestaJSON:
+    """Ejecuta `consulta` (SELECT ... FROM tabla, sin WHERE) con `id = ANY(%s)` en un solo viaje.
+
+    Con `cache` (una CacheEntidad) solo se consultan los ids que no están en caché.
+    Devuelve {"datos": {id: fila}, "faltantes": [ids]}.
+    """
+    datos = {}
+    pendientes = lote.ids
+    if cache is not None:
+        pendientes = []
+        for id_entidad in lote.ids:
+            fila = cache.cache.obtener(id_entidad)
+            if fila is None:
+                pendientes.append(id_entidad)
+            else:
+                datos[id_entidad] = fila
+
+    if pendientes:
+        generacion = cache.cache.generacion() if cache is not None else None
+        async with conn.cursor() as cursor:
+            await cursor.execute(f"{consulta} WHERE id = ANY(%s)", (pendientes,))
+            for fila in await cursor.fetchall():
+                datos[fila["id"]] = fila
+                if cache is not None:
+                    cache.cache.guardar(fila["id"], fila, generacion)
+
+    return RespuestaJSON({
+        "datos": {str(id_entidad): datos[id_entidad] for id_entidad in lote.ids if id_entidad in datos},
+        "faltantes": [id_entidad for id_entidad in lote.ids if id_entidad not in datos],
+    })
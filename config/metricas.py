@@ -0,0 +1,101 @@
+LIMITES_SEGUNDOS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_registro: list = []
+
+
+def _formatear_etiquetas(nombres: tuple[str, ...], valores: tuple, extra: str = "") -> str:
+    pares = [f'{nombre}="{str(valor).replace(chr(34), chr(39))}"' for nombre, valor in zip(nombres, valores)]
+    if extra:
+        pares.append(extra)
+    return "{" + ",".join(pares) + "}" if pares else ""
+
+
+class Contador:
+    def __init__(self, nombre: str, ayuda: str, etiquetas: tuple[str, ...] = ()):
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self.etiquetas = etiquetas
+        self._series: dict[tuple, float] = {}
+        _registro.append(self)
+
+    def incrementar(self, *valores, cantidad: float = 1):
+        self._series[valores] = self._series.get(valores, 0) + cantidad
+
+    def exponer(self) -> list[str]:
+        lineas = [f"# HELP {self.nombre} {self.ayuda}", f"# TYPE {self.nombre} counter"]
+        for valores, total in self._series.items():
+            lineas.append(f"{self.nombre}{_formatear_etiquetas(self.etiquetas, valores)} {total}")
+        return lineas
+
+
+class Histograma:
+    def __init__(
+        self,
+        nombre: str,
+        ayuda: str,
+        etiquetas: tuple[str, ...] = (),
+        limites: tuple[float, ...] = LIMITES_SEGUNDOS,
+    ):
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self.etiquetas = etiquetas
+        self.limites = limites
+        self._series: dict[tuple, list] = {}
+        _registro.append(self)
+
+    def observar(self, valor: float, *valores):
+        serie = self._series.get(valores)
+        if serie is None:
+            serie = self._series[valores] = [[0] * len(self.limites), 0.0, 0]
+        for indice, limite in enumerate(self.limites):
+            if valor <= limite:
+                serie[0][indice] += 1
+                break
+        serie[1] += valor
+        serie[2] += 1
+
+    def exponer(self) -> list[str]:
+        lineas = [f"# HELP {self.nombre} {self.ayuda}", f"# TYPE {self.nombre} histogram"]
+        for valores, (cubetas, suma, cuenta) in self._series.items():
+            acumulado = 0
+            for limite, cantidad in zip(self.limites, cubetas):
+                acumulado += cantidad
+                etiquetas = _formatear_etiquetas(self.etiquetas, valores, f'le="{limite}"')
+                lineas.append(f"{self.nombre}_bucket{etiquetas} {acumulado}")
+            etiquetas = _formatear_etiquetas(self.etiquetas, valores, 'le="+Inf"')
+            lineas.append(f"{self.nombre}_bucket{etiquetas} {cuenta}")
+            lineas.append(f"{self.nombre}_sum{_formatear_etiquetas(self.etiquetas, valores)} {suma}")
+            lineas.append(f"{self.nombre}_count{_formatear_etiquetas(self.etiquetas, valores)} {cuenta}")
+        return lineas
+
+
+class Indicador:
+    """Valor instantáneo calculado al exponer, por ejemplo a partir de pool.get_stats().
+
+    Con `etiquetas`, `funcion` devuelve un dict {tupla de valores: valor}. `tipo` permite
+    publicar como counter totales que ya acumula otro objeto (por ejemplo, una caché).
+    """
+
+    def __init__(self, nombre: str, ayuda: str, funcion, etiquetas: tuple[str, ...] = (), tipo: str = "gauge"):
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self.funcion = funcion
+        self.etiquetas = etiquetas
+        self.tipo = tipo
+        _registro.append(self)
+
+    def exponer(self) -> list[str]:
+        lineas = [f"# HELP {self.nombre} {self.ayuda}", f"# TYPE {self.nombre} {self.tipo}"]
+        if not self.etiquetas:
+            lineas.append(f"{self.nombre} {self.funcion()}")
+            return lineas
+        for valores, valor in self.funcion().items():
+            lineas.append(f"{self.nombre}{_formatear_etiquetas(self.etiquetas, valores)} {valor}")
+        return lineas
+
+
+def exponer_metricas() -> str:
+    lineas = []
+    for metrica in _registro:
+        lineas.extend(metrica.exponer())
+    return "\n".join(lineas) + "\n"
@@ -0,0 +1,44 @@
+import asyncio
+
+import psycopg
+from psycopg import sql
+
+_suscriptores: dict[str, list] = {}
+
+
+def suscribir(canal: str, funcion):
+    """Registra `funcion(payload)` para un canal de LISTEN/NOTIFY.
+
+    Tras una reconexión se llama con payload None: las notificaciones perdidas
+    mientras no había conexión obligan a resincronizar.
+    """
+    _suscriptores.setdefault(canal, []).append(funcion)
+
+
+async def _despachar(canal: str, payload: str | None):
+    for funcion in _suscriptores.get(canal, []):
+        try:
+            await funcion(payload)
+        except Exception as e:
+            print(f"Error notificación {canal}: {e}")
+
+
+async def escuchar(conninfo: str):
+    reconexion = False
+    while True:
+        try:
+            async with await psycopg.AsyncConnection.connect(conninfo, autocommit=True) as conn:
+                for canal in _suscriptores:
+                    await conn.execute(sql.SQL("LISTEN {}").format(sql.Identifier(canal)))
+                if reconexion:
+                    for canal in _suscriptores:
+                        await _despachar(canal, None)
+                reconexion = True
+                async for notificacion in conn.notifies():
+                    await _despachar(notificacion.channel, notificacion.payload)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"Error escucha de notificaciones: {e}")
+            reconexion = True
+            await asyncio.sleep(5)
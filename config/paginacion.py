@@ -0,0 +1,103 @@
+import base64
+import binascii
+import json
+from typing import Literal
+
+from fastapi import HTTPException, Query, Response
+from psycopg.rows import tuple_row
+
+from config.json_rapido import RespuestaJSON, filas_a_columnas_json, filas_a_json
+
+LIMITE_POR_DEFECTO = 100
+LIMITE_MAXIMO = 1000
+
+
+def codificar_cursor(ultimo_id: int) -> str:
+    datos = json.dumps({"id": ultimo_id}, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(datos).decode().rstrip("=")
+
+
+def decodificar_cursor(cursor: str) -> int:
+    try:
+        relleno = "=" * (-len(cursor) % 4)
+        datos = json.loads(base64.urlsafe_b64decode(cursor + relleno))
+        ultimo_id = datos["id"]
+        if not isinstance(ultimo_id, int):
+            raise ValueError("id invalido")
+        return ultimo_id
+    except (binascii.Error, ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Cursor de paginación inválido")
+
+
+class Pagina:
+    def __init__(
+        self,
+        after: str | None = Query(default=None),
+        limit: int = Query(default=LIMITE_POR_DEFECTO, ge=1, le=LIMITE_MAXIMO),
+        formato: Literal["objetos", "columnas"] = Query(
+            default="objetos",
+            description="columnas: {columnas: [...], filas: [[...]]} en lugar de un objeto por fila",
+        ),
+    ):
+        self.after = decodificar_cursor(after) if after else None
+        self.limit = limit
+        self.formato = formato
+
+
+def compilar_filtros(filtros: dict) -> tuple[list[str], list]:
+    condiciones = []
+    parametros = []
+    for condicion, valor in filtros.items():
+        if valor is None:
+            continue
+        condiciones.append(condicion)
+        parametros.append(valor)
+    return condiciones, parametros
+
+
+def _consulta_paginada(consulta: str, pagina: Pagina, filtros: dict | None) -> tuple[str, tuple]:
+    condiciones, parametros = compilar_filtros(filtros or {})
+    if pagina.after is not None:
+        condiciones.append("id > %s")
+        parametros.append(pagina.after)
+
+    where = f"WHERE {' AND '.join(condiciones)}" if condiciones else ""
+    parametros.append(pagina.limit + 1)
+    return f"{consulta} {where} ORDER BY id LIMIT %s", tuple(parametros)
+
+
+async def listar_paginado(conn, response: Response, consulta: str, pagina: Pagina, filtros: dict | None = None):
+    """Ejecuta `consulta` (SELECT ... FROM tabla, sin WHERE ni ORDER BY) paginando por id.
+
+    Cada clave de `filtros` es una condición con un único `%s`; las de valor None se omiten.
+    El cursor de la siguiente página se devuelve en la cabecera X-Next-Cursor.
+    """
+    async with conn.cursor() as cursor:
+        await cursor.execute(*_consulta_paginada(consulta, pagina, filtros))
+        filas = await cursor.fetchall()
+
+    if len(filas) > pagina.limit:
+        filas = filas[: pagina.limit]
+        response.headers["X-Next-Cursor"] = codificar_cursor(filas[-1]["id"])
+    return filas
+
+
+async def listar_paginado_json(conn, consulta: str, pagina: Pagina, filtros: dict | None = None) -> RespuestaJSON:
+    """Como `listar_paginado`, pero lee tuplas y devuelve el JSON ya serializado.
+
+    Evita dict_row, jsonable_encoder y el json de la stdlib en los listados grandes.
+    `consulta` debe seleccionar la columna id. Con `formato=columnas` los nombres van una
+    sola vez y cada fila es un arreglo de valores.
+    """
+    async with conn.cursor(row_factory=tuple_row) as cursor:
+        await cursor.execute(*_consulta_paginada(consulta, pagina, filtros))
+        filas = await cursor.fetchall()
+        columnas = tuple(columna.name for columna in cursor.description)
+
+    cabeceras = {}
+    if len(filas) > pagina.limit:
+        filas = filas[: pagina.limit]
+        cabeceras["X-Next-Cursor"] = codificar_cursor(filas[-1][columnas.index("id")])
+    if pagina.formato == "columnas":
+        return RespuestaJSON(filas_a_columnas_json(columnas, filas), headers=cabeceras)
+    return RespuestaJSON(filas_a_json(columnas, filas), headers=cabeceras)
@@ -0,0 +1,198 @@
+import asyncio
+import hashlib
+import json
+import zlib
+from datetime import date
+
+import psycopg
+from psycopg.rows import dict_row, tuple_row
+from psycopg.types.json import Jsonb
+
+from config.conexionDB import DB_URL, registrar_tarea
+from config.configuracion import config
+from config.json_rapido import a_json
+from config.notificaciones import suscribir
+from config.versiones import versiones_tablas
+
+CANAL_TRABAJOS = "reporte_job"
+
+# tipo -> (funcion(conn, parametros) que devuelve el resultado, tablas que lee)
+_tipos: dict[str, tuple] = {}
+
+_hay_trabajo = asyncio.Event()
+
+
+def registrar_tipo_trabajo(tipo: str, funcion, tablas: tuple[str, ...]):
+    """`tablas` entra en la huella junto con la fecha del día: un resultado se reutiliza
+    mientras esas tablas no cambien."""
+    _tipos[tipo] = (funcion, tablas)
+
+
+async def encolar_trabajo(conn, tipo: str, parametros: dict) -> tuple[int, bool]:
+    """Devuelve (id, reutilizado). El INSERT y el NOTIFY van en la misma transacción:
+    los workers solo se despiertan si el trabajo quedó confirmado."""
+    _, tablas = _tipos[tipo]
+    async with conn.cursor(row_factory=tuple_row) as cursor:
+        versiones = await versiones_tablas(cursor, tablas)
+        huella = hashlib.sha256(
+            json.dumps([tipo, parametros, versiones, date.today()], sort_keys=True, default=str).encode()
+        ).hexdigest()
+
+        # Serializa los encolados con la misma huella para no duplicar trabajo.
+        await cursor.execute("SELECT pg_advisory_xact_lock(hashtextextended(%s, 0))", (huella,))
+        await cursor.execute(
+            """
+            SELECT id
+            FROM reporte_job
+            WHERE huella = %s
+              AND (estado IN ('pendiente', 'completado')
+                   OR (estado = 'procesando' AND iniciado_en >= now() - make_interval(secs => %s)))
+            ORDER BY id DESC
+            LIMIT 1
+            """,
+            (huella, config.REPORTES_JOB_TIMEOUT),
+        )
+        existente = await cursor.fetchone()
+        if existente:
+            await conn.commit()
+            return existente[0], True
+
+        await cursor.execute(
+            """
+            INSERT INTO reporte_job (tipo, parametros, huella)
+            VALUES (%s, %s, %s)
+            RETURNING id
+            """,
+            (tipo, Jsonb(parametros), huella),
+        )
+        (id_trabajo,) = await cursor.fetchone()
+        await cursor.execute("SELECT pg_notify(%s, %s)", (CANAL_TRABAJOS, str(id_trabajo)))
+    await conn.commit()
+    return id_trabajo, False
+
+
+async def _reclamar(conn) -> dict | None:
+    async with conn.cursor(row_factory=dict_row) as cursor:
+        await cursor.execute(
+            """
+            UPDATE reporte_job
+            SET estado = 'procesando', iniciado_en = now(), terminado_en = NULL, intentos = intentos + 1
+            WHERE id = (
+                SELECT id
+                FROM reporte_job
+                WHERE (estado = 'pendiente'
+                       OR (estado = 'procesando' AND iniciado_en < now() - make_interval(secs => %s)))
+                  AND intentos < %s
+                ORDER BY id
+                FOR UPDATE SKIP LOCKED
+                LIMIT 1
+            )
+            RETURNING id, tipo, parametros
+            """,
+            (config.REPORTES_JOB_TIMEOUT, config.REPORTES_MAX_INTENTOS),
+        )
+        trabajo = await cursor.fetchone()
+    await conn.commit()
+    return trabajo
+
+
+async def _ejecutar(conn, trabajo: dict):
+    funcion, _ = _tipos[trabajo["tipo"]]
+    try:
+        resultado = await funcion(conn, trabajo["parametros"])
+        await conn.execute(
+            """
+            UPDATE reporte_job
+            SET estado = 'completado', resultado = %s, error = NULL, terminado_en = now()
+            WHERE id = %s
+            """,
+            (zlib.compress(a_json(resultado)), trabajo["id"]),
+        )
+    except Exception as e:
+        await conn.rollback()
+        print(f"Error trabajo de reporte {trabajo['id']}: {e}")
+        await conn.execute(
+            """
+            UPDATE reporte_job
+            SET estado = CASE WHEN intentos >= %s THEN 'fallido' ELSE 'pendiente' END,
+                error = %s, terminado_en = now()
+            WHERE id = %s
+            """,
+            (config.REPORTES_MAX_INTENTOS, str(e), trabajo["id"]),
+        )
+    await conn.commit()
+
+
+async def _purgar(conn):
+    """Marca como fallidos los trabajos vencidos sin intentos restantes (su worker murió y
+    _reclamar ya no los toma) y borra los terminados hace más de REPORTES_JOB_RETENCION."""
+    await conn.execute(
+        """
+        UPDATE reporte_job
+        SET estado = 'fallido', error = 'Tiempo de ejecución agotado', terminado_en = now()
+        WHERE estado = 'procesando'
+          AND iniciado_en < now() - make_interval(secs => %s)
+          AND intentos >= %s
+        """,
+        (config.REPORTES_JOB_TIMEOUT, config.REPORTES_MAX_INTENTOS),
+    )
+    await conn.execute(
+        "DELETE FROM reporte_job WHERE terminado_en < now() - make_interval(secs => %s)",
+        (config.REPORTES_JOB_RETENCION,),
+    )
+    await conn.commit()
+
+
+async def _worker(numero: int):
+    """Cada worker usa su propia conexión, fuera del pool de las peticiones interactivas."""
+    while True:
+        try:
+            async with await psycopg.AsyncConnection.connect(DB_URL, row_factory=dict_row) as conn:
+                await conn.execute("SET application_name = %s", (f"veterinaria-reportes-{numero}",))
+                await conn.commit()
+                while True:
+                    trabajo = await _reclamar(conn)
+                    if trabajo is not None:
+                        await _ejecutar(conn, trabajo)
+                        continue
+                    if numero == 0:
+                        await _purgar(conn)
+                    _hay_trabajo.clear()
+                    try:
+                        await asyncio.wait_for(_hay_trabajo.wait(), timeout=config.REPORTES_POLL)
+                    except TimeoutError:
+                        pass
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"Error worker de reportes {numero}: {e}")
+            await asyncio.sleep(config.REPORTES_POLL)
+
+
+async def _al_encolar(_payload: str | None):
+    _hay_trabajo.set()
+
+
+async def ejecutar_workers():
+    await asyncio.gather(*(_worker(numero) for numero in range(config.REPORTES_WORKERS)))
+
+
+suscribir(CANAL_TRABAJOS, _al_encolar)
+if config.REPORTES_WORKERS > 0:
+    registrar_tarea(ejecutar_workers)
+
+
+async def consultar_trabajo(cursor, id_trabajo: int) -> dict | None:
+    await cursor.execute(
+        """
+        SELECT id, tipo, parametros, estado, error, intentos,
+               creado_en, iniciado_en, terminado_en, resultado
+        FROM reporte_job
+        WHERE id = %s
+        """,
+        (id_trabajo,),
+    )
+    trabajo = await cursor.fetchone()
+    if trabajo is not None and trabajo["resultado"] is not None:
+        trabajo["resultado"] = zlib.decompress(trabajo["resultado"])
+    return trabajo
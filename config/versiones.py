@@ -0,0 +1,120 @@
+import hashlib
+from datetime import date
+
+from psycopg.rows import tuple_row
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.responses import Response
+
+from config.cache import aciertos_peticion
+from config.conexionDB import conexion_medida, leer_de_replica
+from config.expansion import TABLAS_POR_RELACION
+
+TABLAS_CLINICAS = ("mascota", "dueno", "persona", "veterinario", "cita", "historial_clinico", "tratamiento", "control_tratamiento")
+
+TABLAS_POR_RUTA = {
+    "/personas": ("persona",),
+    "/usuarios": ("usuario",),
+    "/mascotas": ("mascota",),
+    "/citas": ("cita",),
+    "/veterinarios": ("veterinario",),
+    "/historial": ("historial_clinico",),
+    "/control": ("control_tratamiento",),
+    "/tratamientos": ("tratamiento",),
+    "/duenos": ("dueno",),
+    "/reportes": TABLAS_CLINICAS,
+    "/dashboard": ("persona", "dueno", "mascota", "veterinario", "cita", "usuario"),
+    "/buscar": ("historial_clinico", "mascota", "persona", "dueno"),
+}
+
+
+# Subrutas que leen más tablas que su prefijo, por (prefijo, último segmento).
+TABLAS_POR_SUBRUTA = {
+    ("/veterinarios", "agenda"): ("veterinario", "cita", "mascota"),
+}
+
+# Prefijos que dependen de algo más que las tablas versionadas (la hora actual, el
+# estado de un trabajo en segundo plano, el token de la petición): no pueden responder
+# 304 por versión. /usuarios/sesion debe llegar a sesion_actual para devolver el 401.
+RUTAS_SIN_VERSION = ("/citas/disponibilidad", "/reportes/jobs", "/usuarios/sesion")
+
+# Rutas que además dependen de la fecha (nuevas_mascotas_mes usa CURRENT_DATE): la fecha
+# entra en el ETag para que el cambio de mes no siga respondiendo 304 con la cifra vieja.
+RUTAS_CON_FECHA = ("/reportes/general",)
+
+
+def tablas_de_ruta(ruta: str, expand: str | None = None) -> tuple[str, ...] | None:
+    if ruta.startswith(RUTAS_SIN_VERSION):
+        return None
+    segmentos = ruta.strip("/").split("/")
+    prefijo = "/" + segmentos[0]
+    tablas = TABLAS_POR_SUBRUTA.get((prefijo, segmentos[-1])) or TABLAS_POR_RUTA.get(prefijo)
+    if tablas and expand:
+        extra = [tabla for nombre in expand.split(",") for tabla in TABLAS_POR_RELACION.get(nombre.strip(), ())]
+        tablas = tuple(dict.fromkeys((*tablas, *extra)))
+    return tablas
+
+
+async def versiones_tablas(cursor, tablas: tuple[str, ...]) -> list:
+    await cursor.execute(
+        """
+        SELECT tabla, SUM(version)
+        FROM version_tabla
+        WHERE tabla = ANY(%s)
+        GROUP BY tabla
+        ORDER BY tabla
+        """,
+        (list(tablas),),
+    )
+    return await cursor.fetchall()
+
+
+async def calcular_etag(ruta_completa: str, tablas: tuple[str, ...], lectura: bool = False) -> str:
+    """Las versiones se leen del mismo servidor que responderá el cuerpo: con la réplica
+    atrasada, una versión de la primaria etiquetaría datos viejos con un ETag nuevo."""
+    async with conexion_medida(lectura=lectura) as conn:
+        async with conn.cursor(row_factory=tuple_row) as cursor:
+            versiones = await versiones_tablas(cursor, tablas)
+        await conn.commit()
+    if ruta_completa.partition("?")[0].endswith(RUTAS_CON_FECHA):
+        versiones.append(("fecha", date.today().isoformat()))
+    huella = hashlib.sha256(f"{ruta_completa}|{versiones}".encode()).hexdigest()[:32]
+    return f'W/"{huella}"'
+
+
+class MiddlewareVersiones(BaseHTTPMiddleware):
+    """ETag por versión de tabla: si ninguna tabla de la ruta cambió, responde 304
+    sin ejecutar el endpoint. Las versiones las mantienen triggers en version_tabla.
+
+    Las respuestas servidas desde una CacheLRU del proceso van sin ETag: la entrada pudo
+    leerse antes de la versión actual y el cliente la revalidaría como vigente.
+    """
+
+    async def dispatch(self, request, call_next):
+        tablas = (
+            tablas_de_ruta(request.url.path, request.query_params.get("expand"))
+            if request.method == "GET"
+            else None
+        )
+        if not tablas:
+            return await call_next(request)
+
+        try:
+            etag = await calcular_etag(str(request.url), tablas, leer_de_replica(request))
+        except Exception as e:
+            print(f"Error calcular etag: {e}")
+            return await call_next(request)
+
+        etags_cliente = [valor.strip() for valor in request.headers.get("if-none-match", "").split(",")]
+        if etag in etags_cliente:
+            return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "no-cache"})
+
+        marca = {"acierto": False}
+        token = aciertos_peticion.set(marca)
+        try:
+            response = await call_next(request)
+        finally:
+            aciertos_peticion.reset(token)
+        if response.status_code == 200 and not marca["acierto"]:
+            response.headers["ETag"] = etag
+            response.headers["Cache-Control"] = "no-cache"
+        return response
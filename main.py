@@ -1,31 +1,59 @@
-from fastapi import FastAPI
+from fastapi import Depends, FastAPI
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
-from config.conexionDB import app
-from routes import cita, mascota, persona, usuario, veterinario, control_tratamiento, tratamiento, historial_clinico, reportes, dueno
+from config.autenticacion import sesion_actual
+from config.compresion import MiddlewareCompresion
+from config.conexionDB import MiddlewareLecturaTrasEscritura, app, refrescar_esquema
+from config.instrumentacion import MiddlewareInstrumentacion
+from config.metricas import exponer_metricas
+from config.versiones import MiddlewareVersiones
+from routes import cita, mascota, persona, usuario, veterinario, control_tratamiento, tratamiento, historial_clinico, reportes, dueno, exportar, dashboard, buscar
 
 
+app.add_middleware(MiddlewareLecturaTrasEscritura)
+app.add_middleware(MiddlewareVersiones)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag", "Server-Timing"],
 )
+app.add_middleware(MiddlewareCompresion)
+app.add_middleware(MiddlewareInstrumentacion)
 
+# Todo salvo /usuarios (que protege sus rutas una a una para dejar abierto el login),
+# la raíz y /metrics exige el token de sesión.
+protegido = [Depends(sesion_actual)]
 
-app.include_router(persona.router, prefix="/personas")
+app.include_router(persona.router, prefix="/personas", dependencies=protegido)
 app.include_router(usuario.router, prefix="/usuarios")
-app.include_router(mascota.router, prefix="/mascotas")
-app.include_router(cita.router, prefix="/citas")
-app.include_router(veterinario.router, prefix="/veterinarios")
-app.include_router(historial_clinico.router, prefix="/historial")
-app.include_router(control_tratamiento.router, prefix="/control")
-app.include_router(tratamiento.router, prefix="/tratamientos")
-app.include_router(reportes.router, prefix="/reportes")
-app.include_router(dueno.router, prefix="/duenos")
+app.include_router(mascota.router, prefix="/mascotas", dependencies=protegido)
+app.include_router(cita.router, prefix="/citas", dependencies=protegido)
+app.include_router(veterinario.router, prefix="/veterinarios", dependencies=protegido)
+app.include_router(historial_clinico.router, prefix="/historial", dependencies=protegido)
+app.include_router(control_tratamiento.router, prefix="/control", dependencies=protegido)
+app.include_router(tratamiento.router, prefix="/tratamientos", dependencies=protegido)
+app.include_router(reportes.router, prefix="/reportes", dependencies=protegido)
+app.include_router(dueno.router, prefix="/duenos", dependencies=protegido)
+app.include_router(exportar.router, prefix="/export", dependencies=protegido)
+app.include_router(dashboard.router, prefix="/dashboard", dependencies=protegido)
+app.include_router(buscar.router, prefix="/buscar", dependencies=protegido)
 
 
 @app.get("/")
 async def root():
     return {"mensaje": "API Veterinaria en funcionamiento"}
 
+
+
+@app.post("/esquema/refrescar", dependencies=protegido)
+async def refrescar_metadatos_esquema():
+    await refrescar_esquema()
+    return {"mensaje": "Metadatos del esquema actualizados"}
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metricas():
+    return PlainTextResponse(exponer_metricas(), media_type="text/plain; version=0.0.4")
@@ -9,4 +9,7 @@ from . import (
     control_tratamiento,
     reportes,
     dueno,
+    exportar,
+    dashboard,
+    buscar,
 )
@@ -0,0 +1,83 @@
+from typing import Literal
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+
+from config.conexionDB import get_conexion_lectura
+from config.paginacion import LIMITE_MAXIMO
+
+router = APIRouter()
+
+LIMITE_BUSQUEDA = 20
+LIMITE_BUSQUEDA_MAXIMO = 100
+
+# Los fragmentos (ts_headline) son caros: se calculan solo para la página ya ordenada.
+CONSULTA_HISTORIAL = """
+    SELECT h.id, h.fecha, h.mascota_id, h.veterinario_id, h.cita_id, h.rango,
+           ts_headline('spanish', CONCAT_WS(' · ', h.diagnostico, h.sintomas), h.consulta,
+                       'MaxFragments=2, MaxWords=20, MinWords=5') AS fragmento
+    FROM (
+        SELECT h.id, h.fecha, h.mascota_id, h.veterinario_id, h.cita_id,
+               h.diagnostico, h.sintomas, consulta,
+               ts_rank_cd(h.busqueda, consulta) AS rango
+        FROM historial_clinico h, websearch_to_tsquery('spanish', %(q)s) AS consulta
+        WHERE h.busqueda @@ consulta
+        ORDER BY rango DESC, h.id DESC
+        LIMIT %(limite)s OFFSET %(desplazamiento)s
+    ) h
+    ORDER BY h.rango DESC, h.id DESC
+"""
+
+# `<%%` es word_similarity con umbral (pg_trgm); usa el índice GIN trigram de mascota.nombre.
+CONSULTA_MASCOTAS = """
+    SELECT m.id, m.nombre, m.especie, m.dueno_id,
+           word_similarity(%(q)s, m.nombre) AS rango
+    FROM mascota m
+    WHERE %(q)s <%% m.nombre
+    ORDER BY rango DESC, m.id
+    LIMIT %(limite)s OFFSET %(desplazamiento)s
+"""
+
+# La expresión del nombre completo debe coincidir con la de idx_persona_nombre_trgm.
+CONSULTA_PERSONAS = """
+    SELECT p.id, p.nombres, p.apellidos, p.ci, d.id AS dueno_id,
+           GREATEST(
+               word_similarity(%(q)s, p.nombres || ' ' || p.apellidos),
+               similarity(%(q)s, p.ci)
+           ) AS rango
+    FROM persona p
+    LEFT JOIN dueno d ON d.persona_id = p.id
+    WHERE %(q)s <%% (p.nombres || ' ' || p.apellidos)
+       OR p.ci %% %(q)s
+    ORDER BY rango DESC, p.id
+    LIMIT %(limite)s OFFSET %(desplazamiento)s
+"""
+
+CONSULTAS = {
+    "historial": CONSULTA_HISTORIAL,
+    "mascotas": CONSULTA_MASCOTAS,
+    "personas": CONSULTA_PERSONAS,
+}
+
+
+@router.get("/")
+async def buscar(
+    q: str = Query(min_length=2, max_length=200),
+    tipo: Literal["historial", "mascotas", "personas"] | None = Query(default=None),
+    limit: int = Query(default=LIMITE_BUSQUEDA, ge=1, le=LIMITE_BUSQUEDA_MAXIMO),
+    offset: int = Query(default=0, ge=0, le=LIMITE_MAXIMO),
+    conn=Depends(get_conexion_lectura),
+):
+    """Historial por texto completo (español) y mascotas/personas por similitud trigram.
+
+    Cada sección viene ordenada por relevancia; `offset` avanza la página en todas.
+    """
+    parametros = {"q": q.strip(), "limite": limit, "desplazamiento": offset}
+    secciones = [tipo] if tipo else list(CONSULTAS)
+    try:
+        async with conn.pipeline():
+            cursores = {seccion: await conn.execute(CONSULTAS[seccion], parametros) for seccion in secciones}
+            resultados = {seccion: await cursor.fetchall() for seccion, cursor in cursores.items()}
+        return {"q": parametros["q"], "limit": limit, "offset": offset, **resultados}
+    except Exception as e:
+        print(f"Error busqueda: {e}")
+        raise HTTPException(status_code=400, detail="Error al realizar la búsqueda")
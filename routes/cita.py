@@ -1,13 +1,26 @@
 from datetime import datetime
 
 from pydantic import BaseModel
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from psycopg.errors import ExclusionViolation
 
-from config.conexionDB import get_conexion
+from config.agenda import CONSULTA_DISPONIBILIDAD, parametros_disponibilidad, validar_rango
+from config.campos import Campos, columnas_de, proyectar
+from config.carga_masiva import insertar_masivo, leer_filas
+from config.conexionDB import get_conexion, get_conexion_lectura
+from config.configuracion import config
+from config.escritura import actualizar_por_id, eliminar_por_id, modelo_parcial
+from config.expansion import Expansion, expandir
+from config.identificadores import asignador
+from config.lotes import IdsLote, obtener_lote
+from config.paginacion import Pagina, listar_paginado_json
+from routes.reportes import invalidar_reporte_individual, limpiar_reportes_individuales, notificar_reporte_individual
 
 router = APIRouter()
 print("Router de citas creado")
 
+HORARIO_OCUPADO = "El veterinario ya tiene una cita en ese horario"
+
 class Cita(BaseModel):
     fecha_hora: datetime
     motivo: str
@@ -18,24 +31,84 @@ class Cita(BaseModel):
     veterinario_id: int
 
 
+CitaParcial = modelo_parcial(Cita)
+
+
 @router.get("/")
-async def listar_citas(conn=Depends(get_conexion)):
+async def listar_citas(
+    estado: str | None = Query(default=None),
+    prioridad: str | None = Query(default=None),
+    mascota_id: int | None = Query(default=None),
+    veterinario_id: int | None = Query(default=None),
+    desde: datetime | None = Query(default=None),
+    hasta: datetime | None = Query(default=None),
+    expansion: Expansion = Depends(),
+    campos: Campos = Depends(),
+    pagina: Pagina = Depends(),
+    conn=Depends(get_conexion_lectura),
+):
     consulta = """
         SELECT id, fecha_hora, motivo, prioridad, estado, observaciones, mascota_id, veterinario_id
         FROM cita
-        ORDER BY id
     """
+    consulta = proyectar(
+        expandir(consulta, expansion.relaciones), campos, columnas_de(consulta) + expansion.relaciones
+    )
+    filtros = {
+        "estado = %s": estado,
+        "prioridad = %s": prioridad,
+        "mascota_id = %s": mascota_id,
+        "veterinario_id = %s": veterinario_id,
+        "fecha_hora >= %s": desde,
+        "fecha_hora < %s": hasta,
+    }
     try:
-        async with conn.cursor() as cursor:
-            await cursor.execute(consulta)
-            return await cursor.fetchall()
+        return await listar_paginado_json(conn, consulta, pagina, filtros)
     except Exception as e:
         print(f"Error listado cita: {e}")
         raise HTTPException(status_code=400, detail="Error al listar citas")
 
 
+@router.get("/disponibilidad")
+async def disponibilidad_citas(
+    desde: datetime = Query(),
+    hasta: datetime = Query(),
+    veterinario_id: int | None = Query(default=None),
+    especialidad: str | None = Query(default=None),
+    conn=Depends(get_conexion_lectura),
+):
+    """Turnos libres de `duracion_minutos` por veterinario activo dentro del horario laboral."""
+    validar_rango(desde, hasta)
+    try:
+        async with conn.cursor() as cursor:
+            await cursor.execute(
+                CONSULTA_DISPONIBILIDAD,
+                parametros_disponibilidad(desde, hasta, veterinario_id, especialidad),
+            )
+            return {
+                "duracion_minutos": config.AGENDA_DURACION_MINUTOS,
+                "veterinarios": await cursor.fetchall(),
+            }
+    except Exception as e:
+        print(f"Error disponibilidad cita: {e}")
+        raise HTTPException(status_code=400, detail="Error al calcular la disponibilidad")
+
+
+@router.get("/batch")
+async def obtener_citas_lote(lote: IdsLote = Depends(), conn=Depends(get_conexion_lectura)):
+    consulta = """
+        SELECT id, fecha_hora, motivo, prioridad, estado, observaciones, mascota_id, veterinario_id
+        FROM cita
+    """
+    try:
+        return await obtener_lote(conn, consulta, lote)
+    except Exception as e:
+        print(f"Error obtener lote cita: {e}")
+        raise HTTPException(status_code=400, detail="Error al obtener citas")
+
+
 @router.get("/{id_cita}")
-async def obtener_cita(id_cita: int, conn=Depends(get_conexion)):
+async def obtener_cita(id_cita: int, campos: Campos = Depends(), conn=Depends(get_conexion_lectura)):
     consulta = """
         SELECT id, fecha_hora, motivo, prioridad, estado, observaciones, mascota_id, veterinario_id
         FROM cita
@@ -43,7 +116,7 @@ async def obtener_cita(id_cita: int, conn=Depends(get_conexion)):
     """
     try:
         async with conn.cursor() as cursor:
-            await cursor.execute(consulta, (id_cita,))
+            await cursor.execute(proyectar(consulta, campos), (id_cita,))
             fila = await cursor.fetchone()
             if not fila:
                 raise HTTPException(status_code=404, detail="Cita no encontrada")
@@ -57,81 +130,75 @@ async def obtener_cita(id_cita: int, conn=Depends(get_conexion)):
 
 @router.post("/")
 async def insertar_cita(cita: Cita, conn=Depends(get_conexion)):
-    consulta = """
-        INSERT INTO cita (id, fecha_hora, motivo, prioridad, estado, observaciones, mascota_id, veterinario_id)
-        VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-    """
     try:
         async with conn.cursor() as cursor:
-            await cursor.execute("SELECT pg_advisory_xact_lock(1002)")
-            await cursor.execute("SELECT id FROM cita ORDER BY id DESC LIMIT 1")
-            fila = await cursor.fetchone()
-            ultimo_id = (fila["id"] if isinstance(fila, dict) else fila[0]) if fila else 0
-            nuevo_id = ultimo_id + 1
-            parametros = (
-                nuevo_id,
-                cita.fecha_hora,
-                cita.motivo,
-                cita.prioridad,
-                cita.estado,
-                cita.observaciones,
-                cita.mascota_id,
-                cita.veterinario_id,
-            )
-            await cursor.execute(consulta, parametros)
+            nuevo_id = await asignador.insertar(cursor, "cita", cita.model_dump())
+            await notificar_reporte_individual(cursor, cita.mascota_id)
             await conn.commit()
-            return {"mensaje": "Cita registrada exitosamente"}
+            invalidar_reporte_individual(cita.mascota_id)
+            return {"mensaje": "Cita registrada exitosamente", "id": nuevo_id}
+    except ExclusionViolation:
+        await conn.rollback()
+        raise HTTPException(status_code=409, detail=HORARIO_OCUPADO)
     except Exception as e:
         await conn.rollback()
         print(f"Error insertar cita: {e}")
         raise HTTPException(status_code=400, detail="Error al insertar cita")
 
 
-@router.put("/{id_cita}")
-async def actualizar_cita(id_cita: int, cita: Cita, conn=Depends(get_conexion)):
-    consulta = """
-        UPDATE cita
-        SET fecha_hora = %s, motivo = %s, prioridad = %s, estado = %s, observaciones = %s,
-            mascota_id = %s, veterinario_id = %s
-        WHERE id = %s
-    """
-    parametros = (
-        cita.fecha_hora,
-        cita.motivo,
-        cita.prioridad,
-        cita.estado,
-        cita.observaciones,
-        cita.mascota_id,
-        cita.veterinario_id,
-        id_cita,
-    )
+@router.post("/bulk")
+async def insertar_citas_masivo(request: Request, conn=Depends(get_conexion)):
+    filas = await leer_filas(request)
+    try:
+        resultado = await insertar_masivo(conn, "cita", Cita, filas)
+        await limpiar_reportes_individuales(conn)
+        return resultado
+    except Exception as e:
+        await conn.rollback()
+        print(f"Error carga masiva cita: {e}")
+        raise HTTPException(status_code=400, detail="Error en la carga masiva de citas")
+
+
+async def _guardar_cita(id_cita: int, valores: dict, conn):
     try:
         async with conn.cursor() as cursor:
-            await cursor.execute("SELECT id FROM cita WHERE id = %s", (id_cita,))
-            existe = await cursor.fetchone()
-            if not existe:
-                raise HTTPException(status_code=404, detail="Cita no encontrada")
-            await cursor.execute(consulta, parametros)
+            fila = await actualizar_por_id(
+                cursor, "cita", id_cita, valores, "Cita no encontrada",
+                retorno="t.mascota_id, anterior.mascota_id AS mascota_anterior",
+            )
+            await notificar_reporte_individual(cursor, fila["mascota_anterior"], fila["mascota_id"])
             await conn.commit()
+            invalidar_reporte_individual(fila["mascota_anterior"], fila["mascota_id"])
             return {"mensaje": "Cita actualizada exitosamente"}
     except HTTPException:
         raise
+    except ExclusionViolation:
+        await conn.rollback()
+        raise HTTPException(status_code=409, detail=HORARIO_OCUPADO)
     except Exception as e:
         await conn.rollback()
         print(f"Error actualizar cita: {e}")
         raise HTTPException(status_code=400, detail="Error al actualizar cita")
 
 
+@router.put("/{id_cita}")
+async def actualizar_cita(id_cita: int, cita: Cita, conn=Depends(get_conexion)):
+    return await _guardar_cita(id_cita, cita.model_dump(), conn)
+
+
+@router.patch("/{id_cita}")
+async def modificar_cita(id_cita: int, cita: CitaParcial, conn=Depends(get_conexion)):
+    return await _guardar_cita(id_cita, cita.model_dump(exclude_unset=True), conn)
+
+
 @router.delete("/{id_cita}")
 async def eliminar_cita(id_cita: int, conn=Depends(get_conexion)):
     try:
         async with conn.cursor() as cursor:
-            await cursor.execute("SELECT id FROM cita WHERE id = %s", (id_cita,))
-            existe = await cursor.fetchone()
-            if not existe:
-                raise HTTPException(status_code=404, detail="Cita no encontrada")
-            await cursor.execute("DELETE FROM cita WHERE id = %s", (id_cita,))
+            fila = await eliminar_por_id(cursor, "cita", id_cita, "Cita no encontrada", retorno="t.mascota_id")
+            await notificar_reporte_individual(cursor, fila["mascota_id"])
             await conn.commit()
+            invalidar_reporte_individual(fila["mascota_id"])
             return {"mensaje": "Cita eliminada exitosamente"}
     except HTTPException:
         raise
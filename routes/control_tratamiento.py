@@ -1,11 +1,20 @@
 from pydantic import BaseModel
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from datetime import date
 
-from config.conexionDB import get_conexion
+from config.campos import Campos, proyectar
+from config.carga_masiva import insertar_masivo, leer_filas
+from config.conexionDB import get_conexion, get_conexion_lectura
+from config.escritura import actualizar_por_id, eliminar_por_id, modelo_parcial
+from config.identificadores import asignador
+from config.lotes import IdsLote, obtener_lote
+from config.paginacion import Pagina, listar_paginado_json
+from routes.reportes import invalidar_reporte_individual, limpiar_reportes_individuales, mascotas_de_tratamientos, notificar_reporte_individual
 
 router = APIRouter()
 
+MASCOTA_DEL_CONTROL = "(SELECT h.mascota_id FROM tratamiento tr JOIN historial_clinico h ON h.id = tr.historial_id WHERE tr.id = {}.tratamiento_id)"
+
 
 class ControlTratamiento(BaseModel):
     fecha_control: date
@@ -14,24 +23,52 @@ class ControlTratamiento(BaseModel):
     tratamiento_id: int
 
 
+ControlTratamientoParcial = modelo_parcial(ControlTratamiento)
+
+
 @router.get("/")
-async def listar_controles(conn=Depends(get_conexion)):
+async def listar_controles(
+    estado: str | None = Query(default=None),
+    tratamiento_id: int | None = Query(default=None),
+    desde: date | None = Query(default=None),
+    hasta: date | None = Query(default=None),
+    campos: Campos = Depends(),
+    pagina: Pagina = Depends(),
+    conn=Depends(get_conexion_lectura),
+):
     consulta = """
         SELECT id, fecha_control, estado, observaciones, tratamiento_id
         FROM control_tratamiento
-        ORDER BY id
     """
+    consulta = proyectar(consulta, campos)
+    filtros = {
+        "estado = %s": estado,
+        "tratamiento_id = %s": tratamiento_id,
+        "fecha_control >= %s": desde,
+        "fecha_control <= %s": hasta,
+    }
     try:
-        async with conn.cursor() as cursor:
-            await cursor.execute(consulta)
-            return await cursor.fetchall()
+        return await listar_paginado_json(conn, consulta, pagina, filtros)
     except Exception as e:
         print(f"Error listado control: {e}")
         raise HTTPException(status_code=400, detail="Error al listar controles")
 
 
+@router.get("/batch")
+async def obtener_controles_lote(lote: IdsLote = Depends(), conn=Depends(get_conexion_lectura)):
+    consulta = """
+        SELECT id, fecha_control, estado, observaciones, tratamiento_id
+        FROM control_tratamiento
+    """
+    try:
+        return await obtener_lote(conn, consulta, lote)
+    except Exception as e:
+        print(f"Error obtener lote control: {e}")
+        raise HTTPException(status_code=400, detail="Error al obtener controles")
+
+
 @router.get("/{id_control}")
-async def obtener_control(id_control: int, conn=Depends(get_conexion)):
+async def obtener_control(id_control: int, campos: Campos = Depends(), conn=Depends(get_conexion_lectura)):
     consulta = """
         SELECT id, fecha_control, estado, observaciones, tratamiento_id
         FROM control_tratamiento
@@ -39,7 +76,7 @@ async def obtener_control(id_control: int, conn=Depends(get_conexion)):
     """
     try:
         async with conn.cursor() as cursor:
-            await cursor.execute(consulta, (id_control,))
+            await cursor.execute(proyectar(consulta, campos), (id_control,))
             fila = await cursor.fetchone()
             if not fila:
                 raise HTTPException(status_code=404, detail="Control no encontrado")
@@ -53,55 +90,43 @@ async def obtener_control(id_control: int, conn=Depends(get_conexion)):
 
 @router.post("/")
 async def insertar_control(control: ControlTratamiento, conn=Depends(get_conexion)):
-    consulta = """
-        INSERT INTO control_tratamiento
-        (id, fecha_control, estado, observaciones, tratamiento_id)
-        VALUES (%s, %s, %s, %s, %s)
-    """
     try:
         async with conn.cursor() as cursor:
-            await cursor.execute("SELECT pg_advisory_xact_lock(1008)")
-            await cursor.execute("SELECT id FROM control_tratamiento ORDER BY id DESC LIMIT 1")
-            fila = await cursor.fetchone()
-            ultimo_id = (fila["id"] if isinstance(fila, dict) else fila[0]) if fila else 0
-            nuevo_id = ultimo_id + 1
-            parametros = (
-                nuevo_id,
-                control.fecha_control,
-                control.estado,
-                control.observaciones,
-                control.tratamiento_id,
-            )
-            await cursor.execute(consulta, parametros)
+            nuevo_id = await asignador.insertar(cursor, "control_tratamiento", control.model_dump())
+            mascotas = await mascotas_de_tratamientos(cursor, control.tratamiento_id)
+            await notificar_reporte_individual(cursor, *mascotas)
             await conn.commit()
-            return {"mensaje": "Control registrado"}
+            invalidar_reporte_individual(*mascotas)
+            return {"mensaje": "Control registrado", "id": nuevo_id}
     except Exception as e:
         await conn.rollback()
         print(f"Error insertar control: {e}")
         raise HTTPException(status_code=400, detail="Error al insertar control")
 
 
-@router.put("/{id_control}")
-async def actualizar_control(id_control: int, control: ControlTratamiento, conn=Depends(get_conexion)):
-    consulta = """
-        UPDATE control_tratamiento
-        SET fecha_control = %s, estado = %s, observaciones = %s, tratamiento_id = %s
-        WHERE id = %s
-    """
-    parametros = (
-        control.fecha_control,
-        control.estado,
-        control.observaciones,
-        control.tratamiento_id,
-        id_control,
-    )
+@router.post("/bulk")
+async def insertar_controles_masivo(request: Request, conn=Depends(get_conexion)):
+    filas = await leer_filas(request)
+    try:
+        resultado = await insertar_masivo(conn, "control_tratamiento", ControlTratamiento, filas)
+        await limpiar_reportes_individuales(conn)
+        return resultado
+    except Exception as e:
+        await conn.rollback()
+        print(f"Error carga masiva control: {e}")
+        raise HTTPException(status_code=400, detail="Error en la carga masiva de controles")
+
+
+async def _guardar_control(id_control: int, valores: dict, conn):
     try:
         async with conn.cursor() as cursor:
-            await cursor.execute("SELECT id FROM control_tratamiento WHERE id = %s", (id_control,))
-            if not await cursor.fetchone():
-                raise HTTPException(status_code=404, detail="Control no encontrado")
-            await cursor.execute(consulta, parametros)
+            fila = await actualizar_por_id(
+                cursor, "control_tratamiento", id_control, valores, "Control no encontrado",
+                retorno=f"{MASCOTA_DEL_CONTROL.format('t')} AS mascota_id, {MASCOTA_DEL_CONTROL.format('anterior')} AS mascota_anterior",
+            )
+            await notificar_reporte_individual(cursor, fila["mascota_anterior"], fila["mascota_id"])
             await conn.commit()
+            invalidar_reporte_individual(fila["mascota_anterior"], fila["mascota_id"])
             return {"mensaje": "Control actualizado exitosamente"}
     except HTTPException:
         raise
@@ -111,15 +136,27 @@ async def actualizar_control(id_control: int, control: ControlTratamiento, conn=
         raise HTTPException(status_code=400, detail="Error al actualizar control")
 
 
+@router.put("/{id_control}")
+async def actualizar_control(id_control: int, control: ControlTratamiento, conn=Depends(get_conexion)):
+    return await _guardar_control(id_control, control.model_dump(), conn)
+
+
+@router.patch("/{id_control}")
+async def modificar_control(id_control: int, control: ControlTratamientoParcial, conn=Depends(get_conexion)):
+    return await _guardar_control(id_control, control.model_dump(exclude_unset=True), conn)
+
+
 @router.delete("/{id_control}")
 async def eliminar_control(id_control: int, conn=Depends(get_conexion)):
     try:
         async with conn.cursor() as cursor:
-            await cursor.execute("SELECT id FROM control_tratamiento WHERE id = %s", (id_control,))
-            if not await cursor.fetchone():
-                raise HTTPException(status_code=404, detail="Control no encontrado")
-            await cursor.execute("DELETE FROM control_tratamiento WHERE id = %s", (id_control,))
+            fila = await eliminar_por_id(
+                cursor, "control_tratamiento", id_control, "Control no encontrado",
+                retorno=f"{MASCOTA_DEL_CONTROL.format('t')} AS mascota_id",
+            )
+            await notificar_reporte_individual(cursor, fila["mascota_id"])
             await conn.commit()
+            invalidar_reporte_individual(fila["mascota_id"])
             return {"mensaje": "Control eliminado exitosamente"}
     except HTTPException:
         raise
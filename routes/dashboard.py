@@ -0,0 +1,94 @@
+import asyncio
+
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from psycopg.rows import dict_row
+
+from config.conexionDB import conexion_medida, leer_de_replica
+from config.paginacion import Pagina, listar_paginado
+
+router = APIRouter()
+
+CONSULTA_PERSONAS = """
+    SELECT id, TRIM(CONCAT(nombres, ' ', apellidos)) AS nombre
+    FROM persona
+    ORDER BY id
+"""
+
+CONSULTA_DUENOS = """
+    SELECT d.id, d.persona_id, TRIM(CONCAT(p.nombres, ' ', p.apellidos)) AS nombre
+    FROM dueno d
+    LEFT JOIN persona p ON p.id = d.persona_id
+    ORDER BY d.id
+"""
+
+CONSULTA_MASCOTAS = """
+    SELECT id, nombre, especie, dueno_id
+    FROM mascota
+    ORDER BY id
+"""
+
+CONSULTA_VETERINARIOS = """
+    SELECT v.id, TRIM(CONCAT(p.nombres, ' ', p.apellidos)) AS nombre, v.especialidad
+    FROM veterinario v
+    LEFT JOIN persona p ON p.id = v.persona_id
+    ORDER BY v.id
+"""
+
+CONSULTA_CONTEOS = """
+    SELECT
+        (SELECT COUNT(*) FROM persona) AS personas,
+        (SELECT COUNT(*) FROM dueno) AS duenos,
+        (SELECT COUNT(*) FROM mascota) AS mascotas,
+        (SELECT COUNT(*) FROM veterinario) AS veterinarios,
+        (SELECT COUNT(*) FROM cita) AS citas,
+        (SELECT COUNT(*) FROM usuario) AS usuarios
+"""
+
+CONSULTA_CITAS = """
+    SELECT id, fecha_hora, motivo, prioridad, estado, observaciones, mascota_id, veterinario_id
+    FROM cita
+"""
+
+
+async def _consultar(consulta: str, lectura: bool):
+    async with conexion_medida(lectura=lectura) as conn:
+        conn.row_factory = dict_row
+        async with conn.cursor() as cursor:
+            await cursor.execute(consulta)
+            return await cursor.fetchall()
+
+
+async def _pagina_citas(pagina: Pagina, lectura: bool):
+    async with conexion_medida(lectura=lectura) as conn:
+        conn.row_factory = dict_row
+        cabeceras = Response()
+        citas = await listar_paginado(conn, cabeceras, CONSULTA_CITAS, pagina)
+        return {"datos": citas, "next_cursor": cabeceras.headers.get("X-Next-Cursor")}
+
+
+@router.get("/bootstrap")
+async def bootstrap_dashboard(request: Request, pagina: Pagina = Depends()):
+    """Proyecciones compactas para los selectores, los contadores del panel y la primera
+    página de citas, en una respuesta."""
+    lectura = leer_de_replica(request)
+    try:
+        personas, duenos, mascotas, veterinarios, conteos, citas = await asyncio.gather(
+            _consultar(CONSULTA_PERSONAS, lectura),
+            _consultar(CONSULTA_DUENOS, lectura),
+            _consultar(CONSULTA_MASCOTAS, lectura),
+            _consultar(CONSULTA_VETERINARIOS, lectura),
+            _consultar(CONSULTA_CONTEOS, lectura),
+            _pagina_citas(pagina, lectura),
+        )
+    except Exception as e:
+        print(f"Error bootstrap dashboard: {e}")
+        raise HTTPException(status_code=400, detail="Error al cargar el dashboard")
+
+    return {
+        "personas": personas,
+        "duenos": duenos,
+        "mascotas": mascotas,
+        "veterinarios": veterinarios,
+        "conteos": conteos[0],
+        "citas": citas,
+    }
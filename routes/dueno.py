@@ -1,7 +1,13 @@
 from pydantic import BaseModel
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 
-from config.conexionDB import get_conexion
+from config.campos import Campos, proyectar
+from config.conexionDB import get_conexion, get_conexion_lectura
+from config.escritura import actualizar_por_id, eliminar_por_id, modelo_parcial
+from config.identificadores import asignador
+from config.lotes import IdsLote, obtener_lote
+from config.paginacion import Pagina, listar_paginado_json
+from routes.reportes import invalidar_reporte_individual, mascotas_de_duenos, notificar_reporte_individual
 
 router = APIRouter()
 
@@ -12,24 +18,48 @@ class Dueno(BaseModel):
     activo: bool = True
 
 
+DuenoParcial = modelo_parcial(Dueno)
+
+
 @router.get("/")
-async def listar_duenos(conn=Depends(get_conexion)):
+async def listar_duenos(
+    persona_id: int | None = Query(default=None),
+    activo: bool | None = Query(default=None),
+    campos: Campos = Depends(),
+    pagina: Pagina = Depends(),
+    conn=Depends(get_conexion_lectura),
+):
     consulta = """
         SELECT id, persona_id, direccion, activo
         FROM dueno
-        ORDER BY id
     """
+    consulta = proyectar(consulta, campos)
+    filtros = {
+        "persona_id = %s": persona_id,
+        "activo = %s": activo,
+    }
     try:
-        async with conn.cursor() as cursor:
-            await cursor.execute(consulta)
-            return await cursor.fetchall()
+        return await listar_paginado_json(conn, consulta, pagina, filtros)
     except Exception as e:
         print(f"Error listado dueño: {e}")
         raise HTTPException(status_code=400, detail="Error al listar dueños")
 
 
+@router.get("/batch")
+async def obtener_duenos_lote(lote: IdsLote = Depends(), conn=Depends(get_conexion_lectura)):
+    consulta = """
+        SELECT id, persona_id, direccion, activo
+        FROM dueno
+    """
+    try:
+        return await obtener_lote(conn, consulta, lote)
+    except Exception as e:
+        print(f"Error obtener lote dueño: {e}")
+        raise HTTPException(status_code=400, detail="Error al obtener dueños")
+
+
 @router.get("/{id_dueno}")
-async def obtener_dueno(id_dueno: int, conn=Depends(get_conexion)):
+async def obtener_dueno(id_dueno: int, campos: Campos = Depends(), conn=Depends(get_conexion_lectura)):
     consulta = """
         SELECT id, persona_id, direccion, activo
         FROM dueno
@@ -37,7 +67,7 @@ async def obtener_dueno(id_dueno: int, conn=Depends(get_conexion)):
     """
     try:
         async with conn.cursor() as cursor:
-            await cursor.execute(consulta, (id_dueno,))
+            await cursor.execute(proyectar(consulta, campos), (id_dueno,))
             fila = await cursor.fetchone()
             if not fila:
                 raise HTTPException(status_code=404, detail="Dueño no encontrado")
@@ -51,53 +81,25 @@ async def obtener_dueno(id_dueno: int, conn=Depends(get_conexion)):
 
 @router.post("/")
 async def insertar_dueno(dueno: Dueno, conn=Depends(get_conexion)):
-    consulta = """
-        INSERT INTO dueno (id, persona_id, direccion, activo)
-        VALUES (%s, %s, %s, %s)
-    """
     try:
         async with conn.cursor() as cursor:
-            await cursor.execute("SELECT pg_advisory_xact_lock(1009)")
-            await cursor.execute("SELECT id FROM dueno ORDER BY id DESC LIMIT 1")
-            fila = await cursor.fetchone()
-            ultimo_id = (fila["id"] if isinstance(fila, dict) else fila[0]) if fila else 0
-            nuevo_id = ultimo_id + 1
-            parametros = (
-                nuevo_id,
-                dueno.persona_id,
-                dueno.direccion,
-                dueno.activo,
-            )
-            await cursor.execute(consulta, parametros)
+            nuevo_id = await asignador.insertar(cursor, "dueno", dueno.model_dump())
             await conn.commit()
-            return {"mensaje": "Dueño registrado exitosamente"}
+            return {"mensaje": "Dueño registrado exitosamente", "id": nuevo_id}
     except Exception as e:
         await conn.rollback()
         print(f"Error insertar dueño: {e}")
         raise HTTPException(status_code=400, detail="Error al insertar dueño")
 
 
-@router.put("/{id_dueno}")
-async def actualizar_dueno(id_dueno: int, dueno: Dueno, conn=Depends(get_conexion)):
-    consulta = """
-        UPDATE dueno
-        SET persona_id = %s, direccion = %s, activo = %s
-        WHERE id = %s
-    """
-    parametros = (
-        dueno.persona_id,
-        dueno.direccion,
-        dueno.activo,
-        id_dueno,
-    )
+async def _guardar_dueno(id_dueno: int, valores: dict, conn):
     try:
         async with conn.cursor() as cursor:
-            await cursor.execute("SELECT id FROM dueno WHERE id = %s", (id_dueno,))
-            existe = await cursor.fetchone()
-            if not existe:
-                raise HTTPException(status_code=404, detail="Dueño no encontrado")
-            await cursor.execute(consulta, parametros)
+            await actualizar_por_id(cursor, "dueno", id_dueno, valores, "Dueño no encontrado")
+            mascotas = await mascotas_de_duenos(cursor, id_dueno)
+            await notificar_reporte_individual(cursor, *mascotas)
             await conn.commit()
+            invalidar_reporte_individual(*mascotas)
             return {"mensaje": "Dueño actualizado exitosamente"}
     except HTTPException:
         raise
@@ -107,16 +109,25 @@ async def actualizar_dueno(id_dueno: int, dueno: Dueno, conn=Depends(get_conexio
         raise HTTPException(status_code=400, detail="Error al actualizar dueño")
 
 
+@router.put("/{id_dueno}")
+async def actualizar_dueno(id_dueno: int, dueno: Dueno, conn=Depends(get_conexion)):
+    return await _guardar_dueno(id_dueno, dueno.model_dump(), conn)
+
+
+@router.patch("/{id_dueno}")
+async def modificar_dueno(id_dueno: int, dueno: DuenoParcial, conn=Depends(get_conexion)):
+    return await _guardar_dueno(id_dueno, dueno.model_dump(exclude_unset=True), conn)
+
+
 @router.delete("/{id_dueno}")
 async def eliminar_dueno(id_dueno: int, conn=Depends(get_conexion)):
     try:
         async with conn.cursor() as cursor:
-            await cursor.execute("SELECT id FROM dueno WHERE id = %s", (id_dueno,))
-            existe = await cursor.fetchone()
-            if not existe:
-                raise HTTPException(status_code=404, detail="Dueño no encontrado")
-            await cursor.execute("DELETE FROM dueno WHERE id = %s", (id_dueno,))
+            mascotas = await mascotas_de_duenos(cursor, id_dueno)
+            await eliminar_por_id(cursor, "dueno", id_dueno, "Dueño no encontrado")
+            await notificar_reporte_individual(cursor, *mascotas)
             await conn.commit()
+            invalidar_reporte_individual(*mascotas)
             return {"mensaje": "Dueño eliminado exitosamente"}
     except HTTPException:
         raise
@@ -0,0 +1,98 @@
+import csv
+import io
+from typing import Literal
+
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from psycopg.rows import dict_row, tuple_row
+from psycopg_pool import PoolTimeout
+
+from config.conexionDB import conexion_medida, leer_de_replica
+from config.json_rapido import a_json
+
+router = APIRouter()
+
+TAMANO_LOTE = 2000
+
+TABLAS_EXPORTABLES = {
+    "cita": "id, fecha_hora, motivo, prioridad, estado, observaciones, mascota_id, veterinario_id",
+    "historial_clinico": "id, fecha, sintomas, diagnostico, observaciones, mascota_id, veterinario_id, cita_id",
+}
+
+
+async def _leer_lotes(tabla: str, row_factory, lectura: bool):
+    """El primer paso toma la conexión y abre el cursor sin devolver filas (produce None).
+
+    exportar_tabla lo ejecuta antes de crear la respuesta: un pool saturado o un error de
+    la consulta salen como 503/400 en lugar de cortar un 200 ya enviado.
+    """
+    consulta = f"SELECT {TABLAS_EXPORTABLES[tabla]} FROM {tabla} ORDER BY id"
+    async with conexion_medida(lectura=lectura) as conn:
+        async with conn.transaction():
+            async with conn.cursor(name=f"exportar_{tabla}", row_factory=row_factory) as cursor:
+                await cursor.execute(consulta)
+                yield None
+                while True:
+                    filas = await cursor.fetchmany(TAMANO_LOTE)
+                    if not filas:
+                        break
+                    yield filas
+
+
+async def _abrir_lotes(tabla: str, row_factory, lectura: bool):
+    lotes = _leer_lotes(tabla, row_factory, lectura)
+    try:
+        await anext(lotes)
+    except PoolTimeout:
+        raise HTTPException(status_code=503, detail="Base de datos saturada, intente nuevamente")
+    except Exception as e:
+        print(f"Error exportar {tabla}: {e}")
+        raise HTTPException(status_code=400, detail="Error al exportar la tabla")
+    return lotes
+
+
+async def _generar_ndjson(lotes):
+    try:
+        async for filas in lotes:
+            yield b"".join(a_json(fila) + b"\n" for fila in filas)
+    finally:
+        await lotes.aclose()
+
+
+async def _generar_csv(tabla: str, lotes):
+    try:
+        buffer = io.StringIO()
+        escritor = csv.writer(buffer)
+        escritor.writerow(TABLAS_EXPORTABLES[tabla].split(", "))
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+        async for filas in lotes:
+            escritor.writerows(filas)
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    finally:
+        await lotes.aclose()
+
+
+@router.get("/{tabla}")
+async def exportar_tabla(request: Request, tabla: str, formato: Literal["ndjson", "csv"] = Query(default="ndjson")):
+    if tabla not in TABLAS_EXPORTABLES:
+        raise HTTPException(status_code=404, detail="Tabla no exportable")
+
+    lectura = leer_de_replica(request)
+
+    if formato == "csv":
+        lotes = await _abrir_lotes(tabla, tuple_row, lectura)
+        return StreamingResponse(
+            _generar_csv(tabla, lotes),
+            media_type="text/csv",
+            headers={"Content-Disposition": f'attachment; filename="{tabla}.csv"'},
+        )
+    lotes = await _abrir_lotes(tabla, dict_row, lectura)
+    return StreamingResponse(
+        _generar_ndjson(lotes),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": f'attachment; filename="{tabla}.ndjson"'},
+    )
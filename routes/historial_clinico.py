@@ -1,8 +1,16 @@
 from pydantic import BaseModel
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from datetime import date
 
-from config.conexionDB import get_conexion
+from config.campos import Campos, columnas_de, proyectar
+from config.carga_masiva import insertar_masivo, leer_filas
+from config.conexionDB import get_conexion, get_conexion_lectura
+from config.escritura import actualizar_por_id, eliminar_por_id, modelo_parcial
+from config.expansion import Expansion, expandir
+from config.identificadores import asignador
+from config.lotes import IdsLote, obtener_lote
+from config.paginacion import Pagina, listar_paginado_json
+from routes.reportes import invalidar_reporte_individual, limpiar_reportes_individuales, notificar_reporte_individual
 
 router = APIRouter()
 
@@ -17,25 +25,59 @@ class HistorialClinico(BaseModel):
     cita_id: int | None = None
 
 
+HistorialClinicoParcial = modelo_parcial(HistorialClinico)
+
+
 @router.get("/")
-async def listar_historial(conn=Depends(get_conexion)):
+async def listar_historial(
+    mascota_id: int | None = Query(default=None),
+    veterinario_id: int | None = Query(default=None),
+    cita_id: int | None = Query(default=None),
+    desde: date | None = Query(default=None),
+    hasta: date | None = Query(default=None),
+    expansion: Expansion = Depends(),
+    campos: Campos = Depends(),
+    pagina: Pagina = Depends(),
+    conn=Depends(get_conexion_lectura),
+):
     consulta = """
         SELECT id, fecha, sintomas, diagnostico, observaciones,
                mascota_id, veterinario_id, cita_id
         FROM historial_clinico
-        ORDER BY id
     """
+    consulta = proyectar(
+        expandir(consulta, expansion.relaciones), campos, columnas_de(consulta) + expansion.relaciones
+    )
+    filtros = {
+        "mascota_id = %s": mascota_id,
+        "veterinario_id = %s": veterinario_id,
+        "cita_id = %s": cita_id,
+        "fecha >= %s": desde,
+        "fecha <= %s": hasta,
+    }
     try:
-        async with conn.cursor() as cursor:
-            await cursor.execute(consulta)
-            return await cursor.fetchall()
+        return await listar_paginado_json(conn, consulta, pagina, filtros)
     except Exception as e:
         print(f"Error listado historial: {e}")
         raise HTTPException(status_code=400, detail="Error al listar historial clínico")
 
 
+@router.get("/batch")
+async def obtener_historial_lote(lote: IdsLote = Depends(), conn=Depends(get_conexion_lectura)):
+    consulta = """
+        SELECT id, fecha, sintomas, diagnostico, observaciones,
+               mascota_id, veterinario_id, cita_id
+        FROM historial_clinico
+    """
+    try:
+        return await obtener_lote(conn, consulta, lote)
+    except Exception as e:
+        print(f"Error obtener lote historial: {e}")
+        raise HTTPException(status_code=400, detail="Error al obtener historial clínico")
+
+
 @router.get("/{id_historial}")
-async def obtener_historial(id_historial: int, conn=Depends(get_conexion)):
+async def obtener_historial(id_historial: int, campos: Campos = Depends(), conn=Depends(get_conexion_lectura)):
     consulta = """
         SELECT id, fecha, sintomas, diagnostico, observaciones,
                mascota_id, veterinario_id, cita_id
@@ -44,7 +86,7 @@ async def obtener_historial(id_historial: int, conn=Depends(get_conexion)):
     """
     try:
         async with conn.cursor() as cursor:
-            await cursor.execute(consulta, (id_historial,))
+            await cursor.execute(proyectar(consulta, campos), (id_historial,))
             fila = await cursor.fetchone()
             if not fila:
                 raise HTTPException(status_code=404, detail="Historial no encontrado")
@@ -58,62 +100,42 @@ async def obtener_historial(id_historial: int, conn=Depends(get_conexion)):
 
 @router.post("/")
 async def insertar_historial(historial: HistorialClinico, conn=Depends(get_conexion)):
-    consulta = """
-        INSERT INTO historial_clinico
-        (id, fecha, sintomas, diagnostico, observaciones, mascota_id, veterinario_id, cita_id)
-        VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-    """
     try:
         async with conn.cursor() as cursor:
-            await cursor.execute("SELECT pg_advisory_xact_lock(1006)")
-            await cursor.execute("SELECT id FROM historial_clinico ORDER BY id DESC LIMIT 1")
-            fila = await cursor.fetchone()
-            ultimo_id = (fila["id"] if isinstance(fila, dict) else fila[0]) if fila else 0
-            nuevo_id = ultimo_id + 1
-            parametros = (
-                nuevo_id,
-                historial.fecha,
-                historial.sintomas,
-                historial.diagnostico,
-                historial.observaciones,
-                historial.mascota_id,
-                historial.veterinario_id,
-                historial.cita_id,
-            )
-            await cursor.execute(consulta, parametros)
+            nuevo_id = await asignador.insertar(cursor, "historial_clinico", historial.model_dump())
+            await notificar_reporte_individual(cursor, historial.mascota_id)
             await conn.commit()
-            return {"mensaje": "Historial clínico registrado"}
+            invalidar_reporte_individual(historial.mascota_id)
+            return {"mensaje": "Historial clínico registrado", "id": nuevo_id}
     except Exception as e:
         await conn.rollback()
         print(f"Error insertar historial: {e}")
         raise HTTPException(status_code=400, detail="Error al insertar historial clínico")
 
 
-@router.put("/{id_historial}")
-async def actualizar_historial(id_historial: int, historial: HistorialClinico, conn=Depends(get_conexion)):
-    consulta = """
-        UPDATE historial_clinico
-        SET fecha = %s, sintomas = %s, diagnostico = %s, observaciones = %s,
-            mascota_id = %s, veterinario_id = %s, cita_id = %s
-        WHERE id = %s
-    """
-    parametros = (
-        historial.fecha,
-        historial.sintomas,
-        historial.diagnostico,
-        historial.observaciones,
-        historial.mascota_id,
-        historial.veterinario_id,
-        historial.cita_id,
-        id_historial,
-    )
+@router.post("/bulk")
+async def insertar_historial_masivo(request: Request, conn=Depends(get_conexion)):
+    filas = await leer_filas(request)
+    try:
+        resultado = await insertar_masivo(conn, "historial_clinico", HistorialClinico, filas)
+        await limpiar_reportes_individuales(conn)
+        return resultado
+    except Exception as e:
+        await conn.rollback()
+        print(f"Error carga masiva historial: {e}")
+        raise HTTPException(status_code=400, detail="Error en la carga masiva de historial clínico")
+
+
+async def _guardar_historial(id_historial: int, valores: dict, conn):
     try:
         async with conn.cursor() as cursor:
-            await cursor.execute("SELECT id FROM historial_clinico WHERE id = %s", (id_historial,))
-            if not await cursor.fetchone():
-                raise HTTPException(status_code=404, detail="Historial no encontrado")
-            await cursor.execute(consulta, parametros)
+            fila = await actualizar_por_id(
+                cursor, "historial_clinico", id_historial, valores, "Historial no encontrado",
+                retorno="t.mascota_id, anterior.mascota_id AS mascota_anterior",
+            )
+            await notificar_reporte_individual(cursor, fila["mascota_anterior"], fila["mascota_id"])
             await conn.commit()
+            invalidar_reporte_individual(fila["mascota_anterior"], fila["mascota_id"])
             return {"mensaje": "Historial actualizado exitosamente"}
     except HTTPException:
         raise
@@ -123,15 +145,24 @@ async def actualizar_historial(id_historial: int, historial: HistorialClinico, c
         raise HTTPException(status_code=400, detail="Error al actualizar historial clínico")
 
 
+@router.put("/{id_historial}")
+async def actualizar_historial(id_historial: int, historial: HistorialClinico, conn=Depends(get_conexion)):
+    return await _guardar_historial(id_historial, historial.model_dump(), conn)
+
+
+@router.patch("/{id_historial}")
+async def modificar_historial(id_historial: int, historial: HistorialClinicoParcial, conn=Depends(get_conexion)):
+    return await _guardar_historial(id_historial, historial.model_dump(exclude_unset=True), conn)
+
+
 @router.delete("/{id_historial}")
 async def eliminar_historial(id_historial: int, conn=Depends(get_conexion)):
     try:
         async with conn.cursor() as cursor:
-            await cursor.execute("SELECT id FROM historial_clinico WHERE id = %s", (id_historial,))
-            if not await cursor.fetchone():
-                raise HTTPException(status_code=404, detail="Historial no encontrado")
-            await cursor.execute("DELETE FROM historial_clinico WHERE id = %s", (id_historial,))
+            fila = await eliminar_por_id(cursor, "historial_clinico", id_historial, "Historial no encontrado", retorno="t.mascota_id")
+            await notificar_reporte_individual(cursor, fila["mascota_id"])
             await conn.commit()
+            invalidar_reporte_individual(fila["mascota_id"])
             return {"mensaje": "Historial eliminado exitosamente"}
     except HTTPException:
         raise
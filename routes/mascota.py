@@ -1,9 +1,16 @@
 from decimal import Decimal
 
 from pydantic import BaseModel
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 
-from config.conexionDB import get_conexion
+from config.cache_entidades import cache_mascotas
+from config.campos import Campos, proyectar
+from config.conexionDB import get_conexion, get_conexion_lectura
+from config.escritura import actualizar_por_id, eliminar_por_id, modelo_parcial
+from config.identificadores import asignador
+from config.lotes import IdsLote, obtener_lote
+from config.paginacion import Pagina, listar_paginado_json
+from routes.reportes import invalidar_reporte_individual, notificar_reporte_individual
 
 router = APIRouter()
 
@@ -22,25 +29,52 @@ class Mascota(BaseModel):
     dueno_id: int
 
 
+MascotaParcial = modelo_parcial(Mascota)
+
+
 @router.get("/")
-async def listar_mascotas(conn=Depends(get_conexion)):
+async def listar_mascotas(
+    especie: str | None = Query(default=None),
+    dueno_id: int | None = Query(default=None),
+    activo: bool | None = Query(default=None),
+    campos: Campos = Depends(),
+    pagina: Pagina = Depends(),
+    conn=Depends(get_conexion_lectura),
+):
     consulta = """
         SELECT id, nombre, especie, edad, sexo, peso, talla, grupo_sanguineo,
                alergias, antecedentes, activo, dueno_id
         FROM mascota
-        ORDER BY id
     """
+    consulta = proyectar(consulta, campos)
+    filtros = {
+        "especie = %s": especie,
+        "dueno_id = %s": dueno_id,
+        "activo = %s": activo,
+    }
     try:
-        async with conn.cursor() as cursor:
-            await cursor.execute(consulta)
-            return await cursor.fetchall()
+        return await listar_paginado_json(conn, consulta, pagina, filtros)
     except Exception as e:
         print(f"Error listado mascota: {e}")
         raise HTTPException(status_code=400, detail="Error al listar mascotas")
 
 
+@router.get("/batch")
+async def obtener_mascotas_lote(lote: IdsLote = Depends(), conn=Depends(get_conexion)):
+    consulta = """
+        SELECT id, nombre, especie, edad, sexo, peso, talla, grupo_sanguineo,
+               alergias, antecedentes, activo, dueno_id
+        FROM mascota
+    """
+    try:
+        return await obtener_lote(conn, consulta, lote, cache_mascotas)
+    except Exception as e:
+        print(f"Error obtener lote mascota: {e}")
+        raise HTTPException(status_code=400, detail="Error al obtener mascotas")
+
+
 @router.get("/{id_mascota}")
-async def obtener_mascota(id_mascota: int, conn=Depends(get_conexion)):
+async def obtener_mascota(id_mascota: int, campos: Campos = Depends(), conn=Depends(get_conexion)):
     consulta = """
         SELECT id, nombre, especie, edad, sexo, peso, talla, grupo_sanguineo,
                alergias, antecedentes, activo, dueno_id
@@ -49,11 +83,10 @@ async def obtener_mascota(id_mascota: int, conn=Depends(get_conexion)):
     """
     try:
         async with conn.cursor() as cursor:
-            await cursor.execute(consulta, (id_mascota,))
-            fila = await cursor.fetchone()
+            fila = await cache_mascotas.obtener(cursor, consulta, id_mascota)
             if not fila:
                 raise HTTPException(status_code=404, detail="Mascota no encontrada")
-            return fila
+            return campos.recortar(fila)
     except HTTPException:
         raise
     except Exception as e:
@@ -63,73 +96,26 @@ async def obtener_mascota(id_mascota: int, conn=Depends(get_conexion)):
 
 @router.post("/")
 async def insertar_mascota(mascota: Mascota, conn=Depends(get_conexion)):
-    consulta = """
-        INSERT INTO mascota (
-            id, nombre, especie, edad, sexo, peso, talla, grupo_sanguineo,
-            alergias, antecedentes, activo, dueno_id
-        )
-        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-    """
     try:
         async with conn.cursor() as cursor:
-            await cursor.execute("SELECT pg_advisory_xact_lock(1003)")
-            await cursor.execute("SELECT id FROM mascota ORDER BY id DESC LIMIT 1")
-            fila = await cursor.fetchone()
-            ultimo_id = (fila["id"] if isinstance(fila, dict) else fila[0]) if fila else 0
-            nuevo_id = ultimo_id + 1
-            parametros = (
-                nuevo_id,
-                mascota.nombre,
-                mascota.especie,
-                mascota.edad,
-                mascota.sexo,
-                mascota.peso,
-                mascota.talla,
-                mascota.grupo_sanguineo,
-                mascota.alergias,
-                mascota.antecedentes,
-                mascota.activo,
-                mascota.dueno_id,
-            )
-            await cursor.execute(consulta, parametros)
+            nuevo_id = await asignador.insertar(cursor, "mascota", mascota.model_dump())
             await conn.commit()
-            return {"mensaje": "Mascota registrada exitosamente"}
+            return {"mensaje": "Mascota registrada exitosamente", "id": nuevo_id}
     except Exception as e:
         await conn.rollback()
         print(f"Error insertar mascota: {e}")
         raise HTTPException(status_code=400, detail="Error al insertar mascota")
 
 
-@router.put("/{id_mascota}")
-async def actualizar_mascota(id_mascota: int, mascota: Mascota, conn=Depends(get_conexion)):
-    consulta = """
-        UPDATE mascota
-        SET nombre = %s, especie = %s, edad = %s, sexo = %s, peso = %s, talla = %s,
-            grupo_sanguineo = %s, alergias = %s, antecedentes = %s, activo = %s, dueno_id = %s
-        WHERE id = %s
-    """
-    parametros = (
-        mascota.nombre,
-        mascota.especie,
-        mascota.edad,
-        mascota.sexo,
-        mascota.peso,
-        mascota.talla,
-        mascota.grupo_sanguineo,
-        mascota.alergias,
-        mascota.antecedentes,
-        mascota.activo,
-        mascota.dueno_id,
-        id_mascota,
-    )
+async def _guardar_mascota(id_mascota: int, valores: dict, conn):
     try:
         async with conn.cursor() as cursor:
-            await cursor.execute("SELECT id FROM mascota WHERE id = %s", (id_mascota,))
-            existe = await cursor.fetchone()
-            if not existe:
-                raise HTTPException(status_code=404, detail="Mascota no encontrada")
-            await cursor.execute(consulta, parametros)
+            await actualizar_por_id(cursor, "mascota", id_mascota, valores, "Mascota no encontrada")
+            await cache_mascotas.notificar(cursor, id_mascota)
+            await notificar_reporte_individual(cursor, id_mascota)
             await conn.commit()
+            cache_mascotas.invalidar(id_mascota)
+            invalidar_reporte_individual(id_mascota)
             return {"mensaje": "Mascota actualizada exitosamente"}
     except HTTPException:
         raise
@@ -139,16 +125,26 @@ async def actualizar_mascota(id_mascota: int, mascota: Mascota, conn=Depends(get
         raise HTTPException(status_code=400, detail="Error al actualizar mascota")
 
 
+@router.put("/{id_mascota}")
+async def actualizar_mascota(id_mascota: int, mascota: Mascota, conn=Depends(get_conexion)):
+    return await _guardar_mascota(id_mascota, mascota.model_dump(), conn)
+
+
+@router.patch("/{id_mascota}")
+async def modificar_mascota(id_mascota: int, mascota: MascotaParcial, conn=Depends(get_conexion)):
+    return await _guardar_mascota(id_mascota, mascota.model_dump(exclude_unset=True), conn)
+
+
 @router.delete("/{id_mascota}")
 async def eliminar_mascota(id_mascota: int, conn=Depends(get_conexion)):
     try:
         async with conn.cursor() as cursor:
-            await cursor.execute("SELECT id FROM mascota WHERE id = %s", (id_mascota,))
-            existe = await cursor.fetchone()
-            if not existe:
-                raise HTTPException(status_code=404, detail="Mascota no encontrada")
-            await cursor.execute("DELETE FROM mascota WHERE id = %s", (id_mascota,))
+            await eliminar_por_id(cursor, "mascota", id_mascota, "Mascota no encontrada")
+            await cache_mascotas.notificar(cursor, id_mascota)
+            await notificar_reporte_individual(cursor, id_mascota)
             await conn.commit()
+            cache_mascotas.invalidar(id_mascota)
+            invalidar_reporte_individual(id_mascota)
             return {"mensaje": "Mascota eliminada exitosamente"}
     except HTTPException:
         raise
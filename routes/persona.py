@@ -1,7 +1,14 @@
 from pydantic import BaseModel
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 
-from config.conexionDB import get_conexion
+from config.cache_entidades import cache_personas
+from config.campos import Campos, proyectar
+from config.conexionDB import get_conexion, get_conexion_lectura
+from config.escritura import actualizar_por_id, eliminar_por_id, modelo_parcial
+from config.identificadores import asignador
+from config.lotes import IdsLote, obtener_lote
+from config.paginacion import Pagina, listar_paginado_json
+from routes.reportes import invalidar_reporte_individual, mascotas_de_personas, notificar_reporte_individual
 
 router = APIRouter()
 
@@ -16,24 +23,48 @@ class Persona(BaseModel):
     activo: bool
 
 
+PersonaParcial = modelo_parcial(Persona)
+
+
 @router.get("/")
-async def listar_personas(conn=Depends(get_conexion)):
+async def listar_personas(
+    ci: str | None = Query(default=None),
+    activo: bool | None = Query(default=None),
+    campos: Campos = Depends(),
+    pagina: Pagina = Depends(),
+    conn=Depends(get_conexion_lectura),
+):
     consulta = """
         SELECT id, nombres, apellidos, ci, telefono, email, direccion, activo
         FROM persona
-        ORDER BY id
     """
+    consulta = proyectar(consulta, campos)
+    filtros = {
+        "ci = %s": ci,
+        "activo = %s": activo,
+    }
     try:
-        async with conn.cursor() as cursor:
-            await cursor.execute(consulta)
-            return await cursor.fetchall()
+        return await listar_paginado_json(conn, consulta, pagina, filtros)
     except Exception as e:
         print(f"Error listado persona: {e}")
         raise HTTPException(status_code=400, detail="Error al listar personas")
 
 
+@router.get("/batch")
+async def obtener_personas_lote(lote: IdsLote = Depends(), conn=Depends(get_conexion)):
+    consulta = """
+        SELECT id, nombres, apellidos, ci, telefono, email, direccion, activo
+        FROM persona
+    """
+    try:
+        return await obtener_lote(conn, consulta, lote, cache_personas)
+    except Exception as e:
+        print(f"Error obtener lote persona: {e}")
+        raise HTTPException(status_code=400, detail="Error al obtener personas")
+
+
 @router.get("/{id_persona}")
-async def obtener_persona(id_persona: int, conn=Depends(get_conexion)):
+async def obtener_persona(id_persona: int, campos: Campos = Depends(), conn=Depends(get_conexion)):
     consulta = """
         SELECT id, nombres, apellidos, ci, telefono, email, direccion, activo
         FROM persona
@@ -41,11 +72,10 @@ async def obtener_persona(id_persona: int, conn=Depends(get_conexion)):
     """
     try:
         async with conn.cursor() as cursor:
-            await cursor.execute(consulta, (id_persona,))
-            fila = await cursor.fetchone()
+            fila = await cache_personas.obtener(cursor, consulta, id_persona)
             if not fila:
                 raise HTTPException(status_code=404, detail="Persona no encontrada")
-            return fila
+            return campos.recortar(fila)
     except HTTPException:
         raise
     except Exception as e:
@@ -55,61 +85,27 @@ async def obtener_persona(id_persona: int, conn=Depends(get_conexion)):
 
 @router.post("/")
 async def insertar_persona(persona: Persona, conn=Depends(get_conexion)):
-    consulta = """
-        INSERT INTO persona (id, nombres, apellidos, ci, telefono, email, direccion, activo)
-        VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-    """
     try:
         async with conn.cursor() as cursor:
-            await cursor.execute("SELECT pg_advisory_xact_lock(1001)")
-            await cursor.execute("SELECT id FROM persona ORDER BY id DESC LIMIT 1")
-            fila = await cursor.fetchone()
-            ultimo_id = (fila["id"] if isinstance(fila, dict) else fila[0]) if fila else 0
-            nuevo_id = ultimo_id + 1
-            parametros = (
-                nuevo_id,
-                persona.nombres,
-                persona.apellidos,
-                persona.ci,
-                persona.telefono,
-                persona.email,
-                persona.direccion,
-                persona.activo,
-            )
-            await cursor.execute(consulta, parametros)
+            nuevo_id = await asignador.insertar(cursor, "persona", persona.model_dump())
             await conn.commit()
-            return {"mensaje": "Persona registrada exitosamente"}
+            return {"mensaje": "Persona registrada exitosamente", "id": nuevo_id}
     except Exception as e:
         await conn.rollback()
         print(f"Error insertar persona: {e}")
         raise HTTPException(status_code=400, detail="Error al insertar persona")
 
 
-@router.put("/{id_persona}")
-async def actualizar_persona(id_persona: int, persona: Persona, conn=Depends(get_conexion)):
-    consulta = """
-        UPDATE persona
-        SET nombres = %s, apellidos = %s, ci = %s, telefono = %s, email = %s, direccion = %s, activo = %s
-        WHERE id = %s
-    """
-    parametros = (
-        persona.nombres,
-        persona.apellidos,
-        persona.ci,
-        persona.telefono,
-        persona.email,
-        persona.direccion,
-        persona.activo,
-        id_persona,
-    )
+async def _guardar_persona(id_persona: int, valores: dict, conn):
     try:
         async with conn.cursor() as cursor:
-            await cursor.execute("SELECT id FROM persona WHERE id = %s", (id_persona,))
-            existe = await cursor.fetchone()
-            if not existe:
-                raise HTTPException(status_code=404, detail="Persona no encontrada")
-            await cursor.execute(consulta, parametros)
+            await actualizar_por_id(cursor, "persona", id_persona, valores, "Persona no encontrada")
+            mascotas = await mascotas_de_personas(cursor, id_persona)
+            await cache_personas.notificar(cursor, id_persona)
+            await notificar_reporte_individual(cursor, *mascotas)
             await conn.commit()
+            cache_personas.invalidar(id_persona)
+            invalidar_reporte_individual(*mascotas)
             return {"mensaje": "Persona actualizada exitosamente"}
     except HTTPException:
         raise
@@ -119,16 +115,27 @@ async def actualizar_persona(id_persona: int, persona: Persona, conn=Depends(get
         raise HTTPException(status_code=400, detail="Error al actualizar persona")
 
 
+@router.put("/{id_persona}")
+async def actualizar_persona(id_persona: int, persona: Persona, conn=Depends(get_conexion)):
+    return await _guardar_persona(id_persona, persona.model_dump(), conn)
+
+
+@router.patch("/{id_persona}")
+async def modificar_persona(id_persona: int, persona: PersonaParcial, conn=Depends(get_conexion)):
+    return await _guardar_persona(id_persona, persona.model_dump(exclude_unset=True), conn)
+
+
 @router.delete("/{id_persona}")
 async def eliminar_persona(id_persona: int, conn=Depends(get_conexion)):
     try:
         async with conn.cursor() as cursor:
-            await cursor.execute("SELECT id FROM persona WHERE id = %s", (id_persona,))
-            existe = await cursor.fetchone()
-            if not existe:
-                raise HTTPException(status_code=404, detail="Persona no encontrada")
-            await cursor.execute("DELETE FROM persona WHERE id = %s", (id_persona,))
+            mascotas = await mascotas_de_personas(cursor, id_persona)
+            await eliminar_por_id(cursor, "persona", id_persona, "Persona no encontrada")
+            await cache_personas.notificar(cursor, id_persona)
+            await notificar_reporte_individual(cursor, *mascotas)
             await conn.commit()
+            cache_personas.invalidar(id_persona)
+            invalidar_reporte_individual(*mascotas)
             return {"mensaje": "Persona eliminada exitosamente"}
     except HTTPException:
         raise
@@ -1,64 +1,41 @@
 from datetime import date
+from typing import Literal
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from pydantic import BaseModel
 
-from config.conexionDB import get_conexion
+from config.cache import CacheLRU
+from config.conexionDB import get_conexion, get_conexion_lectura
+from config.configuracion import config
+from config.esquema import esquema
+from config.json_rapido import a_json
+from config.notificaciones import suscribir
+from config.trabajos import consultar_trabajo, encolar_trabajo, registrar_tipo_trabajo
 
 router = APIRouter()
 
 
-async def _obtener_columna_fecha_mascota(cursor) -> str | None:
-    await cursor.execute(
-        """
-        SELECT column_name
-        FROM information_schema.columns
-        WHERE table_schema = 'public'
-          AND table_name = 'mascota'
-          AND column_name IN ('fecha_registro', 'fecha_creacion', 'created_at')
-        ORDER BY CASE column_name
-            WHEN 'fecha_registro' THEN 1
-            WHEN 'fecha_creacion' THEN 2
-            WHEN 'created_at' THEN 3
-            ELSE 99
-        END
-        LIMIT 1
-        """
-    )
-    fila = await cursor.fetchone()
-    return fila["column_name"] if fila else None
-
-
-@router.get("/individual/{id_mascota}")
-async def reporte_individual(id_mascota: int, conn=Depends(get_conexion)):
-    try:
-        async with conn.cursor() as cursor:
-            await cursor.execute(
-                """
-                SELECT
-                    m.id AS mascota_id,
-                    m.nombre AS mascota_nombre,
-                    m.especie,
-                    m.edad,
-                    NULL::text AS raza,
-                    d.id AS dueno_id,
-                    d.persona_id AS dueno_persona_id,
-                    p.nombres AS dueno_nombres,
-                    p.apellidos AS dueno_apellidos,
-                    p.telefono AS dueno_telefono,
-                    p.email AS dueno_email
-                FROM mascota m
-                LEFT JOIN dueno d ON d.id = m.dueno_id
-                LEFT JOIN persona p ON p.id = d.persona_id
-                WHERE m.id = %s
-                """,
-                (id_mascota,),
-            )
-            perfil = await cursor.fetchone()
-            if not perfil:
-                raise HTTPException(status_code=404, detail="Mascota no encontrada")
+COLUMNAS_FECHA_MASCOTA = ("fecha_registro", "fecha_creacion", "created_at")
 
-            await cursor.execute(
-                """
+CONSULTA_REPORTE_INDIVIDUAL = """
+    SELECT json_build_object(
+        'perfil_paciente', json_build_object(
+            'mascota_id', m.id,
+            'nombre', m.nombre,
+            'especie', m.especie,
+            'raza', NULL,
+            'edad', m.edad
+        ),
+        'informacion_propietario', json_build_object(
+            'dueno_id', d.id,
+            'persona_id', d.persona_id,
+            'nombre_completo', TRIM(CONCAT(TRIM(p.nombres), ' ', TRIM(p.apellidos))),
+            'telefono', p.telefono,
+            'email', p.email
+        ),
+        'historial_citas', COALESCE((
+            SELECT json_agg(c ORDER BY c.fecha_hora DESC)
+            FROM (
                 SELECT
                     c.id AS cita_id,
                     c.fecha_hora,
@@ -68,15 +45,12 @@ async def reporte_individual(id_mascota: int, conn=Depends(get_conexion)):
                     c.observaciones,
                     c.veterinario_id
                 FROM cita c
-                WHERE c.mascota_id = %s
-                ORDER BY c.fecha_hora DESC
-                """,
-                (id_mascota,),
-            )
-            historial_citas = await cursor.fetchall()
-
-            await cursor.execute(
-                """
+                WHERE c.mascota_id = m.id
+            ) c
+        ), '[]'::json),
+        'resumen_clinico', COALESCE((
+            SELECT json_agg(h ORDER BY h.fecha DESC, h.historial_id DESC)
+            FROM (
                 SELECT
                     h.id AS historial_id,
                     h.fecha,
@@ -86,15 +60,12 @@ async def reporte_individual(id_mascota: int, conn=Depends(get_conexion)):
                     h.veterinario_id,
                     h.cita_id
                 FROM historial_clinico h
-                WHERE h.mascota_id = %s
-                ORDER BY h.fecha DESC, h.id DESC
-                """,
-                (id_mascota,),
-            )
-            resumen_clinico = await cursor.fetchall()
-
-            await cursor.execute(
-                """
+                WHERE h.mascota_id = m.id
+            ) h
+        ), '[]'::json),
+        'control_tratamientos', COALESCE((
+            SELECT json_agg(t ORDER BY t.tratamiento_id, t.fecha_control NULLS LAST, t.control_id NULLS LAST)
+            FROM (
                 SELECT
                     t.id AS tratamiento_id,
                     t.nombre AS medicamento,
@@ -109,33 +80,110 @@ async def reporte_individual(id_mascota: int, conn=Depends(get_conexion)):
                 FROM historial_clinico h
                 JOIN tratamiento t ON t.historial_id = h.id
                 LEFT JOIN control_tratamiento ct ON ct.tratamiento_id = t.id
-                WHERE h.mascota_id = %s
-                ORDER BY t.id, ct.fecha_control NULLS LAST, ct.id NULLS LAST
-                """,
-                (id_mascota,),
-            )
-            control_tratamientos = await cursor.fetchall()
-
-            return {
-                "perfil_paciente": {
-                    "mascota_id": perfil["mascota_id"],
-                    "nombre": perfil["mascota_nombre"],
-                    "especie": perfil["especie"],
-                    "raza": perfil["raza"],
-                    "edad": perfil["edad"],
-                },
-                "informacion_propietario": {
-                    "dueno_id": perfil["dueno_id"],
-                    "persona_id": perfil["dueno_persona_id"],
-                    "nombre_completo": f'{(perfil["dueno_nombres"] or "").strip()} {(perfil["dueno_apellidos"] or "").strip()}'.strip(),
-                    "telefono": perfil["dueno_telefono"],
-                    "email": perfil["dueno_email"],
-                },
-                "historial_citas": historial_citas,
-                "resumen_clinico": resumen_clinico,
-                "control_tratamientos": control_tratamientos,
-                "observacion": "El campo raza no existe en el modelo actual de mascota, por eso se devuelve null.",
-            }
+                WHERE h.mascota_id = m.id
+            ) t
+        ), '[]'::json),
+        'observacion', 'El campo raza no existe en el modelo actual de mascota, por eso se devuelve null.'
+    )::text AS reporte
+    FROM mascota m
+    LEFT JOIN dueno d ON d.id = m.dueno_id
+    LEFT JOIN persona p ON p.id = d.persona_id
+    WHERE m.id = %s
+"""
+
+cache_reporte_individual = CacheLRU(
+    tamano_maximo=config.CACHE_REPORTES_TAMANO,
+    ttl=config.CACHE_REPORTES_TTL,
+)
+
+
+CANAL_REPORTES = "reporte_individual_cambiado"
+
+
+async def notificar_reporte_individual(cursor, *mascota_ids: int | None):
+    """pg_notify antes del commit (es transaccional); los demás workers invalidan al recibirlo."""
+    ids = [str(mascota_id) for mascota_id in dict.fromkeys(mascota_ids) if mascota_id is not None]
+    if ids:
+        await cursor.execute("SELECT pg_notify(%s, %s)", (CANAL_REPORTES, ",".join(ids)))
+
+
+def invalidar_reporte_individual(*mascota_ids: int | None):
+    cache_reporte_individual.invalidar(*(mascota_id for mascota_id in mascota_ids if mascota_id is not None))
+
+
+async def limpiar_reportes_individuales(conn):
+    """Tras una carga masiva: vacía la caché aquí y en el resto de workers."""
+    await conn.execute("SELECT pg_notify(%s, '*')", (CANAL_REPORTES,))
+    await conn.commit()
+    cache_reporte_individual.limpiar()
+
+
+async def _al_cambiar_reporte(payload: str | None):
+    # None llega al reconectar el LISTEN: pudo perderse cualquier notificación.
+    if payload is None or payload == "*":
+        cache_reporte_individual.limpiar()
+        return
+    invalidar_reporte_individual(*(int(mascota_id) for mascota_id in payload.split(",") if mascota_id.isdigit()))
+
+
+suscribir(CANAL_REPORTES, _al_cambiar_reporte)
+
+
+async def mascotas_de_historiales(cursor, *historial_ids: int) -> list[int]:
+    await cursor.execute(
+        "SELECT DISTINCT mascota_id FROM historial_clinico WHERE id = ANY(%s)",
+        (list(historial_ids),),
+    )
+    return [fila["mascota_id"] for fila in await cursor.fetchall()]
+
+
+async def mascotas_de_tratamientos(cursor, *tratamiento_ids: int) -> list[int]:
+    await cursor.execute(
+        """
+        SELECT DISTINCT h.mascota_id
+        FROM tratamiento t
+        JOIN historial_clinico h ON h.id = t.historial_id
+        WHERE t.id = ANY(%s)
+        """,
+        (list(tratamiento_ids),),
+    )
+    return [fila["mascota_id"] for fila in await cursor.fetchall()]
+
+
+async def mascotas_de_duenos(cursor, *dueno_ids: int) -> list[int]:
+    await cursor.execute("SELECT id FROM mascota WHERE dueno_id = ANY(%s)", (list(dueno_ids),))
+    return [fila["id"] for fila in await cursor.fetchall()]
+
+
+async def mascotas_de_personas(cursor, *persona_ids: int) -> list[int]:
+    """Mascotas cuyo propietario es alguna de las personas; su nombre y contacto salen en el reporte."""
+    await cursor.execute(
+        """
+        SELECT m.id
+        FROM dueno d
+        JOIN mascota m ON m.dueno_id = d.id
+        WHERE d.persona_id = ANY(%s)
+        """,
+        (list(persona_ids),),
+    )
+    return [fila["id"] for fila in await cursor.fetchall()]
+
+
+@router.get("/individual/{id_mascota}")
+async def reporte_individual(id_mascota: int, conn=Depends(get_conexion)):
+    reporte = cache_reporte_individual.obtener(id_mascota)
+    if reporte is not None:
+        return Response(content=reporte, media_type="application/json")
+
+    generacion = cache_reporte_individual.generacion()
+    try:
+        async with conn.cursor() as cursor:
+            await cursor.execute(CONSULTA_REPORTE_INDIVIDUAL, (id_mascota,))
+            fila = await cursor.fetchone()
+            if not fila:
+                raise HTTPException(status_code=404, detail="Mascota no encontrada")
+            cache_reporte_individual.guardar(id_mascota, fila["reporte"], generacion)
+            return Response(content=fila["reporte"], media_type="application/json")
     except HTTPException:
         raise
     except Exception as e:
@@ -143,136 +191,185 @@ async def reporte_individual(id_mascota: int, conn=Depends(get_conexion)):
         raise HTTPException(status_code=400, detail="Error al generar reporte individual")
 
 
-@router.get("/general")
-async def reporte_general(
-    fecha_inicio: date | None = Query(default=None),
-    fecha_fin: date | None = Query(default=None),
-    conn=Depends(get_conexion),
-):
+async def calcular_reporte_general(conn, fecha_inicio: date | None, fecha_fin: date | None) -> dict:
     filtro_rango = ""
     parametros: list = []
     if fecha_inicio is not None and fecha_fin is not None:
-        filtro_rango = "WHERE c.fecha_hora::date BETWEEN %s AND %s"
+        filtro_rango = "WHERE r.dia BETWEEN %s AND %s"
         parametros = [fecha_inicio, fecha_fin]
     elif fecha_inicio is not None:
-        filtro_rango = "WHERE c.fecha_hora::date >= %s"
+        filtro_rango = "WHERE r.dia >= %s"
         parametros = [fecha_inicio]
     elif fecha_fin is not None:
-        filtro_rango = "WHERE c.fecha_hora::date <= %s"
+        filtro_rango = "WHERE r.dia <= %s"
         parametros = [fecha_fin]
 
-    try:
-        async with conn.cursor() as cursor:
-            await cursor.execute(
-                f"""
-                SELECT
-                    COUNT(*) AS total_citas,
-                    COUNT(*) FILTER (WHERE LOWER(c.estado) IN ('completada', 'completado', 'atendida', 'finalizada')) AS citas_completadas,
-                    COUNT(*) FILTER (WHERE LOWER(c.estado) = 'cancelada') AS citas_canceladas
-                FROM cita c
-                {filtro_rango}
-                """,
-                tuple(parametros),
-            )
-            estadisticas_citas = await cursor.fetchone()
+    columna_fecha_mascota = esquema.primera_columna("mascota", COLUMNAS_FECHA_MASCOTA)
+    nuevas_mascotas_mes = None
+    observacion_mascotas = None
 
-            condicion_join_citas = ""
-            if filtro_rango:
-                condicion_join_citas = f" AND {filtro_rango.replace('WHERE ', '')}"
-            await cursor.execute(
-                f"""
-                SELECT
-                    v.id AS veterinario_id,
-                    p.nombres,
-                    p.apellidos,
-                    COUNT(c.id) AS total_consultas
-                FROM veterinario v
-                LEFT JOIN persona p ON p.id = v.persona_id
-                LEFT JOIN cita c ON c.veterinario_id = v.id {condicion_join_citas}
-                GROUP BY v.id, p.nombres, p.apellidos
-                ORDER BY total_consultas DESC, v.id
-                """,
-                tuple(parametros),
-            )
-            productividad_personal = await cursor.fetchall()
-
-            columna_fecha_mascota = await _obtener_columna_fecha_mascota(cursor)
-            nuevas_mascotas_mes = None
-            observacion_mascotas = None
-            if columna_fecha_mascota:
-                await cursor.execute(
-                    f"""
-                    SELECT COUNT(*) AS total
-                    FROM mascota
-                    WHERE DATE_TRUNC('month', {columna_fecha_mascota}::timestamp) = DATE_TRUNC('month', CURRENT_DATE)
-                    """
-                )
-                fila_mes = await cursor.fetchone()
-                nuevas_mascotas_mes = fila_mes["total"] if fila_mes else 0
-            else:
-                observacion_mascotas = (
-                    "No existe columna de fecha de registro en mascota "
-                    "(fecha_registro/fecha_creacion/created_at)."
-                )
-
-            await cursor.execute(
-                f"""
-                SELECT
-                    m.especie,
-                    COUNT(*) AS total,
-                    ROUND(100.0 * COUNT(*) / NULLIF(SUM(COUNT(*)) OVER (), 0), 2) AS porcentaje
-                FROM cita c
-                JOIN mascota m ON m.id = c.mascota_id
+    # Las cinco consultas se envían juntas en modo pipeline: un solo viaje de ida y vuelta.
+    async with conn.pipeline():
+        cursor_estadisticas = await conn.execute(
+            f"""
+            SELECT
+                COALESCE(SUM(r.total), 0)::bigint AS total_citas,
+                COALESCE(SUM(r.total) FILTER (WHERE LOWER(r.estado) IN ('completada', 'completado', 'atendida', 'finalizada')), 0)::bigint AS citas_completadas,
+                COALESCE(SUM(r.total) FILTER (WHERE LOWER(r.estado) = 'cancelada'), 0)::bigint AS citas_canceladas
+            FROM resumen_cita_diario r
+            {filtro_rango}
+            """,
+            tuple(parametros),
+        )
+        cursor_productividad = await conn.execute(
+            f"""
+            SELECT
+                v.id AS veterinario_id,
+                p.nombres,
+                p.apellidos,
+                COALESCE(r.total, 0) AS total_consultas
+            FROM veterinario v
+            LEFT JOIN persona p ON p.id = v.persona_id
+            LEFT JOIN (
+                SELECT r.veterinario_id, SUM(r.total)::bigint AS total
+                FROM resumen_cita_diario r
                 {filtro_rango}
-                GROUP BY m.especie
-                ORDER BY total DESC
+                GROUP BY r.veterinario_id
+            ) r ON r.veterinario_id = v.id
+            ORDER BY total_consultas DESC, v.id
+            """,
+            tuple(parametros),
+        )
+        cursor_mascotas_mes = None
+        if columna_fecha_mascota:
+            cursor_mascotas_mes = await conn.execute(
+                f"""
+                SELECT COUNT(*) AS total
+                FROM mascota
+                WHERE DATE_TRUNC('month', {columna_fecha_mascota}::timestamp) = DATE_TRUNC('month', CURRENT_DATE)
                 """
-                if filtro_rango
-                else """
-                SELECT
-                    m.especie,
-                    COUNT(*) AS total,
-                    ROUND(100.0 * COUNT(*) / NULLIF(SUM(COUNT(*)) OVER (), 0), 2) AS porcentaje
-                FROM cita c
-                JOIN mascota m ON m.id = c.mascota_id
-                GROUP BY m.especie
-                ORDER BY total DESC
-                """,
-                tuple(parametros),
             )
-            especies_mas_atendidas = await cursor.fetchall()
+        cursor_especies = await conn.execute(
+            f"""
+            SELECT
+                r.especie,
+                SUM(r.total)::bigint AS total,
+                ROUND(100.0 * SUM(r.total) / NULLIF(SUM(SUM(r.total)) OVER (), 0), 2) AS porcentaje
+            FROM resumen_cita_diario r
+            {filtro_rango}
+            GROUP BY r.especie
+            HAVING SUM(r.total) > 0
+            ORDER BY total DESC
+            """,
+            tuple(parametros),
+        )
+        cursor_tratamientos = await conn.execute(
+            """
+            SELECT COUNT(*) AS tratamientos_en_curso
+            FROM tratamiento t
+            WHERE LOWER(t.estado) IN ('activo', 'en curso', 'en_curso', 'pendiente')
+               OR (t.fecha_fin IS NULL AND LOWER(t.estado) <> 'finalizado')
+            """
+        )
 
-            await cursor.execute(
-                """
-                SELECT COUNT(*) AS tratamientos_en_curso
-                FROM tratamiento t
-                WHERE LOWER(t.estado) IN ('activo', 'en curso', 'en_curso', 'pendiente')
-                   OR (t.fecha_fin IS NULL AND LOWER(t.estado) <> 'finalizado')
-                """
+        estadisticas_citas = await cursor_estadisticas.fetchone()
+        productividad_personal = await cursor_productividad.fetchall()
+        if cursor_mascotas_mes is not None:
+            fila_mes = await cursor_mascotas_mes.fetchone()
+            nuevas_mascotas_mes = fila_mes["total"] if fila_mes else 0
+        else:
+            observacion_mascotas = (
+                "No existe columna de fecha de registro en mascota "
+                "(fecha_registro/fecha_creacion/created_at)."
+            )
+        especies_mas_atendidas = await cursor_especies.fetchall()
+        seguimiento_tratamientos = await cursor_tratamientos.fetchone()
+
+    return {
+        "rango_fechas": {"fecha_inicio": fecha_inicio, "fecha_fin": fecha_fin},
+        "estadisticas_citas": {
+            "total_citas": estadisticas_citas["total_citas"] if estadisticas_citas else 0,
+            "citas_completadas": estadisticas_citas["citas_completadas"] if estadisticas_citas else 0,
+            "citas_canceladas": estadisticas_citas["citas_canceladas"] if estadisticas_citas else 0,
+        },
+        "productividad_personal": productividad_personal,
+        "analisis_pacientes": {
+            "nuevas_mascotas_mes": nuevas_mascotas_mes,
+            "especies_mas_atendidas": especies_mas_atendidas,
+            "observacion": observacion_mascotas,
+        },
+        "seguimiento_tratamientos": {
+            "tratamientos_en_curso": (
+                seguimiento_tratamientos["tratamientos_en_curso"]
+                if seguimiento_tratamientos
+                else 0
             )
-            seguimiento_tratamientos = await cursor.fetchone()
-
-            return {
-                "rango_fechas": {"fecha_inicio": fecha_inicio, "fecha_fin": fecha_fin},
-                "estadisticas_citas": {
-                    "total_citas": estadisticas_citas["total_citas"] if estadisticas_citas else 0,
-                    "citas_completadas": estadisticas_citas["citas_completadas"] if estadisticas_citas else 0,
-                    "citas_canceladas": estadisticas_citas["citas_canceladas"] if estadisticas_citas else 0,
-                },
-                "productividad_personal": productividad_personal,
-                "analisis_pacientes": {
-                    "nuevas_mascotas_mes": nuevas_mascotas_mes,
-                    "especies_mas_atendidas": especies_mas_atendidas,
-                    "observacion": observacion_mascotas,
-                },
-                "seguimiento_tratamientos": {
-                    "tratamientos_en_curso": (
-                        seguimiento_tratamientos["tratamientos_en_curso"]
-                        if seguimiento_tratamientos
-                        else 0
-                    )
-                },
-            }
+        },
+    }
+
+
+@router.get("/general")
+async def reporte_general(
+    fecha_inicio: date | None = Query(default=None),
+    fecha_fin: date | None = Query(default=None),
+    conn=Depends(get_conexion_lectura),
+):
+    try:
+        return await calcular_reporte_general(conn, fecha_inicio, fecha_fin)
     except Exception as e:
         print(f"Error reporte general: {e}")
         raise HTTPException(status_code=400, detail="Error al generar reporte general")
+
+
+class ReporteJob(BaseModel):
+    tipo: Literal["general"] = "general"
+    fecha_inicio: date | None = None
+    fecha_fin: date | None = None
+
+
+async def _trabajo_reporte_general(conn, parametros: dict) -> dict:
+    fecha_inicio, fecha_fin = (
+        date.fromisoformat(parametros[clave]) if parametros.get(clave) else None
+        for clave in ("fecha_inicio", "fecha_fin")
+    )
+    return await calcular_reporte_general(conn, fecha_inicio, fecha_fin)
+
+
+registrar_tipo_trabajo(
+    "general",
+    _trabajo_reporte_general,
+    ("resumen_cita_diario", "cita", "mascota", "veterinario", "persona", "tratamiento"),
+)
+
+
+@router.post("/jobs", status_code=202)
+async def crear_reporte_job(job: ReporteJob, conn=Depends(get_conexion)):
+    """Encola el reporte; si ya hay uno con los mismos parámetros y datos, devuelve ese."""
+    try:
+        id_trabajo, reutilizado = await encolar_trabajo(conn, job.tipo, job.model_dump(mode="json", exclude={"tipo"}))
+        return {"mensaje": "Reporte encolado", "id": id_trabajo, "reutilizado": reutilizado}
+    except Exception as e:
+        await conn.rollback()
+        print(f"Error encolar reporte: {e}")
+        raise HTTPException(status_code=400, detail="Error al encolar el reporte")
+
+
+@router.get("/jobs/{id_trabajo}")
+async def obtener_reporte_job(id_trabajo: int, conn=Depends(get_conexion)):
+    try:
+        async with conn.cursor() as cursor:
+            trabajo = await consultar_trabajo(cursor, id_trabajo)
+            if not trabajo:
+                raise HTTPException(status_code=404, detail="Reporte no encontrado")
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"Error obtener reporte job: {e}")
+        raise HTTPException(status_code=400, detail="Error al obtener el reporte")
+
+    # El resultado ya está serializado: se inserta tal cual, sin volver a decodificarlo.
+    resultado = trabajo.pop("resultado")
+    cuerpo = a_json(trabajo)
+    if resultado is not None:
+        cuerpo = cuerpo[:-1] + b',"resultado":' + resultado + b"}"
+    return Response(content=cuerpo, media_type="application/json")
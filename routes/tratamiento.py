@@ -1,11 +1,19 @@
 from pydantic import BaseModel
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from datetime import date
 
-from config.conexionDB import get_conexion
+from config.campos import Campos, proyectar
+from config.conexionDB import get_conexion, get_conexion_lectura
+from config.escritura import actualizar_por_id, eliminar_por_id, modelo_parcial
+from config.identificadores import asignador
+from config.lotes import IdsLote, obtener_lote
+from config.paginacion import Pagina, listar_paginado_json
+from routes.reportes import invalidar_reporte_individual, mascotas_de_historiales, notificar_reporte_individual
 
 router = APIRouter()
 
+MASCOTA_DEL_TRATAMIENTO = "(SELECT h.mascota_id FROM historial_clinico h WHERE h.id = {}.historial_id)"
+
 
 class Tratamiento(BaseModel):
     nombre: str
@@ -16,24 +24,52 @@ class Tratamiento(BaseModel):
     historial_id: int
 
 
+TratamientoParcial = modelo_parcial(Tratamiento)
+
+
 @router.get("/")
-async def listar_tratamientos(conn=Depends(get_conexion)):
+async def listar_tratamientos(
+    estado: str | None = Query(default=None),
+    historial_id: int | None = Query(default=None),
+    desde: date | None = Query(default=None),
+    hasta: date | None = Query(default=None),
+    campos: Campos = Depends(),
+    pagina: Pagina = Depends(),
+    conn=Depends(get_conexion_lectura),
+):
     consulta = """
         SELECT id, nombre, estado, fecha_inicio, fecha_fin, objetivo, historial_id
         FROM tratamiento
-        ORDER BY id
     """
+    consulta = proyectar(consulta, campos)
+    filtros = {
+        "estado = %s": estado,
+        "historial_id = %s": historial_id,
+        "fecha_inicio >= %s": desde,
+        "fecha_inicio <= %s": hasta,
+    }
     try:
-        async with conn.cursor() as cursor:
-            await cursor.execute(consulta)
-            return await cursor.fetchall()
+        return await listar_paginado_json(conn, consulta, pagina, filtros)
     except Exception as e:
         print(f"Error listado tratamiento: {e}")
         raise HTTPException(status_code=400, detail="Error al listar tratamientos")
 
 
+@router.get("/batch")
+async def obtener_tratamientos_lote(lote: IdsLote = Depends(), conn=Depends(get_conexion_lectura)):
+    consulta = """
+        SELECT id, nombre, estado, fecha_inicio, fecha_fin, objetivo, historial_id
+        FROM tratamiento
+    """
+    try:
+        return await obtener_lote(conn, consulta, lote)
+    except Exception as e:
+        print(f"Error obtener lote tratamiento: {e}")
+        raise HTTPException(status_code=400, detail="Error al obtener tratamientos")
+
+
 @router.get("/{id_tratamiento}")
-async def obtener_tratamiento(id_tratamiento: int, conn=Depends(get_conexion)):
+async def obtener_tratamiento(id_tratamiento: int, campos: Campos = Depends(), conn=Depends(get_conexion_lectura)):
     consulta = """
         SELECT id, nombre, estado, fecha_inicio, fecha_fin, objetivo, historial_id
         FROM tratamiento
@@ -41,7 +77,7 @@ async def obtener_tratamiento(id_tratamiento: int, conn=Depends(get_conexion)):
     """
     try:
         async with conn.cursor() as cursor:
-            await cursor.execute(consulta, (id_tratamiento,))
+            await cursor.execute(proyectar(consulta, campos), (id_tratamiento,))
             fila = await cursor.fetchone()
             if not fila:
                 raise HTTPException(status_code=404, detail="Tratamiento no encontrado")
@@ -55,60 +91,30 @@ async def obtener_tratamiento(id_tratamiento: int, conn=Depends(get_conexion)):
 
 @router.post("/")
 async def insertar_tratamiento(tratamiento: Tratamiento, conn=Depends(get_conexion)):
-    consulta = """
-        INSERT INTO tratamiento
-        (id, nombre, estado, fecha_inicio, fecha_fin, objetivo, historial_id)
-        VALUES (%s, %s, %s, %s, %s, %s, %s)
-    """
     try:
         async with conn.cursor() as cursor:
-            await cursor.execute("SELECT pg_advisory_xact_lock(1007)")
-            await cursor.execute("SELECT id FROM tratamiento ORDER BY id DESC LIMIT 1")
-            fila = await cursor.fetchone()
-            ultimo_id = (fila["id"] if isinstance(fila, dict) else fila[0]) if fila else 0
-            nuevo_id = ultimo_id + 1
-            parametros = (
-                nuevo_id,
-                tratamiento.nombre,
-                tratamiento.estado,
-                tratamiento.fecha_inicio,
-                tratamiento.fecha_fin,
-                tratamiento.objetivo,
-                tratamiento.historial_id,
-            )
-            await cursor.execute(consulta, parametros)
+            nuevo_id = await asignador.insertar(cursor, "tratamiento", tratamiento.model_dump())
+            mascotas = await mascotas_de_historiales(cursor, tratamiento.historial_id)
+            await notificar_reporte_individual(cursor, *mascotas)
             await conn.commit()
-            return {"mensaje": "Tratamiento registrado"}
+            invalidar_reporte_individual(*mascotas)
+            return {"mensaje": "Tratamiento registrado", "id": nuevo_id}
     except Exception as e:
         await conn.rollback()
         print(f"Error insertar tratamiento: {e}")
         raise HTTPException(status_code=400, detail="Error al insertar tratamiento")
 
 
-@router.put("/{id_tratamiento}")
-async def actualizar_tratamiento(id_tratamiento: int, tratamiento: Tratamiento, conn=Depends(get_conexion)):
-    consulta = """
-        UPDATE tratamiento
-        SET nombre = %s, estado = %s, fecha_inicio = %s, fecha_fin = %s,
-            objetivo = %s, historial_id = %s
-        WHERE id = %s
-    """
-    parametros = (
-        tratamiento.nombre,
-        tratamiento.estado,
-        tratamiento.fecha_inicio,
-        tratamiento.fecha_fin,
-        tratamiento.objetivo,
-        tratamiento.historial_id,
-        id_tratamiento,
-    )
+async def _guardar_tratamiento(id_tratamiento: int, valores: dict, conn):
     try:
         async with conn.cursor() as cursor:
-            await cursor.execute("SELECT id FROM tratamiento WHERE id = %s", (id_tratamiento,))
-            if not await cursor.fetchone():
-                raise HTTPException(status_code=404, detail="Tratamiento no encontrado")
-            await cursor.execute(consulta, parametros)
+            fila = await actualizar_por_id(
+                cursor, "tratamiento", id_tratamiento, valores, "Tratamiento no encontrado",
+                retorno=f"{MASCOTA_DEL_TRATAMIENTO.format('t')} AS mascota_id, {MASCOTA_DEL_TRATAMIENTO.format('anterior')} AS mascota_anterior",
+            )
+            await notificar_reporte_individual(cursor, fila["mascota_anterior"], fila["mascota_id"])
             await conn.commit()
+            invalidar_reporte_individual(fila["mascota_anterior"], fila["mascota_id"])
             return {"mensaje": "Tratamiento actualizado exitosamente"}
     except HTTPException:
         raise
@@ -118,15 +124,27 @@ async def actualizar_tratamiento(id_tratamiento: int, tratamiento: Tratamiento,
         raise HTTPException(status_code=400, detail="Error al actualizar tratamiento")
 
 
+@router.put("/{id_tratamiento}")
+async def actualizar_tratamiento(id_tratamiento: int, tratamiento: Tratamiento, conn=Depends(get_conexion)):
+    return await _guardar_tratamiento(id_tratamiento, tratamiento.model_dump(), conn)
+
+
+@router.patch("/{id_tratamiento}")
+async def modificar_tratamiento(id_tratamiento: int, tratamiento: TratamientoParcial, conn=Depends(get_conexion)):
+    return await _guardar_tratamiento(id_tratamiento, tratamiento.model_dump(exclude_unset=True), conn)
+
+
 @router.delete("/{id_tratamiento}")
 async def eliminar_tratamiento(id_tratamiento: int, conn=Depends(get_conexion)):
     try:
         async with conn.cursor() as cursor:
-            await cursor.execute("SELECT id FROM tratamiento WHERE id = %s", (id_tratamiento,))
-            if not await cursor.fetchone():
-                raise HTTPException(status_code=404, detail="Tratamiento no encontrado")
-            await cursor.execute("DELETE FROM tratamiento WHERE id = %s", (id_tratamiento,))
+            fila = await eliminar_por_id(
+                cursor, "tratamiento", id_tratamiento, "Tratamiento no encontrado",
+                retorno=f"{MASCOTA_DEL_TRATAMIENTO.format('t')} AS mascota_id",
+            )
+            await notificar_reporte_individual(cursor, fila["mascota_id"])
             await conn.commit()
+            invalidar_reporte_individual(fila["mascota_id"])
             return {"mensaje": "Tratamiento eliminado exitosamente"}
     except HTTPException:
         raise
@@ -1,7 +1,26 @@
 from pydantic import BaseModel
-from fastapi import APIRouter, Depends, HTTPException
-
-from config.conexionDB import get_conexion
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from psycopg.rows import dict_row
+from psycopg_pool import PoolTimeout
+
+from config.autenticacion import (
+    crear_token,
+    es_hash,
+    hashear_password_async,
+    liberar_intento_login,
+    preparar_password,
+    registrar_exito_login,
+    reservar_intento_login,
+    sesion_actual,
+    verificar_password_async,
+)
+from config.campos import Campos, proyectar
+from config.conexionDB import conexion_medida, get_conexion, get_conexion_lectura
+from config.configuracion import config
+from config.escritura import actualizar_por_id, eliminar_por_id, modelo_parcial
+from config.identificadores import asignador
+from config.lotes import IdsLote, obtener_lote
+from config.paginacion import Pagina, listar_paginado_json
 
 router = APIRouter()
 
@@ -13,29 +32,58 @@ class Usuario(BaseModel):
     veterinario_id: int
 
 
+UsuarioParcial = modelo_parcial(Usuario)
+
+
 class LoginRequest(BaseModel):
     username: str
     password: str
 
 
-@router.get("/")
-async def listar_usuarios(conn=Depends(get_conexion)):
+@router.get("/", dependencies=[Depends(sesion_actual)])
+async def listar_usuarios(
+    veterinario_id: int | None = Query(default=None),
+    activo: bool | None = Query(default=None),
+    campos: Campos = Depends(),
+    pagina: Pagina = Depends(),
+    conn=Depends(get_conexion_lectura),
+):
     consulta = """
         SELECT id, username, password_hash, activo, veterinario_id
         FROM usuario
-        ORDER BY id
     """
+    consulta = proyectar(consulta, campos)
+    filtros = {
+        "veterinario_id = %s": veterinario_id,
+        "activo = %s": activo,
+    }
     try:
-        async with conn.cursor() as cursor:
-            await cursor.execute(consulta)
-            return await cursor.fetchall()
+        return await listar_paginado_json(conn, consulta, pagina, filtros)
     except Exception as e:
         print(f"Error listado usuario: {e}")
         raise HTTPException(status_code=400, detail="Error al listar usuarios")
 
 
-@router.get("/{id_usuario}")
-async def obtener_usuario(id_usuario: int, conn=Depends(get_conexion)):
+@router.get("/batch", dependencies=[Depends(sesion_actual)])
+async def obtener_usuarios_lote(lote: IdsLote = Depends(), conn=Depends(get_conexion_lectura)):
+    consulta = """
+        SELECT id, username, password_hash, activo, veterinario_id
+        FROM usuario
+    """
+    try:
+        return await obtener_lote(conn, consulta, lote)
+    except Exception as e:
+        print(f"Error obtener lote usuario: {e}")
+        raise HTTPException(status_code=400, detail="Error al obtener usuarios")
+
+
+@router.get("/sesion")
+async def obtener_sesion(sesion: dict = Depends(sesion_actual)):
+    return {"usuario": {clave: valor for clave, valor in sesion.items() if clave != "exp"}}
+
+
+@router.get("/{id_usuario}", dependencies=[Depends(sesion_actual)])
+async def obtener_usuario(id_usuario: int, campos: Campos = Depends(), conn=Depends(get_conexion_lectura)):
     consulta = """
         SELECT id, username, password_hash, activo, veterinario_id
         FROM usuario
@@ -43,7 +91,7 @@ async def obtener_usuario(id_usuario: int, conn=Depends(get_conexion)):
     """
     try:
         async with conn.cursor() as cursor:
-            await cursor.execute(consulta, (id_usuario,))
+            await cursor.execute(proyectar(consulta, campos), (id_usuario,))
             fila = await cursor.fetchone()
             if not fila:
                 raise HTTPException(status_code=404, detail="Usuario no encontrado")
@@ -56,7 +104,13 @@ async def obtener_usuario(id_usuario: int, conn=Depends(get_conexion)):
 
 
 @router.post("/login")
-async def login_usuario(data: LoginRequest, conn=Depends(get_conexion)):
+async def login_usuario(data: LoginRequest, request: Request):
+    """Los intentos bloqueados se rechazan antes de pedir una conexión al pool.
+
+    Cada intento cuenta como fallo desde que se admite; solo un login correcto lo descuenta.
+    """
+    ip = request.client.host if request.client else "desconocida"
+    reservar_intento_login(data.username, ip)
     consulta = """
         SELECT id, username, password_hash, activo, veterinario_id
         FROM usuario
@@ -64,80 +118,66 @@ async def login_usuario(data: LoginRequest, conn=Depends(get_conexion)):
         LIMIT 1
     """
     try:
-        async with conn.cursor() as cursor:
-            await cursor.execute(consulta, (data.username,))
-            usuario = await cursor.fetchone()
-            if not usuario:
-                raise HTTPException(status_code=401, detail="Credenciales incorrectas")
-            if not usuario["activo"]:
-                raise HTTPException(status_code=403, detail="Usuario inactivo")
-            if usuario["password_hash"] != data.password:
-                raise HTTPException(status_code=401, detail="Credenciales incorrectas")
-            return {
-                "mensaje": "Login exitoso",
-                "usuario": {
-                    "id": usuario["id"],
-                    "username": usuario["username"],
-                    "veterinario_id": usuario["veterinario_id"],
-                },
-            }
+        async with conexion_medida() as conn:
+            async with conn.cursor(row_factory=dict_row) as cursor:
+                await cursor.execute(consulta, (data.username,))
+                usuario = await cursor.fetchone()
+                await conn.commit()
+
+        # El hash se verifica fuera de la conexión para no retenerla durante scrypt.
+        almacenado = usuario["password_hash"] if usuario else None
+        if not await verificar_password_async(data.password, almacenado):
+            raise HTTPException(status_code=401, detail="Credenciales incorrectas")
+        if not usuario["activo"]:
+            raise HTTPException(status_code=403, detail="Usuario inactivo")
+        registrar_exito_login(data.username, ip)
+
+        if not es_hash(almacenado):
+            nuevo_hash = await hashear_password_async(data.password)
+            async with conexion_medida() as conn:
+                await conn.execute("UPDATE usuario SET password_hash = %s WHERE id = %s", (nuevo_hash, usuario["id"]))
+                await conn.commit()
+
+        datos_usuario = {
+            "id": usuario["id"],
+            "username": usuario["username"],
+            "veterinario_id": usuario["veterinario_id"],
+        }
+        return {
+            "mensaje": "Login exitoso",
+            "usuario": datos_usuario,
+            "token": crear_token(datos_usuario),
+            "expira_en": config.SESION_TTL,
+        }
     except HTTPException:
         raise
+    except PoolTimeout:
+        liberar_intento_login(data.username, ip)
+        raise HTTPException(status_code=503, detail="Base de datos saturada, intente nuevamente")
     except Exception as e:
+        liberar_intento_login(data.username, ip)
         print(f"Error login usuario: {e}")
         raise HTTPException(status_code=400, detail="Error en login")
 
 
-@router.post("/")
+@router.post("/", dependencies=[Depends(sesion_actual)])
 async def insertar_usuario(usuario: Usuario, conn=Depends(get_conexion)):
-    consulta = """
-        INSERT INTO usuario (id, username, password_hash, activo, veterinario_id)
-        VALUES (%s, %s, %s, %s, %s)
-    """
     try:
         async with conn.cursor() as cursor:
-            await cursor.execute("SELECT pg_advisory_xact_lock(1004)")
-            await cursor.execute("SELECT id FROM usuario ORDER BY id DESC LIMIT 1")
-            fila = await cursor.fetchone()
-            ultimo_id = (fila["id"] if isinstance(fila, dict) else fila[0]) if fila else 0
-            nuevo_id = ultimo_id + 1
-            parametros = (
-                nuevo_id,
-                usuario.username,
-                usuario.password_hash,
-                usuario.activo,
-                usuario.veterinario_id,
-            )
-            await cursor.execute(consulta, parametros)
+            valores = await preparar_password(usuario.model_dump())
+            nuevo_id = await asignador.insertar(cursor, "usuario", valores)
             await conn.commit()
-            return {"mensaje": "Usuario registrado exitosamente"}
+            return {"mensaje": "Usuario registrado exitosamente", "id": nuevo_id}
     except Exception as e:
         await conn.rollback()
         print(f"Error insertar usuario: {e}")
         raise HTTPException(status_code=400, detail="Error al insertar usuario")
 
 
-@router.put("/{id_usuario}")
-async def actualizar_usuario(id_usuario: int, usuario: Usuario, conn=Depends(get_conexion)):
-    consulta = """
-        UPDATE usuario
-        SET username = %s, password_hash = %s, activo = %s, veterinario_id = %s
-        WHERE id = %s
-    """
-    parametros = (
-        usuario.username,
-        usuario.password_hash,
-        usuario.activo,
-        usuario.veterinario_id,
-        id_usuario,
-    )
+async def _guardar_usuario(id_usuario: int, valores: dict, conn):
     try:
         async with conn.cursor() as cursor:
-            await cursor.execute("SELECT id FROM usuario WHERE id = %s", (id_usuario,))
-            existe = await cursor.fetchone()
-            if not existe:
-                raise HTTPException(status_code=404, detail="Usuario no encontrado")
-            await cursor.execute(consulta, parametros)
+            await actualizar_por_id(cursor, "usuario", id_usuario, await preparar_password(valores), "Usuario no encontrado")
             await conn.commit()
             return {"mensaje": "Usuario actualizado exitosamente"}
     except HTTPException:
@@ -148,15 +188,21 @@ async def actualizar_usuario(id_usuario: int, usuario: Usuario, conn=Depends(get
         raise HTTPException(status_code=400, detail="Error al actualizar usuario")
 
 
-@router.delete("/{id_usuario}")
+@router.put("/{id_usuario}", dependencies=[Depends(sesion_actual)])
+async def actualizar_usuario(id_usuario: int, usuario: Usuario, conn=Depends(get_conexion)):
+    return await _guardar_usuario(id_usuario, usuario.model_dump(), conn)
+
+
+@router.patch("/{id_usuario}", dependencies=[Depends(sesion_actual)])
+async def modificar_usuario(id_usuario: int, usuario: UsuarioParcial, conn=Depends(get_conexion)):
+    return await _guardar_usuario(id_usuario, usuario.model_dump(exclude_unset=True), conn)
+
+
+@router.delete("/{id_usuario}", dependencies=[Depends(sesion_actual)])
 async def eliminar_usuario(id_usuario: int, conn=Depends(get_conexion)):
     try:
         async with conn.cursor() as cursor:
-            await cursor.execute("SELECT id FROM usuario WHERE id = %s", (id_usuario,))
-            existe = await cursor.fetchone()
-            if not existe:
-                raise HTTPException(status_code=404, detail="Usuario no encontrado")
-            await cursor.execute("DELETE FROM usuario WHERE id = %s", (id_usuario,))
+            await eliminar_por_id(cursor, "usuario", id_usuario, "Usuario no encontrado")
             await conn.commit()
             return {"mensaje": "Usuario eliminado exitosamente"}
     except HTTPException:
@@ -1,7 +1,16 @@
+from datetime import datetime
+
 from pydantic import BaseModel
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 
-from config.conexionDB import get_conexion
+from config.agenda import CONSULTA_AGENDA, duracion_turno, validar_rango
+from config.cache_entidades import cache_veterinarios
+from config.campos import Campos, proyectar
+from config.conexionDB import get_conexion, get_conexion_lectura
+from config.escritura import actualizar_por_id, eliminar_por_id, modelo_parcial
+from config.identificadores import asignador
+from config.lotes import IdsLote, obtener_lote
+from config.paginacion import Pagina, listar_paginado_json
 
 router = APIRouter()
 
@@ -13,24 +22,65 @@ class Veterinario(BaseModel):
     persona_id: int
 
 
+VeterinarioParcial = modelo_parcial(Veterinario)
+
+
 @router.get("/")
-async def listar_veterinarios(conn=Depends(get_conexion)):
+async def listar_veterinarios(
+    especialidad: str | None = Query(default=None),
+    activo: bool | None = Query(default=None),
+    campos: Campos = Depends(),
+    pagina: Pagina = Depends(),
+    conn=Depends(get_conexion_lectura),
+):
     consulta = """
         SELECT id, licencia, especialidad, activo, persona_id
         FROM veterinario
-        ORDER BY id
     """
+    consulta = proyectar(consulta, campos)
+    filtros = {
+        "especialidad = %s": especialidad,
+        "activo = %s": activo,
+    }
     try:
-        async with conn.cursor() as cursor:
-            await cursor.execute(consulta)
-            return await cursor.fetchall()
+        return await listar_paginado_json(conn, consulta, pagina, filtros)
     except Exception as e:
         print(f"Error listado veterinario: {e}")
         raise HTTPException(status_code=400, detail="Error al listar veterinarios")
 
 
+@router.get("/batch")
+async def obtener_veterinarios_lote(lote: IdsLote = Depends(), conn=Depends(get_conexion)):
+    consulta = """
+        SELECT id, licencia, especialidad, activo, persona_id
+        FROM veterinario
+    """
+    try:
+        return await obtener_lote(conn, consulta, lote, cache_veterinarios)
+    except Exception as e:
+        print(f"Error obtener lote veterinario: {e}")
+        raise HTTPException(status_code=400, detail="Error al obtener veterinarios")
+
+
+@router.get("/{id_veterinario}/agenda")
+async def agenda_veterinario(
+    id_veterinario: int,
+    desde: datetime = Query(),
+    hasta: datetime = Query(),
+    conn=Depends(get_conexion_lectura),
+):
+    validar_rango(desde, hasta)
+    try:
+        async with conn.cursor() as cursor:
+            await cursor.execute(CONSULTA_AGENDA, (duracion_turno(), id_veterinario, desde, hasta))
+            return await cursor.fetchall()
+    except Exception as e:
+        print(f"Error agenda veterinario: {e}")
+        raise HTTPException(status_code=400, detail="Error al obtener la agenda del veterinario")
+
+
 @router.get("/{id_veterinario}")
-async def obtener_veterinario(id_veterinario: int, conn=Depends(get_conexion)):
+async def obtener_veterinario(id_veterinario: int, campos: Campos = Depends(), conn=Depends(get_conexion)):
     consulta = """
         SELECT id, licencia, especialidad, activo, persona_id
         FROM veterinario
@@ -38,11 +88,10 @@ async def obtener_veterinario(id_veterinario: int, conn=Depends(get_conexion)):
     """
     try:
         async with conn.cursor() as cursor:
-            await cursor.execute(consulta, (id_veterinario,))
-            fila = await cursor.fetchone()
+            fila = await cache_veterinarios.obtener(cursor, consulta, id_veterinario)
             if not fila:
                 raise HTTPException(status_code=404, detail="Veterinario no encontrado")
-            return fila
+            return campos.recortar(fila)
     except HTTPException:
         raise
     except Exception as e:
@@ -52,54 +101,24 @@ async def obtener_veterinario(id_veterinario: int, conn=Depends(get_conexion)):
 
 @router.post("/")
 async def insertar_veterinario(veterinario: Veterinario, conn=Depends(get_conexion)):
-    consulta = """
-        INSERT INTO veterinario (id, licencia, especialidad, activo, persona_id)
-        VALUES (%s, %s, %s, %s, %s)
-    """
     try:
         async with conn.cursor() as cursor:
-            await cursor.execute("SELECT pg_advisory_xact_lock(1005)")
-            await cursor.execute("SELECT id FROM veterinario ORDER BY id DESC LIMIT 1")
-            fila = await cursor.fetchone()
-            ultimo_id = (fila["id"] if isinstance(fila, dict) else fila[0]) if fila else 0
-            nuevo_id = ultimo_id + 1
-            parametros = (
-                nuevo_id,
-                veterinario.licencia,
-                veterinario.especialidad,
-                veterinario.activo,
-                veterinario.persona_id,
-            )
-            await cursor.execute(consulta, parametros)
+            nuevo_id = await asignador.insertar(cursor, "veterinario", veterinario.model_dump())
             await conn.commit()
-            return {"mensaje": "Veterinario registrado exitosamente"}
+            return {"mensaje": "Veterinario registrado exitosamente", "id": nuevo_id}
     except Exception as e:
         await conn.rollback()
         print(f"Error insertar veterinario: {e}")
         raise HTTPException(status_code=400, detail="Error al insertar veterinario")
 
 
-@router.put("/{id_veterinario}")
-async def actualizar_veterinario(id_veterinario: int, veterinario: Veterinario, conn=Depends(get_conexion)):
-    consulta = """
-        UPDATE veterinario
-        SET licencia = %s, especialidad = %s, activo = %s, persona_id = %s
-        WHERE id = %s
-    """
-    parametros = (
-        veterinario.licencia,
-        veterinario.especialidad,
-        veterinario.activo,
-        veterinario.persona_id,
-        id_veterinario,
-    )
+async def _guardar_veterinario(id_veterinario: int, valores: dict, conn):
     try:
         async with conn.cursor() as cursor:
-            await cursor.execute("SELECT id FROM veterinario WHERE id = %s", (id_veterinario,))
-            if not await cursor.fetchone():
-                raise HTTPException(status_code=404, detail="Veterinario no encontrado")
-            await cursor.execute(consulta, parametros)
+            await actualizar_por_id(cursor, "veterinario", id_veterinario, valores, "Veterinario no encontrado")
+            await cache_veterinarios.notificar(cursor, id_veterinario)
             await conn.commit()
+            cache_veterinarios.invalidar(id_veterinario)
             return {"mensaje": "Veterinario actualizado exitosamente"}
     except HTTPException:
         raise
@@ -109,15 +128,24 @@ async def actualizar_veterinario(id_veterinario: int, veterinario: Veterinario,
         raise HTTPException(status_code=400, detail="Error al actualizar veterinario")
 
 
+@router.put("/{id_veterinario}")
+async def actualizar_veterinario(id_veterinario: int, veterinario: Veterinario, conn=Depends(get_conexion)):
+    return await _guardar_veterinario(id_veterinario, veterinario.model_dump(), conn)
+
+
+@router.patch("/{id_veterinario}")
+async def modificar_veterinario(id_veterinario: int, veterinario: VeterinarioParcial, conn=Depends(get_conexion)):
+    return await _guardar_veterinario(id_veterinario, veterinario.model_dump(exclude_unset=True), conn)
+
+
 @router.delete("/{id_veterinario}")
 async def eliminar_veterinario(id_veterinario: int, conn=Depends(get_conexion)):
     try:
         async with conn.cursor() as cursor:
-            await cursor.execute("SELECT id FROM veterinario WHERE id = %s", (id_veterinario,))
-            if not await cursor.fetchone():
-                raise HTTPException(status_code=404, detail="Veterinario no encontrado")
-            await cursor.execute("DELETE FROM veterinario WHERE id = %s", (id_veterinario,))
+            await eliminar_por_id(cursor, "veterinario", id_veterinario, "Veterinario no encontrado")
+            await cache_veterinarios.notificar(cursor, id_veterinario)
             await conn.commit()
+            cache_veterinarios.invalidar(id_veterinario)
             return {"mensaje": "Veterinario eliminado exitosamente"}
     except HTTPException:
         raise
@@ -0,0 +1,155 @@
+"""Arranque de producción: N workers de uvicorn con el pool repartido entre ellos.
+
+Uso:
+    python -m servidor --workers 4 --puerto 8000
+
+Los valores por defecto salen de .env (SERVIDOR_*, DB_CONEXIONES_TOTALES). Usa uvloop y
+httptools si están instalados (por ejemplo con `uvicorn[standard]`). Con SIGTERM cada
+worker deja de aceptar conexiones, espera las peticiones en curso hasta SERVIDOR_DRENAJE
+segundos y cierra el pool desde el lifespan antes de salir.
+
+Los límites de intentos de login (LOGIN_*) se cuentan en memoria de cada worker: con N
+workers un atacante puede llegar a N veces LOGIN_MAX_FALLOS_* fallos antes de que todos
+lo bloqueen.
+"""
+
+import argparse
+import importlib.util
+import multiprocessing
+import os
+import signal
+import socket
+
+import uvicorn
+
+from config.configuracion import config
+
+
+def conexiones_fijas_por_worker() -> int:
+    """Conexiones que cada worker abre fuera de los pools: LISTEN y los workers de reportes."""
+    return 1 + config.REPORTES_WORKERS
+
+
+def repartir_conexiones(total: int, workers: int, fijas: int, minimo: int) -> tuple[int, int]:
+    """(min_size, max_size) del pool de cada worker para no superar `total` entre todos."""
+    maximo = total // workers - fijas
+    if maximo < 1:
+        raise SystemExit(
+            f"{total} conexiones no alcanzan para {workers} workers "
+            f"({fijas} fijas por worker más al menos 1 en el pool)"
+        )
+    return min(minimo, maximo), maximo
+
+
+def ajustes_workers(workers: int) -> dict:
+    """Valores de Constantes que cambian según la cantidad de workers."""
+    ajustes = {
+        # Con un secreto aleatorio por proceso, un token firmado por un worker no valdría en otro.
+        "SESION_SECRETO": config.SESION_SECRETO,
+    }
+    if config.DB_CONEXIONES_TOTALES is not None:
+        minimo, maximo = repartir_conexiones(
+            config.DB_CONEXIONES_TOTALES, workers, conexiones_fijas_por_worker(), config.DB_POOL_MIN_SIZE
+        )
+        ajustes["DB_POOL_MIN_SIZE"] = minimo
+        ajustes["DB_POOL_MAX_SIZE"] = maximo
+    if config.DB_LECTURA_HOST and config.DB_LECTURA_CONEXIONES_TOTALES is not None:
+        minimo, maximo = repartir_conexiones(
+            config.DB_LECTURA_CONEXIONES_TOTALES, workers, 0, config.DB_LECTURA_POOL_MIN_SIZE
+        )
+        ajustes["DB_LECTURA_POOL_MIN_SIZE"] = minimo
+        ajustes["DB_LECTURA_POOL_MAX_SIZE"] = maximo
+    return ajustes
+
+
+def socket_reuseport(host: str, puerto: int, backlog: int) -> socket.socket:
+    familia = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(familia, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+    sock.bind((host, puerto))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+class ServidorReusePort(uvicorn.Server):
+    """Cada worker abre su propio socket con SO_REUSEPORT: el kernel reparte las conexiones
+    nuevas entre los workers en lugar de que todos compitan por el accept() de uno heredado."""
+
+    def run(self, sockets=None):
+        return super().run(sockets=[socket_reuseport(self.config.host, self.config.port, self.config.backlog)])
+
+
+def _worker_reuseport(opciones: dict):
+    ServidorReusePort(uvicorn.Config(**opciones)).run()
+
+
+def lanzar_reuseport(opciones: dict, workers: int):
+    """Un proceso por worker, cada uno con su propio socket; SIGTERM se reenvía a todos.
+
+    Solo usa la API pública de uvicorn (Config y Server): el supervisor interno cambia de
+    firma entre versiones. A diferencia de él, no reinicia workers que terminan.
+    """
+    contexto = multiprocessing.get_context("spawn")
+    procesos = [contexto.Process(target=_worker_reuseport, args=(opciones,)) for _ in range(workers)]
+    for proceso in procesos:
+        proceso.start()
+
+    def reenviar(senal, _marco):
+        for proceso in procesos:
+            if proceso.is_alive():
+                os.kill(proceso.pid, senal)
+
+    # Ctrl+C ya llega a los workers por el grupo de procesos; reenviarlo sería una segunda
+    # señal, que uvicorn trata como salida forzada sin drenar.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, reenviar)
+    for proceso in procesos:
+        proceso.join()
+
+
+def principal(host: str, puerto: int, workers: int, reuseport: bool):
+    if reuseport and not hasattr(socket, "SO_REUSEPORT"):
+        raise SystemExit("SO_REUSEPORT no está disponible en esta plataforma")
+
+    # Los workers los heredan como variables de entorno (pydantic-settings las prefiere
+    # sobre .env); con un solo worker la app se importa en este proceso, que ya cargó config.
+    for clave, valor in ajustes_workers(workers).items():
+        os.environ[clave] = str(valor)
+        setattr(config, clave, valor)
+    loop = "uvloop" if importlib.util.find_spec("uvloop") else "asyncio"
+    http = "httptools" if importlib.util.find_spec("httptools") else "h11"
+    print(
+        f"Servidor en {host}:{puerto} con {workers} workers (loop={loop}, http={http}, "
+        f"reuseport={reuseport}, pool por worker={config.DB_POOL_MAX_SIZE})"
+    )
+
+    opciones = {
+        "app": "main:app",
+        "host": host,
+        "port": puerto,
+        "loop": loop,
+        "http": http,
+        "backlog": config.SERVIDOR_BACKLOG,
+        "timeout_graceful_shutdown": config.SERVIDOR_DRENAJE,
+    }
+    if workers > 1 and reuseport:
+        lanzar_reuseport(opciones, workers)
+    else:
+        uvicorn.run(**opciones, workers=workers)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default=config.SERVIDOR_HOST)
+    parser.add_argument("--puerto", type=int, default=config.SERVIDOR_PUERTO)
+    parser.add_argument("--workers", type=int, default=config.SERVIDOR_WORKERS, help="0 = uno por CPU")
+    parser.add_argument("--reuseport", action=argparse.BooleanOptionalAction, default=config.SERVIDOR_REUSEPORT)
+    argumentos = parser.parse_args()
+    principal(
+        argumentos.host,
+        argumentos.puerto,
+        argumentos.workers or os.process_cpu_count() or 1,
+        argumentos.reuseport,
+    )